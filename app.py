@@ -1,93 +1,231 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session
-from datetime import timedelta
-from supabase_client import insert_score, get_leaderboard, delete_user_from_leaderboard
-from better_profanity import profanity
-from custom_profanity import CUSTOM_PROFANITY_WORDS
+import startup  # first, so the startup report covers the imports below
+from flask import Flask, render_template, request, redirect, url_for, jsonify, session, make_response, Response, stream_with_context
+from markupsafe import Markup
+from datetime import datetime, timedelta
+from storage import insert_scores, iter_leaderboard, save_event
+import storage
+import async_storage
+from leaderboard_cache import leaderboard_cache
+from ranking_index import LeaderboardIndex, normalize_college
+from pagination import encode_cursor, decode_cursor
+from leaderboard_windows import resolve_window, event_key
+from custom_profanity import HIDDEN_USERNAMES
+from score_queue import ScoreWriteQueue, SCORE_WRITE_BEHIND
+from rate_limit import SubmissionLimiter
+import username_filter
+from username_filter import validate_username
+import metrics
+import logging_setup
+import assets
+import export
+from live_updates import publisher as live_publisher
+from logging_setup import configure_logging
 import os
-import logging
 import re
+import asyncio
+import math
+import logging
+import threading
+import time
+import uuid
+import hashlib
+from collections import OrderedDict
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+startup.mark_phase("imports")
 
-# Configure profanity filter
-profanity.load_censor_words()
-profanity.add_censor_words(CUSTOM_PROFANITY_WORDS)
+# Configure logging (see logging_setup.py for LOG_FORMAT, LOG_SAMPLE_RATES, ...)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'svkm-typing-test-2025-secret-key')  # Use environment variable with fallback
 app.permanent_session_lifetime = timedelta(days=7)
+metrics.init_app(app)
+logging_setup.init_app(app)
+assets.init_app(app)  # hashed static files and the asset_url() template helper
+startup.mark_phase("app setup")
+
+# In-memory rankings, loaded from storage on first use and then kept current
+# by submit_result and the admin routes. Other workers' writes are picked up
+# by reloading every RANKING_INDEX_RESYNC_SECONDS.
+RANKING_INDEX_RESYNC_SECONDS = float(os.environ.get('RANKING_INDEX_RESYNC_SECONDS', '300'))
+ranking_index = LeaderboardIndex(hidden=HIDDEN_USERNAMES)
+_ranking_index_loaded_at = None
+_ranking_index_attempted_at = None
+_ranking_index_lock = threading.Lock()
+
+# Optional write-behind: submit_result queues scores and a background thread
+# writes them in bulk (see score_queue.py)
+score_queue = ScoreWriteQueue(insert_scores) if SCORE_WRITE_BEHIND else None
+if score_queue is not None:
+    score_queue.start()
+
+# Bounds submissions per student and folds double-fired requests into one
+submission_limiter = SubmissionLimiter()
 
-def contains_inappropriate_text(text):
+# Scores are recomputed from the keystroke log script.js sends. Until every
+# client sends one, submissions without a log are accepted as reported;
+# flagged submissions are recorded unless KEYSTROKE_REJECT_FLAGGED is set.
+KEYSTROKE_LOG_REQUIRED = os.environ.get('KEYSTROKE_LOG_REQUIRED', '0') == '1'
+KEYSTROKE_REJECT_FLAGGED = os.environ.get('KEYSTROKE_REJECT_FLAGGED', '0') == '1'
+# Same bound as keystroke_verify.MAX_PLAUSIBLE_WPM, without importing NumPy
+MAX_RAW_WPM = int(os.environ.get('KEYSTROKE_MAX_WPM', '250'))
+
+def collect_app_metrics():
+    """Cache, score queue, ranking index, storage circuit and live stream figures for /metrics"""
+    cache = leaderboard_cache.stats()
+    limiter = submission_limiter.stats()
+    circuit = storage.circuit_breaker.stats()
+    live = live_publisher.stats()
+    samples = [
+        ("leaderboard_cache_lookups_total", "Leaderboard cache lookups by result", "counter",
+         [({"result": "hit"}, cache["hits"]), ({"result": "stale"}, cache["stale_hits"]), ({"result": "miss"}, cache["misses"])]),
+        ("leaderboard_cache_hit_ratio", "Share of leaderboard cache lookups served from cache", "gauge", [({}, cache["hit_rate"])]),
+        ("leaderboard_cache_entries", "Entries in the leaderboard cache", "gauge", [({}, cache["entries"])]),
+        ("leaderboard_cache_invalidations_total", "Leaderboard cache invalidations", "counter", [({}, cache["invalidations"])]),
+        ("ranking_index_loaded", "Whether the in-memory ranking index has loaded", "gauge", [({}, int(_ranking_index_loaded_at is not None))]),
+        ("submissions_total", "Score submissions by rate limiter verdict", "counter",
+         [({"verdict": "allowed"}, limiter["allowed"]), ({"verdict": "limited"}, limiter["limited"]),
+          ({"verdict": "coalesced"}, limiter["coalesced"])]),
+        ("storage_circuit_open", "Whether storage calls are failing fast (1 open, 0.5 half open)", "gauge",
+         [({}, {"closed": 0, "half_open": 0.5, "open": 1}[circuit["state"]])]),
+        ("storage_circuit_opened_total", "Times the storage circuit opened", "counter", [({}, circuit["opened"])]),
+        ("storage_circuit_rejected_total", "Storage calls failed fast by the open circuit", "counter", [({}, circuit["rejected"])]),
+        ("leaderboard_last_good_served_total", "Leaderboard pages served from the last good copy", "counter",
+         [({}, storage.last_good.served)]),
+        ("leaderboard_stream_subscribers", "Open live leaderboard streams", "gauge", [({}, live["subscribers"])]),
+        ("leaderboard_stream_events_total", "Live leaderboard events published", "counter", [({}, live["published"])]),
+        ("leaderboard_stream_rejected_total", "Live leaderboard streams refused at the subscriber cap", "counter",
+         [({}, live["rejected"])]),
+        ("log_records_dropped_total", "Log records dropped because the log queue was full", "counter",
+         [({}, logging_setup.DeferredQueueHandler.dropped)]),
+    ]
+    if score_queue is not None:
+        queue = score_queue.stats()
+        samples += [
+            ("score_queue_depth", "Scores waiting to be written", "gauge", [({}, queue["queue_depth"])]),
+            ("score_queue_rejected_total", "Scores rejected because the queue was full", "counter", [({}, queue["rejected"])]),
+            ("score_queue_flushed_rows_total", "Scores written by the queue", "counter", [({}, queue["flushed_rows"])]),
+            ("score_queue_failed_flushes_total", "Queue flushes that failed", "counter", [({}, queue["failed_flushes"])]),
+            ("score_queue_dropped_rows_total", "Scores dropped after repeated failures", "counter", [({}, queue["dropped_rows"])]),
+        ]
+    return samples
+
+metrics.register_collector(collect_app_metrics)
+metrics.register_collector(startup.collect_metrics)
+
+def get_ranking_index():
     """
-    Advanced check for inappropriate content including Hindi terms and variations
+    Return the ranking index, loading it from storage when needed.
+    Returns None if it has never loaded successfully, so callers can fall
+    back to get_leaderboard. Only that first load is waited for: once the
+    index is loaded, a resync runs on a background thread while requests
+    keep reading the current copy.
     """
-    # Convert to lowercase for better matching
-    text = text.lower()
-    
-    # Check using better-profanity library
-    if profanity.contains_profanity(text):
-        return True
-        
-    # Check for substrings (to catch partial matches like "ma ka")
-    for word in CUSTOM_PROFANITY_WORDS:
-        if word.lower() in text:
-            return True
-            
-    # Check for common patterns with spaces or dots
-    text_without_spaces = text.replace(" ", "").replace(".", "")
-    for word in CUSTOM_PROFANITY_WORDS:
-        if word.replace(" ", "").lower() in text_without_spaces:
-            return True
-            
-    # Check for specific inappropriate patterns
-    inappropriate_patterns = [
-        r'maa\s*ka',
-        r'teri\s*maa',
-        r'ashiq',
-        r'left\s*nihal'
-    ]
-    
-    for pattern in inappropriate_patterns:
-        if re.search(pattern, text_without_spaces):
-            return True
-            
-    return False
+    if _ranking_index_loaded_at is not None:
+        if _ranking_index_due() and _ranking_index_lock.acquire(blocking=False):
+            try:
+                threading.Thread(target=_resync_ranking_index, name="ranking-index-resync", daemon=True).start()
+            except Exception:
+                _ranking_index_lock.release()
+                raise
+        return ranking_index
 
-def validate_username(username):
-    # Check for inappropriate content
-    if contains_inappropriate_text(username):
-        return False, "Username contains inappropriate language"
-    
-    # Check for all name variants anywhere in the username
-    blocked_patterns = [
-        r'r\s*i\s*y\s*a+',
-        r'r\s*h\s*e\s*a+',
-        r'r\s*i\s*a+',
-        r'r\s*e+\s*y\s*a+'
-    ]
-    
-    for pattern in blocked_patterns:
-        if re.search(pattern, username.lower()):
-            return False, "This username is not allowed"
-    
-    # Check minimum length
-    if len(username) < 3:
-        return False, "Username must be at least 3 characters long"
-    
-    # Check maximum length
-    if len(username) > 30:
-        return False, "Username must be less than 30 characters"
-    
-    # Only allow letters, numbers, and underscores
-    if not username.replace('_', '').isalnum():
-        return False, "Username can only contain letters, numbers, and underscores"
-    
-    return True, ""
+    with _ranking_index_lock:
+        if _ranking_index_due():
+            _load_ranking_index()
+    return ranking_index if _ranking_index_loaded_at is not None else None
+
+def _ranking_index_due():
+    now = time.monotonic()
+    stale = _ranking_index_loaded_at is None or now - _ranking_index_loaded_at >= RANKING_INDEX_RESYNC_SECONDS
+    # Don't retry a failed load on every request while storage is down
+    recently_tried = _ranking_index_attempted_at is not None and now - _ranking_index_attempted_at < 30
+    return stale and not recently_tried
+
+def _load_ranking_index():
+    """Read the whole board into the index. Caller holds _ranking_index_lock."""
+    global _ranking_index_loaded_at, _ranking_index_attempted_at
+    _ranking_index_attempted_at = time.monotonic()
+    try:
+        # False when a clear or removal raced the read; retried later
+        if ranking_index.load(iter_leaderboard()):
+            _ranking_index_loaded_at = time.monotonic()
+    except Exception as e:
+        logger.error(f"Failed to load ranking index: {str(e)}")
+
+def _resync_ranking_index():
+    try:
+        if _ranking_index_due():
+            _load_ranking_index()
+    finally:
+        _ranking_index_lock.release()
+
+async def fetch_rankings(college=None, limit=50, cursor=None, window=None):
+    """
+    One page of rankings, from the ranking index when it is loaded and from
+    storage otherwise. `window` is a key from resolve_window; windowed boards
+    always come from the (cached) storage rollups. Returns
+    {"data", "next_cursor", "version"} or {"error"}; "version" changes
+    whenever the underlying rankings do. Storage pages served from the last
+    good copy (see storage.get_leaderboard) also carry "stale": True.
+    """
+    index = get_ranking_index() if window is None else None
+    if index is not None:
+        version = index.version
+        after = decode_cursor(cursor) if cursor else None
+        rankings = index.top(limit, college=college, after=after)
+        next_cursor = encode_cursor(rankings[-1]) if rankings and len(rankings) == limit else None
+        return {"data": rankings, "next_cursor": next_cursor, "version": f"i{version}"}
+
+    logger.debug("Fetching leaderboard data from storage")
+    generation = leaderboard_cache.generation
+    response = await async_storage.get_leaderboard(limit=limit, cursor=cursor, college=college, window=window)
+    if 'error' in response:
+        return response
+    rankings = [entry for entry in response['data'] if entry['username'].lower() not in HIDDEN_USERNAMES]
+    if response.get('stale'):
+        # Last good copy while storage is failing; never share an ETag with live data
+        return {"data": rankings, "next_cursor": response.get('next_cursor'), "version": f"s{generation}", "stale": True}
+    return {"data": rankings, "next_cursor": response.get('next_cursor'), "version": f"c{generation}"}
+
+# Rendered rankings tables keyed by (college, index version). A score write
+# bumps the version, so stale tables are simply never looked up again and
+# age out of the LRU. Only index-backed boards are cached: the storage
+# fallback has no version that tracks other workers' writes.
+LEADERBOARD_FRAGMENT_CACHE_SIZE = 32
+_leaderboard_fragments = OrderedDict()
+_leaderboard_fragments_lock = threading.Lock()
+
+async def render_leaderboard_table(college=None, window=None):
+    """Rankings table HTML for one board, from the fragment cache when possible"""
+    index = get_ranking_index() if window is None else None
+    key = (normalize_college(college) if college else None, index.version) if index is not None else None
+    if key is not None:
+        with _leaderboard_fragments_lock:
+            table = _leaderboard_fragments.get(key)
+            if table is not None:
+                _leaderboard_fragments.move_to_end(key)
+                return table
+
+    response = await fetch_rankings(college=college, window=window)
+    if 'error' in response:
+        logger.error(f"Error fetching leaderboard: {response['error']}")
+        return Markup(render_template('_leaderboard_table.html', rankings=[]))
+
+    rankings = response['data']
+    # Format the data for display
+    for rank in rankings:
+        rank['name'] = rank['username']  # Use username as name
+    logger.debug("Formatted %d entries for display", len(rankings))
+
+    table = Markup(render_template('_leaderboard_table.html', rankings=rankings))
+    if key is not None:
+        with _leaderboard_fragments_lock:
+            _leaderboard_fragments[key] = table
+            while len(_leaderboard_fragments) > LEADERBOARD_FRAGMENT_CACHE_SIZE:
+                _leaderboard_fragments.popitem(last=False)
+    return table
 
 @app.route('/')
 @app.route('/login')
@@ -134,81 +272,266 @@ def logout():
     return redirect(url_for('login'))
 
 @app.route('/submit_result', methods=['POST'])
-def submit_result():
+async def submit_result():
     if 'user' not in session:
         logger.error('Submit result attempted without login')
         return jsonify({'success': False, 'error': 'Not logged in'})
     
     data = request.json
-    logger.info(f"Received test results for user: {session['user']['username']}")
-    logger.info(f"Test data received: {data}")
+    logger.info("Received test results for user: %s", session['user']['username'])
+    logger.debug("Test data received: %s", data)
     
     wpm = data.get('wpm')
     accuracy = data.get('accuracy')
+    raw_wpm = data.get('raw_wpm')
     duration = data.get('duration_seconds', 60)  # Default to 60 seconds if not provided
     college = session['user'].get('college', 'Unknown')  # Fetch college from session
 
+    keystrokes = data.get('keystrokes')
+    verification = None
+    if keystrokes is not None:
+        try:
+            from keystroke_verify import verify  # NumPy; deferred under LAZY_INIT
+            verification = verify(keystrokes, reported={'wpm': wpm, 'accuracy': accuracy})
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Invalid keystroke log: {str(e)}'}), 400
+        if verification['flags']:
+            logger.warning("Flagged submission from %s: %s", session['user']['username'], verification['flags'])
+            if KEYSTROKE_REJECT_FLAGGED:
+                return jsonify({'success': False, 'error': 'This result could not be verified'}), 422
+        wpm = verification['wpm']
+        raw_wpm = verification['raw_wpm']
+        accuracy = verification['accuracy']
+        duration = max(1, round(verification['duration_ms'] / 1000))
+    elif KEYSTROKE_LOG_REQUIRED:
+        return jsonify({'success': False, 'error': 'Missing keystroke log'}), 400
+
     if not all([wpm, accuracy, college]):
         logger.error(f"Missing required data - WPM: {wpm}, Accuracy: {accuracy}, College: {college}")
         return jsonify({'success': False, 'error': 'Missing required data'})
+    raw_wpm = valid_raw_wpm(raw_wpm)
+
+    username = session['user']['username']
+    verdict, value = submission_limiter.admit(username, (wpm, accuracy, duration))
+    if verdict == 'limited':
+        logger.warning("Rate limiting submissions for user: %s", username)
+        response = jsonify({'success': False, 'error': 'Too many submissions, please wait a moment'})
+        response.headers['Retry-After'] = str(max(1, math.ceil(value)))
+        return response, 429
+    if verdict == 'duplicate':
+        logger.info("Coalescing duplicate submission for user: %s", username)
+        body, status, headers = await asyncio.wrap_future(value.future)
+        return jsonify(body), status, headers
+
+    result = ({'success': False, 'error': 'Submission failed'}, 200, {})
+    try:
+        result = await store_result(username, college, wpm, accuracy, duration, raw_wpm)
+        if verification is not None:
+            await store_keystroke_log(username, college, keystrokes, verification)
+        return jsonify(result[0]), result[1], result[2]
+    finally:
+        submission_limiter.finish(username, value, result, ok=result[0]['success'])
+
+def valid_raw_wpm(value):
+    """`value` as a whole WPM, or None when it is missing, not a number or out of range"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(value) or not 0 <= value <= MAX_RAW_WPM:
+        return None
+    return int(round(value))
+
+async def store_keystroke_log(username, college, keystrokes, verification):
+    """Keep the log for re-verification; a failure here does not fail the submission"""
+    response = await async_storage.insert_keystroke_log({
+        'username': username,
+        'college': college,
+        'wpm': verification['wpm'],
+        'raw_wpm': verification['raw_wpm'],
+        'accuracy': verification['accuracy'],
+        'duration_ms': verification['duration_ms'],
+        'flags': verification['flags'],
+        'log': keystrokes,
+    })
+    if 'error' in response:
+        logger.error(f"Error storing keystroke log: {response['error']}")
+
+def summary_row(response):
+    """The user's summary row from an insert_score response (dict or Supabase APIResponse)"""
+    rows = response.get('data') if isinstance(response, dict) else getattr(response, 'data', None)
+    if isinstance(rows, list):
+        rows = rows[0] if rows else None
+    return rows if isinstance(rows, dict) else None
+
+def record_score(username, college, wpm, accuracy, summary=None):
+    """
+    Apply a stored score to the ranking index and tell the live leaderboard
+    streams about the user's updated entry. Ranks are only sent once
+    the index has loaded; without them clients refetch the board. Until
+    then the entry comes from `summary`, the stored summary row, when the
+    write returned one (the write-behind queue has not written it yet).
+    """
+    if not ranking_index.record(username, college, wpm, accuracy):
+        return
+    delta = {'username': username, 'college': normalize_college(college)}
+    if summary is not None:
+        delta.update(best_wpm=float(summary['wpm']), avg_accuracy=float(summary['avg_accuracy']),
+                     tests_taken=summary['tests_taken'])
+    if _ranking_index_loaded_at is not None:
+        standing = ranking_index.standing(username, 0)
+        if standing is not None:
+            delta = dict(standing['entry'], rank=standing['global_rank'], college_rank=standing['college_rank'])
+    live_publisher.publish('rank', delta, college=college)
+
+async def store_result(username, college, wpm, accuracy, duration, raw_wpm=None):
+    """
+    Write one score, through the write-behind queue when it is enabled.
+    Returns (body, status, headers), which duplicate submissions share.
+    """
+    if score_queue is not None:
+        queued = score_queue.submit({
+            'username': username,
+            'college': college,
+            'wpm': wpm,
+            'accuracy': accuracy,
+            'duration_seconds': duration,
+            'raw_wpm': raw_wpm
+        })
+        if not queued:
+            logger.warning("Score queue full, rejecting submission")
+            return {'success': False, 'error': 'Server is busy, please try again'}, 503, {'Retry-After': '2'}
+
+        record_score(username, college, wpm, accuracy)
+        logger.debug("Score queued for write-behind")
+        return {'success': True, 'redirect': '/leaderboard'}, 200, {}
 
     try:
         # Insert score directly using the updated function
-        response = insert_score(
-            username=session['user']['username'],
+        response = await async_storage.insert_score(
+            username=username,
             college=college,
             wpm=wpm,
             accuracy=accuracy,
-            duration_seconds=duration
+            duration_seconds=duration,
+            raw_wpm=raw_wpm
         )
         
         if 'error' in response:
             logger.error(f"Error from Supabase: {response['error']}")
-            return jsonify({'success': False, 'error': response['error']})
-            
-        logger.info("Score submitted successfully")
-        return jsonify({'success': True, 'redirect': '/leaderboard'})
+            return {'success': False, 'error': response['error']}, 200, {}
+
+        record_score(username, college, wpm, accuracy, summary_row(response))
+        logger.debug("Score submitted successfully")
+        return {'success': True, 'redirect': '/leaderboard'}, 200, {}
 
     except Exception as e:
         logger.error(f"Exception during score submission: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)})
+        return {'success': False, 'error': str(e)}, 200, {}
 
 @app.route('/leaderboard')
-def leaderboard():
+async def leaderboard():
     if 'user' not in session:
         logger.warning("Leaderboard access attempted without login")
         return redirect(url_for('login'))
     
     selected_college = request.args.get('college', 'all')
+    selected_window = request.args.get('window', 'all')
     
     try:
-        logger.info("Fetching leaderboard data")
-        response = get_leaderboard(limit=50)
-        
-        if 'error' in response:
-            logger.error(f"Error fetching leaderboard: {response['error']}")
-            rankings = []
-        else:
-            raw_data = response.get('data', [])
-            logger.info(f"Raw leaderboard data: {raw_data}")
-            
-            # Filter by college if needed
-            if selected_college != 'all':
-                rankings = [entry for entry in raw_data if entry.get('college', '').upper() == selected_college.upper()]
-            else:
-                rankings = raw_data
-            
-            # Format the data for display
-            for rank in rankings:
-                rank['name'] = rank['username']  # Use username as name
-                
-            logger.info(f"Formatted {len(rankings)} entries for display")
-            
-        return render_template('leaderboard.html', rankings=rankings, selected_college=selected_college)
+        window = resolve_window(selected_window)
+        table = await render_leaderboard_table(None if selected_college == 'all' else selected_college, window)
+        return render_template('leaderboard.html', leaderboard_table=table, selected_college=selected_college,
+                               selected_window=selected_window)
     
     except Exception as e:
         logger.error(f"Exception in leaderboard route: {str(e)}")
-        return render_template('leaderboard.html', rankings=[], selected_college=selected_college)
+        table = Markup(render_template('_leaderboard_table.html', rankings=[]))
+        return render_template('leaderboard.html', leaderboard_table=table, selected_college=selected_college,
+                               selected_window=selected_window)
+
+# Strong ETags are built from the rankings version, which is per process;
+# the boot id keeps two workers at the same version from sharing an ETag
+BOOT_ID = uuid.uuid4().hex[:12]
+LEADERBOARD_API_MAX_AGE = int(os.environ.get('LEADERBOARD_API_MAX_AGE', '5'))
+LEADERBOARD_API_STALE = int(os.environ.get('LEADERBOARD_API_STALE', '30'))
+
+@app.route('/api/leaderboard')
+async def api_leaderboard():
+    """
+    Rankings as compact JSON. Public and session-free so browsers and CDNs
+    can cache it; clients revalidate with If-None-Match and get 304 until
+    the rankings change.
+    """
+    college = request.args.get('college', 'all')
+    college = None if college.lower() == 'all' else college
+    cursor = request.args.get('cursor') or None
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 100)
+        window = resolve_window(request.args.get('window'))
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        response = await fetch_rankings(college=college, limit=limit, cursor=cursor, window=window)
+    except Exception as e:
+        logger.error(f"Exception in leaderboard API: {str(e)}")
+        response = {'error': str(e)}
+    if 'error' in response:
+        return jsonify({'error': 'Leaderboard is temporarily unavailable'}), 503
+
+    key = f"{BOOT_ID}:{response['version']}:{window}:{college}:{limit}:{cursor}"
+    etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    cache_control = f"public, max-age={LEADERBOARD_API_MAX_AGE}, stale-while-revalidate={LEADERBOARD_API_STALE}"
+    if response.get('stale'):
+        cache_control = "no-cache"
+
+    if request.if_none_match.contains(etag):
+        not_modified = make_response('', 304)
+        not_modified.set_etag(etag)
+        not_modified.headers['Cache-Control'] = cache_control
+        return not_modified
+
+    rankings = [
+        {
+            'username': entry['username'],
+            'college': entry.get('college'),
+            'best_wpm': entry['best_wpm'],
+            'avg_accuracy': entry['avg_accuracy'],
+            'tests_taken': entry['tests_taken'],
+        }
+        for entry in response['data']
+    ]
+    body = {'rankings': rankings, 'next_cursor': response.get('next_cursor')}
+    if response.get('stale'):
+        body['stale'] = True
+    result = jsonify(body)
+    result.set_etag(etag)
+    result.headers['Cache-Control'] = cache_control
+    return result
+
+@app.route('/api/leaderboard/stream')
+def leaderboard_stream():
+    """
+    Server-Sent Events for the all-time board, or one college's with
+    ?college=: "rank" (a user's new entry and ranks), "remove" and "reset".
+    Resumes after Last-Event-ID (or ?last_event_id=); 503 once
+    LIVE_MAX_SUBSCRIBERS streams are open.
+    """
+    college = request.args.get('college', 'all')
+    college = None if college.lower() == 'all' else college
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = live_publisher.subscribe(college, last_event_id)
+    if subscription is None:
+        logger.warning("Live leaderboard stream refused, subscriber cap reached")
+        return jsonify({'error': 'Too many live viewers, falling back to polling'}), 503, {'Retry-After': '30'}
+
+    response = Response(subscription, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/about')
 def about():
@@ -233,16 +556,53 @@ def get_user_info():
         'sapId': session['user']['sap_id']
     })
 
+USER_RANK_MAX_NEIGHBOURS = 25
+
+@app.route('/get_user_rank')
+async def get_user_rank():
+    """
+    The session user's global and college rank with up to `neighbours`
+    (default 5) entries either side, on the global board or, with
+    board=college, on the user's college board. Answered by bisecting the
+    ranking index, or by indexed COUNT queries when it has not loaded.
+    """
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    username = session['user']['username']
+    board = request.args.get('board', 'global')
+    try:
+        neighbours = min(max(int(request.args.get('neighbours', 5)), 0), USER_RANK_MAX_NEIGHBOURS)
+        if board not in ('global', 'college'):
+            raise ValueError(f"Unknown board: {board!r}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    index = get_ranking_index()
+    if index is not None:
+        standing = index.standing(username, neighbours, college_board=board == 'college')
+    else:
+        response = await async_storage.get_user_rank(username, neighbours, sorted(HIDDEN_USERNAMES), board == 'college')
+        if 'error' in response:
+            logger.error(f"Error fetching rank for {username}: {response['error']}")
+            return jsonify({'error': 'Rank is temporarily unavailable'}), 503
+        standing = response['data']
+
+    if standing is None:
+        return jsonify({'username': username, 'ranked': False})
+    return jsonify(dict(standing, username=username, ranked=True, board=board))
+
 @app.route('/admin/clear-data', methods=['POST'])
-def clear_data():
+async def clear_data():
     try:
-        from supabase_client import clear_leaderboard
-        response = clear_leaderboard()
+        response = await async_storage.clear_leaderboard()
         
         if 'error' in response:
             logger.error(f"Error clearing data: {response['error']}")
             return jsonify({'success': False, 'error': str(response['error'])})
             
+        ranking_index.clear()
+        live_publisher.publish('reset', {})
         logger.info("Successfully cleared all leaderboard data")
         return jsonify({'success': True, 'message': 'All leaderboard data has been cleared'})
         
@@ -251,18 +611,20 @@ def clear_data():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/admin/remove-user', methods=['POST'])
-def remove_inappropriate_user():
+async def remove_inappropriate_user():
     try:
         username = request.form.get('username')
         if not username:
             return jsonify({'success': False, 'error': 'Username is required'}), 400
             
-        response = delete_user_from_leaderboard(username)
+        response = await async_storage.delete_user_from_leaderboard(username)
         
         if 'error' in response:
             logger.error(f"Error removing user {username}: {response['error']}")
             return jsonify({'success': False, 'error': str(response['error'])}), 500
             
+        ranking_index.remove(username)
+        live_publisher.publish('remove', {'username': username})
         logger.info(f"Successfully removed inappropriate username: {username}")
         return jsonify({'success': True, 'message': f'User {username} has been removed from the leaderboard'})
         
@@ -270,5 +632,82 @@ def remove_inappropriate_user():
         logger.error(f"Exception during user removal: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/admin/events', methods=['POST'])
+def save_leaderboard_event():
+    """
+    Create or reschedule an event board. Expects JSON with name, starts_at
+    and ends_at (ISO 8601 with a UTC offset); the board is then at
+    /leaderboard?window=event:<name>.
+    """
+    data = request.json or {}
+    name = (data.get('name') or '').strip()
+    try:
+        starts_at = datetime.fromisoformat(data['starts_at'])
+        ends_at = datetime.fromisoformat(data['ends_at'])
+        if starts_at.tzinfo is None or ends_at.tzinfo is None:
+            raise ValueError("starts_at and ends_at need a UTC offset")
+        if not name or ends_at <= starts_at:
+            raise ValueError("name is required and ends_at must be after starts_at")
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f"Invalid event: {str(e)}"}), 400
+
+    response = save_event(name, starts_at, ends_at)
+    if 'error' in response:
+        logger.error(f"Error saving event {name}: {response['error']}")
+        return jsonify({'success': False, 'error': response['error']}), 500
+    return jsonify({'success': True, 'window': event_key(name)})
+
+@app.route('/admin/cache-stats')
+def cache_stats():
+    return jsonify(leaderboard_cache.stats())
+
+@app.route('/admin/export')
+def export_leaderboard():
+    """
+    The full leaderboard, or one college's slice with ?college=, as
+    ?format=csv (default) or ndjson, optionally for a ?window=. Streamed page
+    by page as a chunked response, so memory stays flat for any size. If
+    storage fails midway the stream is aborted rather than ended cleanly.
+    """
+    fmt = request.args.get('format', 'csv')
+    college = request.args.get('college') or None
+    try:
+        if fmt not in export.FORMATS:
+            raise ValueError(f"Unknown export format: {fmt!r}")
+        window = resolve_window(request.args.get('window'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    _, mimetype, extension = export.FORMATS[fmt]
+    scope = re.sub(r'[^A-Za-z0-9_.]+', '-', '-'.join(part for part in (college, window) if part)) or 'all'
+    filename = f"leaderboard-{scope}-{datetime.now().strftime('%Y%m%d-%H%M')}.{extension}"
+    response = Response(stream_with_context(export.export(fmt, college, window)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # let proxies pass chunks straight through
+    return response
+
+@app.route('/admin/storage-health')
+def storage_health():
+    return jsonify(storage.circuit_breaker.stats())
+
+@app.route('/admin/submit-limit-stats')
+def submit_limit_stats():
+    return jsonify(submission_limiter.stats())
+
+@app.route('/admin/score-queue-stats')
+def score_queue_stats():
+    if score_queue is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(score_queue.stats(), enabled=True))
+
+# Under LAZY_INIT these are built by the first request that needs them
+if not startup.LAZY_INIT:
+    with startup.phase("warm up"):
+        username_filter.warm_up()
+        import keystroke_verify  # imports NumPy
+        storage.warm_up()
+startup.mark_ready()
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
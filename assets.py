@@ -0,0 +1,305 @@
+# assets.py
+"""
+Static asset build: minified, content-hashed copies of the CSS and JS under
+static/ are written to static/dist/ with .gz (and, when the optional
+`brotli` package is installed, .br) variants and a manifest.json mapping
+source names to hashed ones.
+
+    python assets.py            # rebuild static/dist/
+    python assets.py --check    # exit 1 if static/dist/ is out of date
+
+static/dist/ is committed, because the Vercel deployment has no build step
+and a read-only filesystem: rebuild it whenever a CSS or JS file changes.
+
+init_app() builds at startup when ASSETS_BUILD_ON_STARTUP is set (default)
+and the manifest is missing or older than a source, adds the asset_url()
+template helper, and serves static/dist/ with immutable cache headers and
+the best precompressed variant the client accepts. If the build cannot run
+(e.g. a read-only filesystem) the committed manifest is used, and any entry
+that no longer matches its source falls back to the plain file.
+"""
+import os
+import re
+import gzip
+import json
+import sys
+import hashlib
+import logging
+from flask import url_for, send_from_directory, request, abort
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSETS_BUILD_ON_STARTUP = os.environ.get("ASSETS_BUILD_ON_STARTUP", "1") == "1"
+ASSET_EXTENSIONS = (".css", ".js")
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(source):
+    css = _CSS_COMMENT.sub("", source)
+    css = _CSS_SPACE.sub(" ", css)
+    css = _CSS_PUNCTUATION.sub(r"\1", css)
+    return css.replace(";}", "}").strip() + "\n"
+
+
+# After these (or at the start) a / begins a regex literal, not a division
+_REGEX_PREFIX_CHARS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_PREFIX_WORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield"}
+
+
+def _js_verbatim_lines(source):
+    """
+    Scan `source` and return the indexes of lines that start inside a
+    string, template literal or regex and so must be kept byte for byte.
+    Template literals may nest through ${...}; regex literals are told
+    from division by the token before the /.
+    """
+    verbatim = set()
+    line = 0
+    state = "code"  # code, line_comment, block_comment, ', ", `, regex
+    braces = []  # open { count per ${ we are inside
+    last = ""  # last significant character in code
+    word = ""  # identifier ending at `last`
+    gap = False  # whitespace since `last`
+    in_class = False  # inside [...] of a regex
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c == "\n":
+            line += 1
+            if state == "line_comment":
+                state = "code"
+            elif state in ("'", '"', "`", "regex"):
+                verbatim.add(line)
+            i += 1
+            continue
+        if state == "code":
+            nxt = source[i + 1] if i + 1 < n else ""
+            if c == "/" and nxt == "/":
+                state = "line_comment"
+                i += 2
+                continue
+            if c == "/" and nxt == "*":
+                state = "block_comment"
+                i += 2
+                continue
+            if c in "'\"`":
+                state = c
+            elif c == "/" and (not last or last in _REGEX_PREFIX_CHARS or word in _REGEX_PREFIX_WORDS):
+                state, in_class = "regex", False
+            elif c == "{" and braces:
+                braces[-1] += 1
+            elif c == "}" and braces:
+                if braces[-1] == 0:
+                    braces.pop()
+                    state = "`"
+                else:
+                    braces[-1] -= 1
+            if c.isspace():
+                gap = True
+            else:
+                if c.isalnum() or c in "_$":
+                    word = word + c if word and not gap else c
+                else:
+                    word = ""
+                last, gap = c, False
+        elif state == "block_comment":
+            if c == "*" and source.startswith("/", i + 1):
+                state = "code"
+                i += 1
+        elif state in ("'", '"', "`", "regex"):
+            if c == "\\":
+                i += 1  # skip the escaped character (a newline here continues the string)
+                if i < n and source[i] == "\n":
+                    line += 1
+                    verbatim.add(line)
+            elif state == "`" and c == "$" and source.startswith("{", i + 1):
+                braces.append(0)
+                state = "code"
+                last, word = "{", ""
+                i += 1
+            elif state == "regex" and c == "[":
+                in_class = True
+            elif state == "regex" and c == "]":
+                in_class = False
+            elif c == state or (state == "regex" and c == "/" and not in_class):
+                state = "code"
+                last, word = ")", ""  # a / after a string or regex is division
+        i += 1
+    return verbatim
+
+
+def minify_js(source):
+    """
+    Conservative whitespace minifier: drops indentation, blank lines and
+    whole-line // comments. Lines that start inside a string, template
+    literal or regex (found by _js_verbatim_lines) are kept as is, and
+    nothing that needs a real parser (renaming, joining lines) is done.
+    """
+    verbatim = _js_verbatim_lines(source)
+    lines = []
+    for index, line in enumerate(source.split("\n")):
+        if index in verbatim:
+            lines.append(line)
+            continue
+        stripped = line.strip()
+        if stripped and not stripped.startswith("//"):
+            lines.append(stripped)
+    return "\n".join(lines) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def _sources(static_folder):
+    dist = os.path.join(static_folder, DIST_DIR)
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root).startswith(os.path.abspath(dist)):
+            continue
+        for name in sorted(files):
+            if name.endswith(ASSET_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, "/"), path
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build_assets(static_folder):
+    """
+    Build static/dist/ and return the manifest {source name: hashed name},
+    with names relative to the static folder.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    for name, path in _sources(static_folder):
+        hashed, data = _hashed_name(name, path)
+        target = os.path.join(dist, hashed)
+        if not os.path.exists(target):
+            _write(target, data)
+            # mtime=0 keeps the gzip bytes identical between builds
+            _write(target + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(target + ".br", brotli.compress(data))
+        manifest[name] = f"{DIST_DIR}/{hashed}"
+        logger.debug("Built %s -> %s", name, hashed)
+
+    _write(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    # Drop builds of older versions so the committed directory stays small
+    keep = {MANIFEST_NAME} | {
+        hashed[len(DIST_DIR) + 1:] + suffix for hashed in manifest.values() for suffix in ("", ".gz", ".br")
+    }
+    for root, dirs, files in os.walk(dist):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, dist).replace(os.sep, "/") not in keep:
+                os.remove(path)
+    logger.info(f"Built {len(manifest)} static assets")
+    return manifest
+
+
+def _hashed_name(name, path):
+    base, extension = os.path.splitext(name)
+    with open(path, encoding="utf-8") as f:
+        data = MINIFIERS[extension](f.read()).encode("utf-8")
+    return f"{base}.{hashlib.sha256(data).hexdigest()[:12]}{extension}", data
+
+
+def verify_manifest(static_folder, manifest):
+    """
+    The entries of `manifest` whose hashed file exists and still matches
+    its source, so a stale committed build never serves old content
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    current = {}
+    for name, path in _sources(static_folder):
+        hashed, _ = _hashed_name(name, path)
+        if manifest.get(name) == f"{DIST_DIR}/{hashed}" and os.path.exists(os.path.join(dist, hashed)):
+            current[name] = manifest[name]
+        elif name in manifest:
+            logger.warning(f"Static asset {name} changed since the last build, serving it unhashed")
+    return current
+
+
+def _manifest_is_stale(static_folder):
+    manifest_path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return True
+    built_at = os.path.getmtime(manifest_path)
+    return any(os.path.getmtime(path) > built_at for _, path in _sources(static_folder))
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_app(app):
+    static_folder = app.static_folder
+    manifest = {}
+    if ASSETS_BUILD_ON_STARTUP and _manifest_is_stale(static_folder):
+        try:
+            manifest = build_assets(static_folder)
+        except OSError as e:
+            logger.warning(f"Could not build static assets, serving unhashed files: {str(e)}")
+    if not manifest:
+        manifest = verify_manifest(static_folder, load_manifest(static_folder))
+
+    def asset_url(filename):
+        """url_for('static', ...) for the hashed build of `filename` when there is one"""
+        return url_for('static', filename=manifest.get(filename, filename))
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    dist = os.path.join(static_folder, DIST_DIR)
+
+    @app.route(f'{app.static_url_path}/{DIST_DIR}/<path:filename>')
+    def hashed_asset(filename):
+        if filename.endswith(('.gz', '.br')) or not filename.endswith(ASSET_EXTENSIONS):
+            abort(404)
+        mimetype = 'text/css' if filename.endswith('.css') else 'text/javascript'
+        accepted = request.accept_encodings
+        encoding = None
+        if brotli is not None and accepted['br'] and os.path.exists(os.path.join(dist, filename + '.br')):
+            encoding, suffix = 'br', '.br'
+        elif accepted['gzip'] and os.path.exists(os.path.join(dist, filename + '.gz')):
+            encoding, suffix = 'gzip', '.gz'
+        else:
+            suffix = ''
+        response = send_from_directory(dist, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
+
+    return asset_url
+
+
+if __name__ == "__main__":
+    from logging_setup import configure_logging
+    configure_logging(fmt="text")
+    static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    if "--check" in sys.argv[1:]:
+        built = load_manifest(static_folder)
+        if verify_manifest(static_folder, built) != built or len(built) != len(dict(_sources(static_folder))):
+            logger.error("static/dist is out of date, run python assets.py and commit the result")
+            sys.exit(1)
+    else:
+        build_assets(static_folder)
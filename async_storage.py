@@ -0,0 +1,94 @@
+# async_storage.py
+"""
+Awaitable versions of the storage functions, for the async views in app.py.
+
+Backends that provide async_* functions (supabase_client) run them on one
+long-lived background event loop, so every request shares a single pooled
+keep-alive HTTP client no matter which thread or per-request loop Flask
+uses for the view. Other backends (sqlite_client) run on a process-wide
+thread pool, so their per-thread connections outlive the request.
+Caching, invalidation, deadlines, retries and the circuit breaker follow
+storage.py.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import storage
+import resilience
+from leaderboard_cache import leaderboard_cache
+from metrics import atimed
+
+logger = logging.getLogger(__name__)
+
+_loop = None
+_loop_lock = threading.Lock()
+# Not asyncio.to_thread: that uses the per-request loop's default executor,
+# whose threads (and their SQLite connections) end with the request
+_sync_executor = ThreadPoolExecutor(max_workers=resilience.STORAGE_MAX_INFLIGHT, thread_name_prefix="storage-sync")
+
+def _backend_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="storage-backend-loop", daemon=True).start()
+            _loop = loop
+            logger.info("Started storage backend event loop")
+        return _loop
+
+def _start(name, args):
+    async_func = getattr(storage.backend, f"async_{name}", None)
+    if async_func is None:
+        return asyncio.get_running_loop().run_in_executor(_sync_executor, getattr(storage.backend, name), *args)
+    future = asyncio.run_coroutine_threadsafe(async_func(*args), _backend_loop())
+    return asyncio.wrap_future(future)
+
+async def _call(name, *args, read=False):
+    return await resilience.acall(storage.circuit_breaker, name, lambda: _start(name, args), read=read)
+
+@atimed(storage.STORAGE_BACKEND)
+async def insert_score(username: str, college: str, wpm: int, accuracy: float, duration_seconds: int, raw_wpm: int = None):
+    response = await _call("insert_score", username, college, wpm, accuracy, duration_seconds, raw_wpm)
+    storage.after_write(response)
+    return response
+
+@atimed(storage.STORAGE_BACKEND)
+async def insert_scores(scores: list):
+    response = await _call("insert_scores", scores)
+    storage.after_write(response)
+    return response
+
+@atimed(storage.STORAGE_BACKEND)
+async def get_leaderboard(limit: int = 10, cursor: str = None, college: str = None, window: str = None):
+    key = storage.cache_key(limit, cursor, college, window)
+    response = await leaderboard_cache.aget_or_load(key, lambda: load_page(key, limit, cursor, college, window))
+    if 'error' in response:
+        return storage.last_good.fallback(key, response)
+    return response
+
+async def load_page(key, limit, cursor, college, window):
+    """Uncached page read, remembered in last_good when it succeeds"""
+    response = await _call("get_leaderboard", limit, cursor, college, window, read=True)
+    storage.last_good.save(key, response)
+    return response
+
+@atimed(storage.STORAGE_BACKEND)
+async def get_user_rank(username: str, neighbours: int = 5, exclude: list = (), college_board: bool = False):
+    return await _call("get_user_rank", username, neighbours, exclude, college_board, read=True)
+
+@atimed(storage.STORAGE_BACKEND)
+async def clear_leaderboard():
+    response = await _call("clear_leaderboard")
+    storage.after_write(response)
+    return response
+
+@atimed(storage.STORAGE_BACKEND)
+async def delete_user_from_leaderboard(username: str):
+    response = await _call("delete_user_from_leaderboard", username)
+    storage.after_write(response)
+    return response
+
+@atimed(storage.STORAGE_BACKEND)
+async def insert_keystroke_log(entry: dict):
+    return await _call("insert_keystroke_log", entry)
@@ -0,0 +1,7 @@
+# Benchmarks. Run from the repository root, e.g.
+#   python -m benchmarks.bench_username_filter
+#   python -m benchmarks.bench_leaderboard
+#   python -m benchmarks.bench_load
+#   python -m benchmarks.bench_keystrokes
+# Each run writes JSON to benchmarks/results/<name>-<commit>.json for
+# comparing commits.
@@ -0,0 +1,78 @@
+"""
+Time server-side verification of keystroke logs.
+
+    python -m benchmarks.bench_keystrokes [--logs 2000] [--words 25] [--output PATH]
+
+Generates logs like static/script.js sends for a --words word test typed
+at a human pace with occasional corrected typos, then times verify() per
+log (the /submit_result path) and verify_batch() over all of them (the
+verify_results.py path).
+"""
+import argparse
+import random
+import time
+
+from keystroke_verify import verify, verify_batch
+from benchmarks.common import percentiles, write_results
+
+WORDS = ['the', 'be', 'to', 'of', 'and', 'people', 'because', 'think', 'year', 'work', 'first', 'about']
+
+
+def generate_log(rng, word_count=25, typo_rate=0.05):
+    words = [rng.choice(WORDS) for _ in range(word_count)]
+    keys, deltas = [], []
+    for position, word in enumerate(words):
+        for char in word:
+            if rng.random() < typo_rate:
+                keys += [ord('x'), 8]
+                deltas += [rng.randint(60, 250), rng.randint(80, 300)]
+            keys.append(ord(char))
+            deltas.append(rng.randint(60, 250))
+        if position < word_count - 1:
+            keys.append(32)
+            deltas.append(rng.randint(60, 250))
+    deltas[0] = 0
+    return {"v": 1, "words": words, "keys": keys, "deltas": deltas}
+
+
+def run(count=2000, word_count=25, seed=2025):
+    rng = random.Random(seed)
+    logs = [generate_log(rng, word_count) for _ in range(count)]
+
+    samples = []
+    for log in logs:
+        start = time.perf_counter()
+        verify(log)
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    verify_batch(logs)
+    batch_seconds = time.perf_counter() - start
+
+    results = {f"verify_{name}_us": value * 1e6 for name, value in percentiles(samples).items()}
+    results.update({
+        "logs": count,
+        "keystrokes_per_log": sum(len(log["keys"]) for log in logs) / count,
+        "verify_mean_us": sum(samples) / count * 1e6,
+        "verify_batch_us_per_log": batch_seconds / count * 1e6,
+    })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logs', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=25)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.logs, args.words)
+    print(f"{results['logs']} logs, {results['keystrokes_per_log']:.0f} keystrokes each")
+    print(f"verify:        p50 {results['verify_p50_us']:8.1f} us  p95 {results['verify_p95_us']:8.1f} us  "
+          f"p99 {results['verify_p99_us']:8.1f} us")
+    print(f"verify_batch:  {results['verify_batch_us_per_log']:8.1f} us/log")
+    print(f"Results written to {write_results('keystrokes', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Time building the leaderboard from synthetic score rows.
+
+    python -m benchmarks.bench_leaderboard [--sizes 1000 100000 1000000] [--output PATH]
+
+Compares the original aggregation loop from get_leaderboard (every row
+fetched and grouped in Python) with loading the per-user bests into the
+LeaderboardIndex and reading pages from it, as app.py does now, and times
+a user's standing (ranks plus neighbours, as /get_user_rank returns it).
+"""
+import argparse
+import random
+import time
+
+from ranking_index import LeaderboardIndex
+from benchmarks.common import write_results
+
+COLLEGES = ['MPSTME', 'NMIMS', 'DJSCE', 'SBMP', 'MITHIBAI', 'NM COLLEGE']
+
+
+def generate_rows(count, attempts_per_user=5, seed=2025):
+    """`count` score rows spread over count // attempts_per_user users"""
+    rng = random.Random(seed)
+    users = max(1, count // attempts_per_user)
+    colleges = [rng.choice(COLLEGES) for _ in range(users)]
+    rows = []
+    for _ in range(count):
+        user = rng.randrange(users)
+        rows.append({
+            'username': f'user{user}',
+            'college': colleges[user],
+            'wpm': rng.randint(10, 160),
+            'accuracy': round(rng.uniform(60, 100), 2),
+        })
+    return rows
+
+
+def legacy_aggregate(rows, limit=10):
+    """The aggregation loop get_leaderboard ran before it moved into SQL"""
+    user_scores = {}
+    for entry in rows:
+        username = entry.get('username')
+        if username not in user_scores:
+            user_scores[username] = {
+                'username': username,
+                'college': entry.get('college', 'Unknown'),
+                'best_wpm': float(entry.get('wpm', 0)),
+                'avg_accuracy': float(entry.get('accuracy', 0)),
+                'tests_taken': 1
+            }
+        else:
+            current = user_scores[username]
+            current['best_wpm'] = max(current['best_wpm'], float(entry.get('wpm', 0)))
+            current['avg_accuracy'] = (current['avg_accuracy'] * current['tests_taken'] +
+                                    float(entry.get('accuracy', 0))) / (current['tests_taken'] + 1)
+            current['tests_taken'] += 1
+
+    rankings = list(user_scores.values())
+    rankings.sort(key=lambda x: x['best_wpm'], reverse=True)
+    return rankings[:limit]
+
+
+def best_per_user(rows):
+    """What the leaderboard table holds for `rows`: one personal best per user"""
+    best = {}
+    for row in rows:
+        current = best.get(row['username'])
+        if current is None or row['wpm'] > current['best_wpm']:
+            best[row['username']] = {
+                'username': row['username'],
+                'college': row['college'],
+                'best_wpm': float(row['wpm']),
+                'avg_accuracy': row['accuracy'],
+                'tests_taken': 1,
+            }
+    return list(best.values())
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes=(1000, 100000, 1000000), repeat=3):
+    results = {}
+    for size in sizes:
+        rows = generate_rows(size)
+        bests = best_per_user(rows)
+        index = LeaderboardIndex()
+        index.load(bests)
+        cursor = tuple(index.top(1000)[-1][key] for key in ('best_wpm', 'username')) if len(index) > 1000 else None
+        middle_user = bests[len(bests) // 2]['username']
+
+        results[str(size)] = {
+            "rows": size,
+            "users": len(bests),
+            "legacy_aggregate_ms": timed(lambda: legacy_aggregate(rows), repeat) * 1000,
+            "index_load_ms": timed(lambda: index.load(bests), repeat) * 1000,
+            "index_top50_us": timed(lambda: index.top(50), repeat * 100) * 1e6,
+            "index_college_top50_us": timed(lambda: index.top(50, college='MPSTME'), repeat * 100) * 1e6,
+            "index_page_after_1000_us": timed(lambda: index.top(50, after=cursor), repeat * 100) * 1e6 if cursor else None,
+            "index_standing_us": timed(lambda: index.standing(middle_user, 5), repeat * 100) * 1e6,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    for size, row in results.items():
+        print(f"{size:>8} rows / {row['users']:>7} users: "
+              f"legacy {row['legacy_aggregate_ms']:9.1f} ms, "
+              f"index load {row['index_load_ms']:9.1f} ms, "
+              f"top 50 {row['index_top50_us']:7.1f} us, "
+              f"standing {row['index_standing_us']:5.1f} us")
+    print(f"Results written to {write_results('leaderboard', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Drive /login, /submit_result and /leaderboard through the Flask app.
+
+    python -m benchmarks.bench_load [--users 50] [--rounds 20] [--concurrency 8]
+                                    [--latency 0.02] [--seed-rows 1000] [--submit-rate 1e6]
+                                    [--output PATH]
+
+Storage is replaced by the in-memory backend in benchmarks/fake_backend.py,
+with --latency seconds added to every call in place of the Supabase round
+trip. Each simulated student logs in once and then alternates between
+submitting a score and viewing a leaderboard. Reports throughput and
+p50/p95/p99 latency per route. The submission rate limiter is set to
+--submit-rate per minute per student, high by default so it stays out of the
+way; rejected (429) submissions are counted as errors.
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import storage
+from rate_limit import SubmissionLimiter
+from benchmarks import fake_backend
+from benchmarks.bench_leaderboard import COLLEGES, generate_rows, best_per_user
+from benchmarks.common import percentiles, write_results
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, elapsed, ok):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(elapsed)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, wall_seconds):
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            routes[route] = dict(
+                {f"{name}_ms": value * 1000 for name, value in percentiles(samples).items()},
+                requests=len(samples),
+                errors=self.errors.get(route, 0),
+                mean_ms=sum(samples) / len(samples) * 1000,
+                throughput_rps=len(samples) / wall_seconds,
+            )
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "wall_seconds": wall_seconds,
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": total / wall_seconds,
+            "routes": routes,
+        }
+
+
+def simulate_student(app, recorder, student, rounds, seed):
+    rng = random.Random(seed)
+    client = app.test_client()
+    college = rng.choice(COLLEGES)
+
+    def request(route, call, ok):
+        start = time.perf_counter()
+        response = call()
+        recorder.record(route, time.perf_counter() - start, ok(response))
+
+    request('/login', lambda: client.post('/login', data={
+        'email': f'student{student}@example.com',
+        'sap-id': str(70000000000 + student),
+        'name': f'student{student}',
+        'college': college,
+    }), lambda r: r.status_code == 302)
+
+    for _ in range(rounds):
+        request('/submit_result', lambda: client.post('/submit_result', json={
+            'wpm': rng.randint(20, 140),
+            'accuracy': round(rng.uniform(70, 100), 2),
+            'duration_seconds': 60,
+        }), lambda r: r.status_code == 200 and r.get_json().get('success'))
+
+        query = '' if rng.random() < 0.7 else f'?college={college}'
+        request('/leaderboard', lambda: client.get(f'/leaderboard{query}'),
+                lambda r: r.status_code == 200)
+
+
+def run(users=50, rounds=20, concurrency=8, latency=0.02, seed_rows=1000, submit_rate=1e6):
+    fake_backend.configure(latency=latency, rows=[
+        dict(row, wpm=row['best_wpm'], accuracy=row['avg_accuracy'])
+        for row in best_per_user(generate_rows(seed_rows))
+    ])
+    storage.set_backend(fake_backend)
+
+    import app as app_module  # after the backend swap, so nothing touches Supabase
+    app_module.submission_limiter = SubmissionLimiter(rate_per_minute=submit_rate)
+    app = app_module.app
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(simulate_student, app, recorder, student, rounds, student)
+                   for student in range(users)]
+        for future in futures:
+            future.result()
+    results = recorder.summary(time.perf_counter() - start)
+    results["config"] = {
+        "users": users,
+        "rounds": rounds,
+        "concurrency": concurrency,
+        "latency": latency,
+        "seed_rows": seed_rows,
+        "submit_rate": submit_rate,
+        "backend": "fake",
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=20, help='submit + leaderboard rounds per user')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated seconds per storage call')
+    parser.add_argument('--seed-rows', type=int, default=1000, help='score rows to start with')
+    parser.add_argument('--submit-rate', type=float, default=1e6, help='rate limit, submissions per minute per student')
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/)')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # the app logs every request
+    results = run(args.users, args.rounds, args.concurrency, args.latency, args.seed_rows,
+                  args.submit_rate)
+
+    print(f"{results['requests']} requests in {results['wall_seconds']:.2f}s "
+          f"({results['throughput_rps']:.1f} req/s, {results['errors']} errors)")
+    for route, row in results["routes"].items():
+        print(f"{route:<15} {row['requests']:>6} req {row['throughput_rps']:8.1f} req/s  "
+              f"p50 {row['p50_ms']:7.2f} ms  p95 {row['p95_ms']:7.2f} ms  p99 {row['p99_ms']:7.2f} ms  "
+              f"errors {row['errors']}")
+    print(f"Results written to {write_results('load', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
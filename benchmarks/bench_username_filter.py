@@ -0,0 +1,130 @@
+"""
+Compare the compiled username filter against the original per-call checks.
+
+    python -m benchmarks.bench_username_filter [--names 5000] [--repeat 3] [--output PATH]
+
+Verdicts are checked for equality on every generated name before timing.
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from better_profanity import Profanity
+from custom_profanity import CUSTOM_PROFANITY_WORDS
+import username_filter
+from benchmarks.common import write_results
+
+
+def build_legacy():
+    """The checks as they were in app.py before username_filter existed"""
+    profanity = Profanity()
+    profanity.add_censor_words(CUSTOM_PROFANITY_WORDS)
+
+    def contains_inappropriate_text(text):
+        text = text.lower()
+        if profanity.contains_profanity(text):
+            return True
+        for word in CUSTOM_PROFANITY_WORDS:
+            if word.lower() in text:
+                return True
+        text_without_spaces = text.replace(" ", "").replace(".", "")
+        for word in CUSTOM_PROFANITY_WORDS:
+            if word.replace(" ", "").lower() in text_without_spaces:
+                return True
+        for pattern in username_filter.INAPPROPRIATE_PATTERNS:
+            if re.search(pattern, text_without_spaces):
+                return True
+        return False
+
+    def validate_username(username):
+        if contains_inappropriate_text(username):
+            return False, "Username contains inappropriate language"
+        for pattern in username_filter.BLOCKED_NAME_PATTERNS:
+            if re.search(pattern, username.lower()):
+                return False, "This username is not allowed"
+        if len(username) < 3:
+            return False, "Username must be at least 3 characters long"
+        if len(username) > 30:
+            return False, "Username must be less than 30 characters"
+        if not username.replace('_', '').isalnum():
+            return False, "Username can only contain letters, numbers, and underscores"
+        return True, ""
+
+    return validate_username, contains_inappropriate_text
+
+
+def generate_names(count, seed=2025):
+    """Mostly plausible student names, with some offensive ones mixed in"""
+    rng = random.Random(seed)
+    offensive = sorted(CUSTOM_PROFANITY_WORDS)
+    names = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            names.append(rng.choice(['', 'the_', 'x']) + rng.choice(offensive).replace(' ', '_'))
+        else:
+            length = rng.randint(4, 16)
+            names.append(''.join(rng.choice(string.ascii_lowercase + string.digits + '_') for _ in range(length)))
+    return names
+
+
+def time_calls(func, names, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name in names:
+            func(name)
+        best = min(best, time.perf_counter() - start)
+    return best / len(names)
+
+
+def run(count=5000, repeat=3):
+    legacy, legacy_contains = build_legacy()
+    names = generate_names(count)
+
+    mismatches = [name for name in names if legacy(name) != username_filter.validate_username.__wrapped__(name)]
+    if mismatches:
+        raise AssertionError(f"Verdicts differ for {mismatches[:5]}")
+
+    def compiled_contains_uncached(name):
+        return username_filter.contains_inappropriate_text.__wrapped__(name)
+
+    def compiled_uncached(name):
+        username_filter.contains_inappropriate_text.cache_clear()
+        return username_filter.validate_username.__wrapped__(name)
+
+    # Login traffic repeats names: every student logs in several times
+    login_traffic = names * 4
+    random.Random(7).shuffle(login_traffic)
+
+    results = {
+        "legacy_contains_us": time_calls(legacy_contains, names, repeat) * 1e6,
+        "compiled_contains_us": time_calls(compiled_contains_uncached, names, repeat) * 1e6,
+        "legacy_us": time_calls(legacy, names, repeat) * 1e6,
+        "compiled_us": time_calls(compiled_uncached, names, repeat) * 1e6,
+        "compiled_cached_login_us": time_calls(username_filter.validate_username, login_traffic, repeat) * 1e6,
+    }
+    results["speedup"] = results["legacy_us"] / results["compiled_us"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--names', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.names, args.repeat)
+    print(f"legacy contains_inappropriate_text:   {results['legacy_contains_us']:10.2f} us/call")
+    print(f"compiled contains_inappropriate_text: {results['compiled_contains_us']:10.2f} us/call")
+    print(f"legacy validate_username:             {results['legacy_us']:10.2f} us/call")
+    print(f"compiled validate_username:           {results['compiled_us']:10.2f} us/call")
+    print(f"compiled + LRU (login mix):           {results['compiled_cached_login_us']:10.2f} us/call")
+    print(f"speedup (uncached):                   {results['speedup']:10.1f}x")
+    print(f"Results written to {write_results('username_filter', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# Shared helpers for the benchmark scripts
+import json
+import os
+import platform
+import subprocess
+import time
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Nearest-rank percentiles of `samples`, keyed "p50", "p95", ..."""
+    if not samples:
+        return {f"p{point}": None for point in points}
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        rank = max(1, -(-point * len(ordered) // 100))  # ceil
+        result[f"p{point}"] = ordered[rank - 1]
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name, results, path=None):
+    """
+    Write `results` as JSON together with the commit and machine they came
+    from, so runs on different commits can be compared. Defaults to
+    benchmarks/results/<name>-<commit>.json. Returns the path written.
+    """
+    revision = git_revision()
+    if path is None:
+        directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}-{revision or 'unknown'}.json")
+    document = {
+        "benchmark": name,
+        "commit": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return path
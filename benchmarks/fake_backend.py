@@ -0,0 +1,186 @@
+"""
+In-memory stand-in for supabase_client, for the load benchmark.
+
+Implements the storage backend functions (see storage.py) on a dict, with
+the same score history, running summary and keyset paging behaviour, and an optional fixed
+delay per call to stand in for the network round trip:
+
+    import storage
+    from benchmarks import fake_backend
+    fake_backend.configure(latency=0.02)
+    storage.set_backend(fake_backend)
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+from pagination import encode_cursor, decode_cursor
+from ranking_index import normalize_college
+from leaderboard_windows import current_windows
+
+_rows = {}  # username -> summary, like leaderboard
+_history = []  # every score, like score_history
+_windows = {}  # window key -> {username: entry}, like leaderboard_windows
+_keystroke_logs = []
+_lock = threading.Lock()
+_latency = 0.0
+
+
+def configure(latency=0.0, rows=()):
+    """Set the simulated per-call latency in seconds and replace the contents"""
+    global _latency
+    _latency = latency
+    with _lock:
+        _rows.clear()
+        _history.clear()
+        _windows.clear()
+        for row in rows:
+            _rows[row["username"]] = _entry(row["username"], row.get("college"), row["wpm"],
+                                            row["accuracy"], row.get("duration_seconds", 60))
+
+
+def _wait():
+    if _latency:
+        time.sleep(_latency)
+
+
+def _entry(username, college, wpm, accuracy, duration_seconds):
+    return {
+        "username": username,
+        "college": normalize_college(college),
+        "wpm": int(wpm),
+        "accuracy": float(accuracy),
+        "duration_seconds": int(duration_seconds),
+        "tests_taken": 1,
+        "avg_accuracy": float(accuracy),
+    }
+
+
+def _keep_best(rows, entry):
+    current = rows.get(entry["username"])
+    if current is not None and current["wpm"] >= entry["wpm"]:
+        return None
+    rows[entry["username"]] = entry
+    return entry
+
+
+def _submit(username, college, wpm, accuracy, duration_seconds, raw_wpm=None):
+    entry = _entry(username, college, wpm, accuracy, duration_seconds)
+    _history.append(dict(entry, raw_wpm=raw_wpm))
+    for key, _ in current_windows(datetime.now(timezone.utc)):
+        _keep_best(_windows.setdefault(key, {}), entry)
+    current = _rows.get(username)
+    if current is not None:
+        tests_taken = current["tests_taken"] + 1
+        entry = dict(entry, tests_taken=tests_taken,
+                     avg_accuracy=current["avg_accuracy"] + (entry["accuracy"] - current["avg_accuracy"]) / tests_taken)
+        if current["wpm"] >= entry["wpm"]:
+            entry.update({key: current[key] for key in ("college", "wpm", "accuracy", "duration_seconds")})
+    _rows[username] = entry
+    return entry
+
+
+def insert_score(username: str, college: str, wpm: int, accuracy: float, duration_seconds: int, raw_wpm: int = None):
+    _wait()
+    with _lock:
+        stored = _submit(username, college, wpm, accuracy, duration_seconds, raw_wpm)
+    return {"data": [stored]}
+
+
+def insert_scores(scores: list):
+    _wait()
+    with _lock:
+        stored = {s["username"]: _submit(s["username"], s["college"], s["wpm"], s["accuracy"],
+                                         s.get("duration_seconds", 60), s.get("raw_wpm"))
+                  for s in scores}
+    return {"data": list(stored.values())}
+
+
+def get_leaderboard(limit: int = 10, cursor: str = None, college: str = None, window: str = None):
+    _wait()
+    with _lock:
+        rows = list((_windows.get(window, {}) if window else _rows).values())
+    if college:
+        college = normalize_college(college)
+        rows = [row for row in rows if row["college"] == college]
+    rows.sort(key=lambda row: (-row["wpm"], row["username"]))
+    if cursor:
+        after_wpm, after_username = decode_cursor(cursor)
+        position = (-after_wpm, after_username)
+        rows = [row for row in rows if (-row["wpm"], row["username"]) > position]
+    rankings = [
+        {"username": row["username"], "college": row["college"], "best_wpm": float(row["wpm"]),
+         "avg_accuracy": row["avg_accuracy"], "tests_taken": row["tests_taken"]}
+        for row in rows[:limit]
+    ]
+    next_cursor = encode_cursor(rankings[-1]) if rankings and len(rankings) == limit else None
+    return {"data": rankings, "next_cursor": next_cursor}
+
+
+def get_user_rank(username: str, neighbours: int = 5, exclude: list = (), college_board: bool = False):
+    _wait()
+    with _lock:
+        rows = [row for row in _rows.values() if row["username"].lower() not in exclude]
+    me = next((row for row in rows if row["username"] == username), None)
+    if me is None:
+        return {"data": None}
+    rows.sort(key=lambda row: (-row["wpm"], row["username"]))
+    college_rows = [row for row in rows if row["college"] == me["college"]]
+    board = college_rows if college_board else rows
+    position = board.index(me)
+
+    def ranked(row, rank):
+        return {"username": row["username"], "college": row["college"], "best_wpm": float(row["wpm"]),
+                "avg_accuracy": row["avg_accuracy"], "tests_taken": row["tests_taken"], "rank": rank}
+
+    start = max(position - neighbours, 0)
+    return {"data": {
+        "entry": {key: value for key, value in ranked(me, 0).items() if key != "rank"},
+        "global_rank": rows.index(me) + 1,
+        "college_rank": college_rows.index(me) + 1,
+        "above": [ranked(row, start + offset + 1) for offset, row in enumerate(board[start:position])],
+        "below": [ranked(row, position + offset + 2) for offset, row in enumerate(board[position + 1:position + 1 + neighbours])],
+    }}
+
+
+def clear_leaderboard():
+    _wait()
+    with _lock:
+        removed = list(_rows.values())
+        _rows.clear()
+        _history.clear()
+        _windows.clear()
+    return {"data": removed}
+
+
+def delete_user_from_leaderboard(username: str):
+    return delete_users_from_leaderboard([username])
+
+
+def delete_users_from_leaderboard(usernames: list):
+    _wait()
+    with _lock:
+        removed = [_rows.pop(username) for username in usernames if username in _rows]
+        _history[:] = [entry for entry in _history if entry["username"] not in usernames]
+        for rows in _windows.values():
+            for username in usernames:
+                rows.pop(username, None)
+    return {"data": removed}
+
+
+def save_event(name: str, starts_at, ends_at):
+    return {"error": "Events are not supported by the in-memory backend"}
+
+
+def insert_keystroke_log(entry: dict):
+    _wait()
+    with _lock:
+        stored = dict(entry, id=len(_keystroke_logs) + 1)
+        _keystroke_logs.append(stored)
+    return {"data": [stored]}
+
+
+def get_keystroke_logs(limit: int = 500, after_id: int = None):
+    _wait()
+    with _lock:
+        return {"data": [entry for entry in _keystroke_logs if entry["id"] > (after_id or 0)][:limit]}
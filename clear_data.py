@@ -1,10 +1,11 @@
-from supabase_client import clear_leaderboard
+from storage import clear_leaderboard
+from logging_setup import configure_logging
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
+    configure_logging(fmt="text")
     try:
         response = clear_leaderboard()
         if 'error' in response:
@@ -26,4 +26,10 @@ CUSTOM_PROFANITY_WORDS = {
     
     # Client related inappropriate terms
     "client ka", "ka client", "ke client",
-}
\ No newline at end of file
+}
+
+# Leaderboard names that are hidden from every board (compared lower case)
+HIDDEN_USERNAMES = frozenset({
+    "dalit panter 🐯", "tanvir ki ma ka client", "vedant marry aashi",
+    "riya nihal singh", "nihal", "tanvir ka client",
+})
@@ -1,7 +1,117 @@
 import sqlite3
 
-def initialize_database():
-    connection = sqlite3.connect('svkm_typing.db')
+DATABASE_PATH = 'svkm_typing.db'
+
+# SQLite mirror of the leaderboard table in schema.sql, used by sqlite_client
+LEADERBOARD_SCHEMA = [
+    '''
+        CREATE TABLE IF NOT EXISTS leaderboard (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            college TEXT NOT NULL DEFAULT 'UNKNOWN',
+            wpm INTEGER NOT NULL,
+            accuracy FLOAT NOT NULL,
+            duration_seconds INTEGER DEFAULT 60,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            tests_taken INTEGER NOT NULL DEFAULT 1,
+            avg_accuracy FLOAT
+        )
+    ''',
+    # Every attempt, best or not. leaderboard above is the per-user summary
+    # of it, kept in step by sqlite_client (see score_history in schema.sql)
+    '''
+        CREATE TABLE IF NOT EXISTS score_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            college TEXT NOT NULL DEFAULT 'UNKNOWN',
+            wpm INTEGER NOT NULL,
+            raw_wpm INTEGER,
+            accuracy FLOAT NOT NULL,
+            duration_seconds INTEGER DEFAULT 60,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_score_history_user ON score_history(username, created_at)',
+    # Ranking order is (wpm DESC, username ASC); top-N and keyset pages walk
+    # these indexes, globally and within one college
+    'CREATE INDEX IF NOT EXISTS idx_leaderboard_rank ON leaderboard(wpm DESC, username)',
+    'CREATE INDEX IF NOT EXISTS idx_leaderboard_college_rank ON leaderboard(college, wpm DESC, username)',
+    # Colleges are stored trimmed and upper case; fix rows written before that
+    "UPDATE leaderboard SET college = UPPER(TRIM(college)) WHERE college <> UPPER(TRIM(college))",
+    # Best score per user within each day/week/event window (see
+    # leaderboard_windows.py). Timestamps are UTC 'YYYY-MM-DD HH:MM:SS' text.
+    '''
+        CREATE TABLE IF NOT EXISTS leaderboard_events (
+            name TEXT PRIMARY KEY,
+            starts_at TEXT NOT NULL,
+            ends_at TEXT NOT NULL,
+            CHECK (ends_at > starts_at)
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS leaderboard_windows (
+            window_key TEXT NOT NULL,
+            username TEXT NOT NULL,
+            college TEXT NOT NULL DEFAULT 'UNKNOWN',
+            wpm INTEGER NOT NULL,
+            accuracy FLOAT NOT NULL,
+            duration_seconds INTEGER DEFAULT 60,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TEXT NOT NULL,
+            PRIMARY KEY (window_key, username)
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_leaderboard_windows_rank ON leaderboard_windows(window_key, wpm DESC, username)',
+    'CREATE INDEX IF NOT EXISTS idx_leaderboard_windows_college_rank ON leaderboard_windows(window_key, college, wpm DESC, username)',
+    'CREATE INDEX IF NOT EXISTS idx_leaderboard_windows_expires ON leaderboard_windows(expires_at)',
+    # Keystroke logs of submitted tests with the server's recomputed results
+    # (see keystroke_verify.py); flags and log are JSON text
+    '''
+        CREATE TABLE IF NOT EXISTS keystroke_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            college TEXT,
+            wpm INTEGER NOT NULL,
+            raw_wpm INTEGER NOT NULL,
+            accuracy FLOAT NOT NULL,
+            duration_ms INTEGER NOT NULL,
+            flags TEXT NOT NULL DEFAULT '[]',
+            log TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+]
+
+# Summary columns added to leaderboard tables created before score_history
+LEADERBOARD_MIGRATIONS = {
+    'tests_taken': 'ALTER TABLE leaderboard ADD COLUMN tests_taken INTEGER NOT NULL DEFAULT 1',
+    'avg_accuracy': 'ALTER TABLE leaderboard ADD COLUMN avg_accuracy FLOAT',
+}
+
+LEADERBOARD_BACKFILL = [
+    'UPDATE leaderboard SET avg_accuracy = accuracy WHERE avg_accuracy IS NULL',
+    # Seed the history with the best runs already stored, once
+    '''
+        INSERT INTO score_history (username, college, wpm, accuracy, duration_seconds, created_at)
+        SELECT username, college, wpm, accuracy, duration_seconds, created_at
+        FROM leaderboard
+        WHERE NOT EXISTS (SELECT 1 FROM score_history)
+    ''',
+]
+
+def initialize_leaderboard(connection):
+    for statement in LEADERBOARD_SCHEMA:
+        connection.execute(statement)
+    columns = {row[1] for row in connection.execute('PRAGMA table_info(leaderboard)')}
+    for column, statement in LEADERBOARD_MIGRATIONS.items():
+        if column not in columns:
+            connection.execute(statement)
+    for statement in LEADERBOARD_BACKFILL:
+        connection.execute(statement)
+    connection.commit()
+
+def initialize_database(path=DATABASE_PATH):
+    connection = sqlite3.connect(path)
     cursor = connection.cursor()
 
     # Create users table
@@ -29,8 +139,9 @@ def initialize_database():
     ''')
 
     connection.commit()
+    initialize_leaderboard(connection)
     connection.close()
 
 if __name__ == "__main__":
     initialize_database()
-    print("Database initialized successfully.")
\ No newline at end of file
+    print("Database initialized successfully.")
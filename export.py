@@ -0,0 +1,127 @@
+# export.py
+"""
+Stream the leaderboard, or one college's slice of it, as CSV or NDJSON.
+
+    python export.py --format csv --output results.csv
+    python export.py --format ndjson --college MPSTME --window event:finals
+
+Rows are read one keyset page at a time (storage.iter_leaderboard) and
+written out page by page, so memory stays flat however large the board is.
+The /admin/export route in app.py serves the same generators as a chunked
+response.
+
+A storage failure partway through is not hidden: the generators re-raise
+it, so the CLI exits 1 (leaving a partial file) and the HTTP response is
+cut off without its final chunk, which clients report as an incomplete
+download rather than a complete file.
+"""
+import io
+import csv
+import sys
+import json
+import argparse
+import logging
+from storage import iter_leaderboard
+from custom_profanity import HIDDEN_USERNAMES
+from leaderboard_windows import resolve_window
+from logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ('rank', 'username', 'college', 'best_wpm', 'avg_accuracy', 'tests_taken')
+EXPORT_PAGE_SIZE = 1000
+
+
+def ranked_rows(college=None, window=None, page_size=EXPORT_PAGE_SIZE):
+    """
+    Yield pages (lists) of leaderboard rows with their rank, leaving out
+    hidden usernames like the public board does
+    """
+    page = []
+    rank = 0
+    for row in iter_leaderboard(page_size=page_size, college=college, window=window):
+        if row['username'].lower() in HIDDEN_USERNAMES:
+            continue
+        rank += 1
+        page.append(dict(row, rank=rank))
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def iter_csv(pages):
+    """
+    CSV text chunks: the header straight away, then one chunk per page.
+    Raises RuntimeError if reading stops early.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+    try:
+        for page in pages:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(page)
+            yield buffer.getvalue()
+    except RuntimeError as e:
+        # CSV has no room for an error row; the caller has to see the failure
+        logger.error(f"Leaderboard export stopped early: {str(e)}")
+        raise
+
+
+def iter_ndjson(pages):
+    """
+    One JSON object per line, one chunk per page. A failure ends the output
+    with an {"error"} line and is then re-raised.
+    """
+    try:
+        for page in pages:
+            yield ''.join(json.dumps({field: row.get(field) for field in EXPORT_FIELDS}) + '\n' for row in page)
+    except RuntimeError as e:
+        logger.error(f"Leaderboard export stopped early: {str(e)}")
+        yield json.dumps({'error': str(e)}) + '\n'
+        raise
+
+
+# format -> (chunk generator, mimetype, file extension)
+FORMATS = {
+    'csv': (iter_csv, 'text/csv', 'csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson', 'ndjson'),
+}
+
+
+def export(fmt='csv', college=None, window=None, page_size=EXPORT_PAGE_SIZE):
+    """Text chunks of the export in `fmt`; see FORMATS"""
+    return FORMATS[fmt][0](ranked_rows(college, window, page_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the leaderboard as CSV or NDJSON")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--college', help="only this college's rankings")
+    parser.add_argument('--window', help='all (default), today, week or event:<name>')
+    parser.add_argument('--output', help='file to write (default stdout)')
+    parser.add_argument('--page-size', type=int, default=EXPORT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    configure_logging(fmt="text")
+    window = resolve_window(args.window)
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        for chunk in export(args.format, args.college, window, args.page_size):
+            output.write(chunk)
+    except RuntimeError:
+        logger.error(f"Export incomplete, {args.output or 'the output'} is missing rows")
+        sys.exit(1)
+    finally:
+        if args.output:
+            output.close()
+    if args.output:
+        logger.info(f"Exported leaderboard to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# keystroke_verify.py
+"""
+Recompute test results from the keystroke log sent by static/script.js.
+
+The log is {"v": 1, "words": [...], "keys": [...], "deltas": [...]}: the
+test's target words, the character code of every change to the input box
+(8 for a deleted character) and the milliseconds since the previous change.
+verify() replays it with the same rules as checkWord/endTest in script.js
+and returns server-side wpm, raw_wpm and accuracy plus a list of flags.
+Timing checks are NumPy passes over the inter-key intervals; verify_batch()
+runs them over many logs at once for the re-verification CLI
+(verify_results.py).
+
+Trust boundary: the target words come from the client. script.js picks them
+from its own word pool and the server issues no tests, so a crafted log can
+be scored against any text. Verification proves that the keystrokes, their
+timing and the reported numbers agree with each other for those words, not
+that the words were the ones a test asked for; closing that gap needs the
+server to issue the word list (and check it here) when a test starts.
+"""
+import os
+import math
+import numpy as np
+
+BACKSPACE = 8
+SPACE = 32
+
+KEYSTROKE_LOG_VERSION = 1
+MAX_KEYSTROKES = int(os.environ.get("KEYSTROKE_MAX_KEYS", "5000"))
+# Intervals below this are not typed by hand (paste, autofill or a script)
+MIN_HUMAN_INTERVAL_MS = int(os.environ.get("KEYSTROKE_MIN_INTERVAL_MS", "15"))
+# Share of too-fast intervals tolerated; key rollover produces a few
+MAX_FAST_INTERVAL_SHARE = float(os.environ.get("KEYSTROKE_MAX_FAST_SHARE", "0.2"))
+# Human typing rhythm varies; a near-constant cadence points to a script
+MIN_INTERVAL_VARIATION = float(os.environ.get("KEYSTROKE_MIN_VARIATION", "0.15"))
+MAX_PLAUSIBLE_WPM = int(os.environ.get("KEYSTROKE_MAX_WPM", "250"))
+# Allowed difference between the client's and the server's numbers
+REPORTED_TOLERANCE = 2
+
+
+def js_round(value):
+    """Math.round: halves go up, unlike Python's round()"""
+    return int(math.floor(value + 0.5))
+
+
+def decode_log(log):
+    """
+    Validate a keystroke log and return (words, keys, deltas) with keys and
+    deltas as int arrays. Raises ValueError for malformed logs.
+    """
+    if not isinstance(log, dict) or log.get("v") != KEYSTROKE_LOG_VERSION:
+        raise ValueError("Unsupported keystroke log")
+    words, keys, deltas = log.get("words"), log.get("keys"), log.get("deltas")
+    if not isinstance(words, list) or not words or not all(isinstance(word, str) for word in words):
+        raise ValueError("Keystroke log has no words")
+    if not isinstance(keys, list) or not isinstance(deltas, list) or len(keys) != len(deltas):
+        raise ValueError("Keystroke log keys and deltas do not line up")
+    if not keys or len(keys) > MAX_KEYSTROKES:
+        raise ValueError(f"Keystroke log must have 1 to {MAX_KEYSTROKES} entries")
+    try:
+        keys = np.asarray(keys, dtype=np.int32)
+        deltas = np.asarray(deltas, dtype=np.int64)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Keystroke log entries must be integers")
+    if keys.ndim != 1 or deltas.ndim != 1 or (deltas < 0).any() or (keys < 0).any() or (keys > 0x10FFFF).any():
+        raise ValueError("Keystroke log entries are out of range")
+    return words, keys, deltas
+
+
+def _committed_words(words, keys, count):
+    """
+    Score the first `count` words, each ended by a space, without a Python
+    loop over the keys. Backspaces make the input box a stack; its length
+    after every key is a running sum of +1 (letter) and -1 (backspace)
+    floored at 0, depth = sum - min(0, running min of sum). A letter is
+    still in the box when its word is committed if the depth never drops
+    below its own afterwards, and it sits at position depth - 1. Running
+    minima restart per word by offsetting each word's values by a multiple
+    of a constant larger than any depth. Returns (correct, incorrect).
+    """
+    if count == 0:
+        return 0, 0
+    space_at = np.flatnonzero(keys == SPACE)[:count]
+    k = keys[:space_at[-1] + 1]
+    is_space = k == SPACE
+    word = np.cumsum(is_space) - is_space  # the space ending a word belongs to it
+    step = np.where(k == BACKSPACE, -1, 1)
+    step[is_space] = 0
+    total = np.cumsum(step)
+    relative = total - np.concatenate(([0], total[space_at[:-1]]))[word]
+    offset = word * (2 * k.size + 2)
+    running_min = np.minimum.accumulate(relative - offset) + offset
+    depth = relative - np.minimum(running_min, 0)
+    later_min = np.minimum.accumulate((depth + offset)[::-1])[::-1] - offset
+
+    lengths = np.fromiter((len(w) for w in words[:count]), dtype=np.int64, count=count)
+    targets = np.fromiter((ord(c) for w in words[:count] for c in w), dtype=np.int64, count=int(lengths.sum()))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    kept = (step == 1) & (later_min >= depth)
+    position = depth - 1
+    in_target = kept & (position < lengths[word])
+    index = np.flatnonzero(in_target)
+    hits = index[k[index] == targets[starts[word[index]] + position[index]]]
+    matches = np.bincount(word[hits], minlength=count)
+
+    typed = depth[space_at]
+    shared = np.minimum(typed, lengths)
+    correct = int(matches.sum()) + count
+    incorrect = int((shared - matches).sum() + np.abs(typed - lengths).sum())
+    return correct, incorrect
+
+
+def replay(words, keys):
+    """
+    Re-run the typing session. Returns (correct, incorrect, words_completed)
+    counted with scoreWord() from static/scoring.js, which script.js uses:
+    per letter against the target, extra and missing letters as incorrect,
+    and one correct char per word for the space. Words ended by a space are scored with array operations
+    (_committed_words); only the last word, which also ends as soon as it is
+    typed correctly and so has to be checked after every key, is replayed
+    key by key.
+    """
+    last = len(words) - 1
+    spaces = int(np.count_nonzero(keys == SPACE))
+    committed = min(spaces, last)
+    correct, incorrect = _committed_words(words, keys, committed)
+    if committed < last:
+        return correct, incorrect, committed
+
+    start = int(np.flatnonzero(keys == SPACE)[last - 1]) + 1 if last else 0
+    target = words[last]
+    buffer = []
+    for code in keys[start:].tolist():
+        if code == BACKSPACE:
+            if buffer:
+                buffer.pop()
+            continue
+        if code != SPACE:
+            buffer.append(chr(code))
+            if len(buffer) != len(target) or "".join(buffer) != target:
+                continue
+        typed = "".join(buffer)
+        shared = min(len(typed), len(target))
+        matches = sum(1 for i in range(shared) if typed[i] == target[i])
+        return correct + matches + 1, incorrect + (shared - matches) + abs(len(typed) - len(target)), last + 1
+    return correct, incorrect, last
+
+
+def _results(correct, incorrect, elapsed_ms):
+    minutes = elapsed_ms / 60000
+    total = correct + incorrect
+    if minutes <= 0:
+        return 0, 0, 100
+    wpm = js_round((correct / 5) / minutes)
+    raw_wpm = js_round((total / 5) / minutes)
+    accuracy = js_round(correct / total * 100) if total else 100
+    return wpm, raw_wpm, accuracy
+
+
+def _timing_flags(fast_share, variation, count):
+    flags = []
+    if fast_share > MAX_FAST_INTERVAL_SHARE:
+        flags.append("fast_intervals")
+    if count >= 20 and variation < MIN_INTERVAL_VARIATION:
+        flags.append("uniform_intervals")
+    return flags
+
+
+def _compare(result, reported):
+    if not reported:
+        return []
+    flags = []
+    if reported.get("wpm") is not None and abs(float(reported["wpm"]) - result["wpm"]) > REPORTED_TOLERANCE:
+        flags.append("wpm_mismatch")
+    if reported.get("accuracy") is not None and abs(float(reported["accuracy"]) - result["accuracy"]) > REPORTED_TOLERANCE:
+        flags.append("accuracy_mismatch")
+    return flags
+
+
+def _finish(words, correct, incorrect, completed, elapsed_ms, timing_flags, reported):
+    wpm, raw_wpm, accuracy = _results(correct, incorrect, elapsed_ms)
+    result = {
+        "wpm": wpm,
+        "raw_wpm": raw_wpm,
+        "accuracy": accuracy,
+        "duration_ms": int(elapsed_ms),
+        "correct_chars": correct,
+        "incorrect_chars": incorrect,
+        "flags": list(timing_flags),
+    }
+    if completed < len(words):
+        result["flags"].append("incomplete")
+    if wpm > MAX_PLAUSIBLE_WPM:
+        result["flags"].append("implausible_wpm")
+    result["flags"] += _compare(result, reported)
+    return result
+
+
+def verify(log, reported=None):
+    """
+    Recompute one test from its keystroke log. `reported` is the client's
+    {"wpm", "accuracy"} to compare against. Returns a dict with wpm, raw_wpm,
+    accuracy, duration_ms, correct_chars, incorrect_chars and flags.
+    Raises ValueError for malformed logs. The log's words are taken as given
+    (see the module docstring): a passing result is self-consistent, not
+    proof that the intended text was typed.
+    """
+    words, keys, deltas = decode_log(log)
+    correct, incorrect, completed = replay(words, keys)
+
+    # The clock starts at the first keystroke, so its delta is not typing time
+    intervals = deltas[1:]
+    elapsed_ms = int(intervals.sum())
+    if intervals.size:
+        fast_share = float(np.count_nonzero(intervals < MIN_HUMAN_INTERVAL_MS)) / intervals.size
+        mean = float(intervals.mean())
+        variation = float(intervals.std()) / mean if mean else 0.0
+    else:
+        fast_share, variation = 0.0, 0.0
+    timing_flags = _timing_flags(fast_share, variation, intervals.size)
+    return _finish(words, correct, incorrect, completed, elapsed_ms, timing_flags, reported)
+
+
+def verify_batch(logs, reported=None):
+    """
+    verify() for many logs. The interval statistics are computed for all logs
+    in one pass over their concatenated intervals; malformed logs give
+    {"error": message}. `reported` is an optional list parallel to `logs`.
+    """
+    reported = reported or [None] * len(logs)
+    decoded, results = [], [None] * len(logs)
+    for position, log in enumerate(logs):
+        try:
+            decoded.append((position,) + decode_log(log))
+        except ValueError as e:
+            results[position] = {"error": str(e)}
+    if not decoded:
+        return results
+
+    intervals = [deltas[1:] for _, _, _, deltas in decoded]
+    counts = np.array([part.size for part in intervals])
+    flat = np.concatenate(intervals) if counts.sum() else np.zeros(0, dtype=np.int64)
+    # Segment sums per log; empty segments are handled through `counts`
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    nonempty = counts > 0
+    elapsed = np.zeros(len(decoded), dtype=np.int64)
+    fast = np.zeros(len(decoded))
+    squares = np.zeros(len(decoded))
+    if flat.size:
+        elapsed[nonempty] = np.add.reduceat(flat, starts[nonempty])
+        fast[nonempty] = np.add.reduceat((flat < MIN_HUMAN_INTERVAL_MS).astype(np.int64), starts[nonempty])
+        squares[nonempty] = np.add.reduceat(flat.astype(np.float64) ** 2, starts[nonempty])
+    safe_counts = np.maximum(counts, 1)
+    means = elapsed / safe_counts
+    stds = np.sqrt(np.maximum(squares / safe_counts - means ** 2, 0.0))
+    variations = np.divide(stds, means, out=np.zeros_like(means), where=means > 0)
+    fast_shares = fast / safe_counts
+
+    for row, (position, words, keys, _) in enumerate(decoded):
+        correct, incorrect, completed = replay(words, keys)
+        timing_flags = _timing_flags(fast_shares[row], variations[row], counts[row])
+        results[position] = _finish(words, correct, incorrect, completed, elapsed[row], timing_flags,
+                                    reported[position])
+    return results
@@ -0,0 +1,178 @@
+# leaderboard_cache.py
+import os
+import asyncio
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_CACHE_TTL = float(os.environ.get("LEADERBOARD_CACHE_TTL", "10"))
+LEADERBOARD_CACHE_STALE_TTL = float(os.environ.get("LEADERBOARD_CACHE_STALE_TTL", "30"))
+LEADERBOARD_CACHE_SIZE = int(os.environ.get("LEADERBOARD_CACHE_SIZE", "64"))
+
+
+class LeaderboardCache:
+    """
+    In-process cache of leaderboard reads.
+
+    Entries are fresh for `ttl` seconds. For a further `stale_ttl` seconds the
+    old value is still served while a single background thread reloads it
+    (stale-while-revalidate). Concurrent misses on the same key share one
+    load, whether they come from threads (get_or_load) or event loops
+    (aget_or_load), and at most `max_entries` keys are kept (least recently
+    used evicted). Results containing an "error" key are never cached.
+    """
+
+    def __init__(self, ttl=LEADERBOARD_CACHE_TTL, stale_ttl=LEADERBOARD_CACHE_STALE_TTL,
+                 max_entries=LEADERBOARD_CACHE_SIZE):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, loaded_at)
+        self._loading = {}  # key -> Future resolved when the load in flight ends
+        self._generation = 0  # bumped by invalidate() so in-flight loads are dropped
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for `key`, calling `loader()` when it is
+        missing or expired
+        """
+        while True:
+            with self._lock:
+                found, value = self._cached(key, loader)
+                if found:
+                    return value
+                pending, generation = self._claim(key)
+            if pending is None:
+                break
+            # Someone else is already loading this key; wait and re-check.
+            # If their load failed or was invalidated we load it ourselves.
+            pending.result()
+
+        try:
+            value = loader()
+            self._store(key, value, generation)
+            return value
+        finally:
+            self._release(key)
+
+    async def aget_or_load(self, key, loader):
+        """
+        get_or_load() for async callers, where `loader()` returns a fresh
+        awaitable. Callers waiting on a load in flight await it instead of
+        blocking their thread; stale entries are refreshed on a background
+        thread that runs the loader on its own event loop.
+        """
+        while True:
+            with self._lock:
+                found, value = self._cached(key, lambda: asyncio.run(loader()))
+                if found:
+                    return value
+                pending, generation = self._claim(key)
+            if pending is None:
+                break
+            await asyncio.wrap_future(pending)
+
+        try:
+            value = await loader()
+            self._store(key, value, generation)
+            return value
+        finally:
+            self._release(key)
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def invalidate(self):
+        """Drop every cached entry. Called after any leaderboard write."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+    def _store(self, key, value, generation):
+        if isinstance(value, dict) and "error" in value:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return  # a write happened while we were loading
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _cached(self, key, refresh_loader):
+        # Caller holds self._lock. Returns (found, value); a stale value is
+        # returned while refresh_loader() reloads it in the background.
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, loaded_at = entry
+        age = time.monotonic() - loaded_at
+        if age >= self.ttl + self.stale_ttl:
+            return False, None
+        self._entries.move_to_end(key)
+        if age < self.ttl:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+            self._refresh_in_background(key, refresh_loader)
+        return True, value
+
+    def _claim(self, key):
+        # Caller holds self._lock. Returns (the load in flight, None), or
+        # (None, generation) when the caller now owns the load of `key`.
+        pending = self._loading.get(key)
+        if pending is not None:
+            return pending, None
+        self.misses += 1
+        self._loading[key] = Future()
+        return None, self._generation
+
+    def _release(self, key):
+        with self._lock:
+            self._loading.pop(key).set_result(None)
+
+    def _refresh_in_background(self, key, loader):
+        # Caller holds self._lock
+        if key in self._loading:
+            return
+        self._loading[key] = Future()
+        generation = self._generation
+
+        def refresh():
+            try:
+                self._store(key, loader(), generation)
+            except Exception as e:
+                logger.error(f"Background leaderboard refresh failed: {str(e)}")
+            finally:
+                self._release(key)
+
+        threading.Thread(target=refresh, name="leaderboard-cache-refresh", daemon=True).start()
+
+
+leaderboard_cache = LeaderboardCache()
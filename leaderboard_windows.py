@@ -0,0 +1,80 @@
+# leaderboard_windows.py
+"""
+Time windows for the "today", "this week" and per-event leaderboards.
+
+Every score is also written to a rollup row per (window, user) holding the
+user's best in that window, so a windowed board is the same index read as
+the all-time one. Window keys look like "day:2026-10-18", "week:2026-W42"
+and "event:<name>"; the format must match current_leaderboard_windows in
+schema.sql, and LEADERBOARD_TIMEZONE must match the zone used there.
+Rollups are pruned once `expires_at` has passed: at the end of the day or
+week, and EVENT_RETENTION after an event ends so final results stay readable.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+LEADERBOARD_TIMEZONE = ZoneInfo(os.environ.get("LEADERBOARD_TIMEZONE", "Asia/Kolkata"))
+EVENT_RETENTION = timedelta(days=7)
+
+# Names accepted by resolve_window, besides "event:<name>"
+WINDOW_NAMES = ("all", "today", "week")
+
+
+def _local_midnight(day):
+    return datetime(day.year, day.month, day.day, tzinfo=LEADERBOARD_TIMEZONE)
+
+
+def day_window(now):
+    local = now.astimezone(LEADERBOARD_TIMEZONE)
+    return f"day:{local.date().isoformat()}", _local_midnight(local.date() + timedelta(days=1))
+
+
+def week_window(now):
+    local = now.astimezone(LEADERBOARD_TIMEZONE)
+    year, week, _ = local.isocalendar()
+    start = local.date() - timedelta(days=local.weekday())
+    return f"week:{year}-W{week:02d}", _local_midnight(start + timedelta(days=7))
+
+
+def event_key(name):
+    return f"event:{name}"
+
+
+def current_windows(now, events=()):
+    """
+    (window_key, expires_at) for every window a score made at `now` counts
+    towards. `events` holds the (name, starts_at, ends_at) of active events.
+    """
+    windows = [day_window(now), week_window(now)]
+    for name, starts_at, ends_at in events:
+        if starts_at <= now < ends_at:
+            windows.append((event_key(name), ends_at + EVENT_RETENTION))
+    return windows
+
+
+def resolve_window(name, now=None):
+    """
+    Map a window name from a request ("all", "today", "week" or
+    "event:<name>") to its current key, or None for the all-time board.
+    Raises ValueError for anything else.
+    """
+    if not name or name == "all":
+        return None
+    now = now or datetime.now(timezone.utc)
+    if name == "today":
+        return day_window(now)[0]
+    if name == "week":
+        return week_window(now)[0]
+    if name.startswith("event:") and len(name) > len("event:"):
+        return name
+    raise ValueError(f"Unknown leaderboard window: {name!r}")
+
+
+def to_utc_text(moment):
+    """Timestamp format used for window columns in the SQLite backend"""
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def from_utc_text(text):
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
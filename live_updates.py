@@ -0,0 +1,150 @@
+# live_updates.py
+"""
+Server-Sent Events for the all-time leaderboard.
+
+app.py publishes a small delta whenever a score changes the ranking index
+(the user's entry with its new global and college rank) or a user is
+removed, and a reset when the board is cleared. Every open stream reads
+from one shared ring buffer of the last LIVE_REPLAY_SIZE events, so a
+publish is O(1) however many viewers there are, and a reconnecting browser
+resumes from its Last-Event-ID. If that id has left the buffer (or came from
+another process) the stream sends "reset" and the client refetches the board.
+
+Each stream holds a worker thread, so at most LIVE_MAX_SUBSCRIBERS are open
+at once; idle streams get a comment line every LIVE_HEARTBEAT_SECONDS to
+keep proxies from closing them. Deltas only cover writes made by this
+process, so clients keep a slow poll as a backstop.
+"""
+import os
+import json
+import uuid
+import threading
+from collections import deque
+from itertools import islice
+from ranking_index import normalize_college
+
+LIVE_REPLAY_SIZE = int(os.environ.get("LIVE_REPLAY_SIZE", "1000"))
+LIVE_MAX_SUBSCRIBERS = int(os.environ.get("LIVE_MAX_SUBSCRIBERS", "500"))
+LIVE_HEARTBEAT_SECONDS = float(os.environ.get("LIVE_HEARTBEAT_SECONDS", "15"))
+# Reconnect delay suggested to EventSource
+LIVE_RETRY_MS = int(os.environ.get("LIVE_RETRY_MS", "3000"))
+
+
+class LeaderboardPublisher:
+    """
+    Fan-out of leaderboard events. publish() appends to the ring buffer and
+    wakes the streams; subscribe() opens a stream or returns None when
+    max_subscribers are already open.
+    """
+
+    def __init__(self, replay_size=LIVE_REPLAY_SIZE, max_subscribers=LIVE_MAX_SUBSCRIBERS,
+                 heartbeat_seconds=LIVE_HEARTBEAT_SECONDS):
+        self.stream_id = uuid.uuid4().hex[:8]  # event ids from other processes are not ours
+        self.max_subscribers = max_subscribers
+        self.heartbeat_seconds = heartbeat_seconds
+        self._events = deque(maxlen=replay_size)  # (seq, event, payload, college)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self.subscribers = 0
+        self.published = 0
+        self.rejected = 0
+
+    def publish(self, event, data, college=None):
+        """Send `event` to every stream, or only to streams for `college` and the global ones"""
+        payload = json.dumps(data, separators=(',', ':'))
+        with self._condition:
+            self._seq += 1
+            self._events.append((self._seq, event, payload, normalize_college(college) if college else None))
+            self.published += 1
+            self._condition.notify_all()
+
+    def subscribe(self, college=None, last_event_id=None):
+        with self._condition:
+            if self.subscribers >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            self.subscribers += 1
+            position = self._resume_position(last_event_id)
+        return Subscription(self, normalize_college(college) if college else None, position)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "subscribers": self.subscribers,
+                "max_subscribers": self.max_subscribers,
+                "published": self.published,
+                "rejected": self.rejected,
+                "buffered": len(self._events),
+            }
+
+    def _resume_position(self, last_event_id):
+        # Caller holds self._condition. Returns the last seq the client has
+        # seen, or -1 when it must be reset.
+        if not last_event_id:
+            return self._seq
+        stream_id, _, seq = last_event_id.partition('.')
+        if stream_id != self.stream_id or not seq.isdigit() or int(seq) > self._seq:
+            return -1
+        return int(seq)
+
+    def _release(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def _read_after(self, position):
+        """
+        Wait up to the heartbeat interval for events after `position`.
+        Returns (events, reset, new_position).
+        """
+        with self._condition:
+            if position == self._seq:
+                self._condition.wait(self.heartbeat_seconds)
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            if position < oldest - 1:
+                return [], True, self._seq
+            events = list(islice(self._events, position - oldest + 1, None))
+            return events, False, self._seq
+
+
+class Subscription:
+    """
+    One open stream: iterate for SSE text. close() (called by the WSGI
+    server when the response ends, even if it never started) frees the slot.
+    """
+
+    def __init__(self, publisher, college, position):
+        self.publisher = publisher
+        self.college = college
+        self.position = position
+        self._closed = False
+
+    def __iter__(self):
+        yield f"retry: {LIVE_RETRY_MS}\n\n"
+        if self.position < 0:
+            self.position = self.publisher._seq
+            yield self._format(self.position, "reset", "{}")
+        while not self._closed:
+            events, reset, latest = self.publisher._read_after(self.position)
+            if reset:
+                self.position = latest
+                yield self._format(latest, "reset", "{}")
+                continue
+            sent = False
+            for seq, event, payload, college in events:
+                self.position = seq
+                if college is None or self.college is None or college == self.college:
+                    sent = True
+                    yield self._format(seq, event, payload)
+            if not sent:
+                yield ": keepalive\n\n"
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.publisher._release()
+
+    def _format(self, seq, event, payload):
+        return f"id: {self.publisher.stream_id}.{seq}\nevent: {event}\ndata: {payload}\n\n"
+
+
+publisher = LeaderboardPublisher()
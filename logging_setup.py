@@ -0,0 +1,147 @@
+# logging_setup.py
+"""
+Logging pipeline for the app and scripts.
+
+configure_logging() puts a QueueHandler on the root logger, so a log call
+only appends the record to a bounded queue; a QueueListener thread does the
+formatting and writing. Messages are formatted in the listener, so %-style
+arguments cost nothing on the request thread. Records are written as one
+JSON object per line (LOG_FORMAT=json) or as plain text (LOG_FORMAT=text),
+with messages truncated to LOG_MAX_MESSAGE_CHARS.
+
+init_app() adds per-route sampling for INFO and DEBUG records:
+LOG_SAMPLE_RATES="/submit_result=0.1,/leaderboard=0.05" keeps the low-level
+logs of about 10% and 5% of those requests. Warnings and errors are always kept.
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_MAX_MESSAGE_CHARS = int(os.environ.get("LOG_MAX_MESSAGE_CHARS", "1000"))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Route of the request being handled and whether its INFO/DEBUG logs are kept
+_route = ContextVar("log_route", default=None)
+_sampled = ContextVar("log_sampled", default=True)
+
+_listener = None
+
+
+def parse_sample_rates(value):
+    """"/a=0.1,/b=0.5" -> {"/a": 0.1, "/b": 0.5}"""
+    rates = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            route, rate = item.rsplit("=", 1)
+            rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+LOG_SAMPLE_RATES = parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES", "/submit_result=0.1,/leaderboard=0.05"))
+
+
+def truncate(text, limit=None):
+    limit = LOG_MAX_MESSAGE_CHARS if limit is None else limit
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
+    return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage()),
+        }
+        route = getattr(record, "route", None)
+        if route:
+            entry["route"] = route
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TruncatingFormatter(logging.Formatter):
+    def formatMessage(self, record):
+        record.message = truncate(record.message)
+        return super().formatMessage(record)
+
+
+class SamplingFilter(logging.Filter):
+    """Drop INFO and lower records from requests that were not sampled"""
+
+    def filter(self, record):
+        record.route = _route.get()
+        return record.levelno >= logging.WARNING or _sampled.get()
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener and drops records
+    instead of blocking when the queue is full
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DeferredQueueHandler.dropped += 1
+
+
+def configure_logging(level=None, fmt=None):
+    """
+    Route all logging through the background queue. Safe to call more than
+    once; only the first call has an effect. `fmt` is "json" or "text" and
+    is overridden by LOG_FORMAT.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    fmt = (LOG_FORMAT or fmt or "json").lower()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TruncatingFormatter(TEXT_FORMAT))
+
+    handler = DeferredQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level or LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # flush what is still queued
+
+
+def init_app(app):
+    """Decide per request whether its INFO/DEBUG records are logged"""
+
+    @app.before_request
+    def sample_request_logs():
+        from flask import request
+        route = request.url_rule.rule if request.url_rule is not None else None
+        _route.set(route)
+        rate = LOG_SAMPLE_RATES.get(route, 1.0)
+        _sampled.set(rate >= 1.0 or random.random() < rate)
@@ -0,0 +1,238 @@
+# metrics.py
+"""
+Small in-process metrics registry with Prometheus text exposition.
+
+init_app() adds per-route latency/error metrics, Jinja render timing, an
+optional slow-request log and the /metrics endpoint. Storage functions are
+wrapped with timed()/atimed(). Values are per process.
+"""
+import os
+import time
+import bisect
+import threading
+import functools
+import logging
+from flask import g, request, has_request_context, before_render_template, template_rendered, Response
+
+logger = logging.getLogger(__name__)
+
+# Requests slower than this (milliseconds) are logged with a per-phase breakdown
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(key + (("le", _format_value(float(bound))),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(float(series[-2]))}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+http_request_seconds = Histogram("http_request_duration_seconds", "Time spent handling a request, by route")
+http_request_errors = Counter("http_request_errors_total", "Requests that raised or returned a 5xx, by route")
+template_render_seconds = Histogram("template_render_duration_seconds", "Time spent rendering Jinja templates")
+storage_call_seconds = Histogram("storage_call_duration_seconds", "Time spent in storage functions")
+storage_call_errors = Counter("storage_call_errors_total", "Storage calls that failed")
+storage_call_rows = Histogram("storage_call_rows", "Rows returned by storage calls", ROW_BUCKETS)
+
+_metrics = [http_request_seconds, http_request_errors, template_render_seconds,
+            storage_call_seconds, storage_call_errors, storage_call_rows]
+_collectors = []
+
+
+def register_collector(collect):
+    """
+    Register a callable run at scrape time that returns a list of
+    (name, help, type, [(labels_dict, value), ...]) tuples, for values that
+    live elsewhere such as cache statistics
+    """
+    _collectors.append(collect)
+
+
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        try:
+            for name, help_text, metric_type, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+        except Exception as e:
+            logger.error(f"Metrics collector failed: {str(e)}")
+    return "\n".join(lines) + "\n"
+
+
+def record_phase(phase, seconds):
+    """Add time to a phase of the current request's slow-request breakdown"""
+    if has_request_context():
+        phases = g.setdefault("metrics_phases", {})
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+def _rows_in(response):
+    data = response.get("data") if isinstance(response, dict) else getattr(response, "data", None)
+    return len(data) if isinstance(data, list) else None
+
+
+def _observe_storage(function, backend, response, elapsed):
+    storage_call_seconds.observe(elapsed, function=function, backend=backend)
+    record_phase("storage", elapsed)
+    if response is None or (isinstance(response, dict) and "error" in response):
+        storage_call_errors.inc(function=function, backend=backend)
+        return
+    rows = _rows_in(response)
+    if rows is not None:
+        storage_call_rows.observe(rows, function=function, backend=backend)
+
+
+def timed(backend):
+    """Decorator recording latency, errors and row counts of a storage function"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = func(*args, **kwargs)
+                return response
+            finally:
+                _observe_storage(func.__name__, backend, response, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def atimed(backend):
+    """timed() for coroutine functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = await func(*args, **kwargs)
+                return response
+            finally:
+                _observe_storage(func.__name__, backend, response, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    """Install request/render hooks and the /metrics endpoint on `app`"""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_phases = {}
+
+    @app.teardown_request
+    def record_request(exception=None):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        status = getattr(g, "metrics_status", 500 if exception else 200)
+        http_request_seconds.observe(elapsed, route=route, method=request.method)
+        if exception is not None or status >= 500:
+            http_request_errors.inc(route=route, method=request.method)
+
+        if elapsed * 1000 >= SLOW_REQUEST_MS:
+            phases = g.pop("metrics_phases", {})
+            accounted = sum(phases.values())
+            breakdown = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in sorted(phases.items()))
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({route}) took {elapsed * 1000:.1f}ms"
+                f" [{breakdown}{', ' if breakdown else ''}other={(elapsed - accounted) * 1000:.1f}ms]"
+            )
+
+    @app.after_request
+    def remember_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    def start_render(sender, template, context, **extra):
+        if has_request_context():
+            g.setdefault("metrics_render_starts", []).append(time.perf_counter())
+
+    def finish_render(sender, template, context, **extra):
+        if has_request_context() and g.get("metrics_render_starts"):
+            elapsed = time.perf_counter() - g.metrics_render_starts.pop()
+            template_render_seconds.observe(elapsed, template=template.name or "string")
+            record_phase("render", elapsed)
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,129 @@
+# moderation.py
+"""
+Sweep the leaderboard for usernames that break the username rules and
+remove them in bulk.
+
+    python moderation.py --dry-run --report report.json
+    python moderation.py --user "Some Name" --user "Other Name"
+
+Rows are streamed with keyset pagination and offenders are deleted with one
+request per --batch-size usernames, so a full sweep costs a handful of
+requests instead of one per user.
+"""
+import argparse
+import json
+import logging
+import time
+from storage import iter_leaderboard, delete_users_from_leaderboard
+from username_filter import validate_username
+from logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# validate_username messages that are about what the name says rather than
+# its format; older rows predate the format rules, so those only apply with strict
+CONTENT_ERRORS = {
+    "Username contains inappropriate language",
+    "This username is not allowed",
+}
+
+def find_offenders(rows, extra_usernames=(), strict=False):
+    """
+    Yield (row, reason) for every row whose username should be removed
+    """
+    extra = {name.lower() for name in extra_usernames}
+    for row in rows:
+        username = row.get('username') or ''
+        if username.lower() in extra:
+            yield row, "Listed for removal"
+            continue
+        is_valid, error_message = validate_username(username)
+        if not is_valid and (strict or error_message in CONTENT_ERRORS):
+            yield row, error_message
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def sweep(extra_usernames=(), strict=False, dry_run=False, page_size=1000, batch_size=100):
+    """
+    Scan the whole leaderboard and delete offending users.
+    Returns a report dict suitable for JSON output.
+    """
+    started = time.perf_counter()
+    scanned = 0
+
+    def counted(rows):
+        nonlocal scanned
+        for row in rows:
+            scanned += 1
+            yield row
+
+    offenders = []
+    for row, reason in find_offenders(counted(iter_leaderboard(page_size)), extra_usernames, strict):
+        offenders.append({
+            'username': row['username'],
+            'college': row.get('college'),
+            'best_wpm': row.get('best_wpm'),
+            'reason': reason,
+        })
+        logger.info(f"Flagged {row['username']!r}: {reason}")
+
+    deleted = 0
+    errors = []
+    if not dry_run:
+        usernames = [offender['username'] for offender in offenders]
+        for batch in _batches(usernames, batch_size):
+            response = delete_users_from_leaderboard(batch)
+            if 'error' in response:
+                logger.error(f"Error removing batch of {len(batch)} users: {response['error']}")
+                errors.append({'usernames': batch, 'error': str(response['error'])})
+            else:
+                removed = _deleted_count(response)
+                if removed < len(batch):
+                    logger.warning(f"Removed {removed} of {len(batch)} users in batch, the rest were already gone")
+                deleted += removed
+
+    return {
+        'dry_run': dry_run,
+        'strict': strict,
+        'scanned': scanned,
+        'flagged': len(offenders),
+        'deleted': deleted,
+        'errors': errors,
+        'offenders': offenders,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
+
+def _deleted_count(response):
+    """
+    Rows a delete actually removed: sqlite_client reports a count, Supabase
+    (and the benchmark backend) return the deleted rows
+    """
+    if isinstance(response, dict):
+        return response['count'] if response.get('count') is not None else len(response.get('data') or [])
+    return len(response.data or [])
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove leaderboard users that break the username rules")
+    parser.add_argument('--dry-run', action='store_true', help="report offenders without deleting them")
+    parser.add_argument('--strict', action='store_true', help="also remove names that break the length/character rules")
+    parser.add_argument('--user', action='append', default=[], help="remove this username as well (repeatable)")
+    parser.add_argument('--report', help="write the JSON report to this file")
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    configure_logging(fmt="text")
+    report = sweep(args.user, args.strict, args.dry_run, args.page_size, args.batch_size)
+
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    logger.info(
+        f"Scanned {report['scanned']} users, flagged {report['flagged']}, deleted {report['deleted']}"
+        + (" (dry run)" if args.dry_run else "")
+    )
+
+if __name__ == "__main__":
+    main()
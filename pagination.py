@@ -0,0 +1,26 @@
+# pagination.py
+import base64
+import json
+
+
+def encode_cursor(row: dict) -> str:
+    """
+    Build an opaque keyset cursor from the last row of a leaderboard page.
+    Rankings are ordered by (best_wpm DESC, username ASC), so that pair is
+    enough to resume right after the row.
+    """
+    raw = json.dumps([float(row['best_wpm']), row['username']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Turn a cursor from encode_cursor back into (best_wpm, username).
+    Raises ValueError for anything that was not produced by encode_cursor.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        best_wpm, username = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return float(best_wpm), str(username)
+    except Exception as e:
+        raise ValueError(f"Invalid leaderboard cursor: {cursor!r}") from e
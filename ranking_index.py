@@ -0,0 +1,265 @@
+# ranking_index.py
+import bisect
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_college(college):
+    """Colleges are compared case-insensitively, e.g. 'Mpstme' == 'MPSTME'"""
+    return (college or 'Unknown').strip().upper()
+
+
+class RankingIndex:
+    """
+    Best score per user for a single board, kept sorted by
+    (best_wpm DESC, username ASC) so the top K is a slice.
+    """
+
+    def __init__(self):
+        self._keys = []  # sorted (-best_wpm, username)
+        self._entries = {}  # username -> entry dict
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, username):
+        return self._entries.get(username)
+
+    def put(self, entry):
+        """Insert or replace the entry for entry['username']"""
+        self.remove(entry['username'])
+        bisect.insort(self._keys, (-entry['best_wpm'], entry['username']))
+        self._entries[entry['username']] = entry
+
+    def remove(self, username):
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            key = (-entry['best_wpm'], username)
+            del self._keys[bisect.bisect_left(self._keys, key)]
+        return entry
+
+    def bulk_load(self, entries):
+        """
+        Replace the contents with `entries` (later entries for the same user
+        win) with one sort, instead of an O(n) insort per entry
+        """
+        self._entries = {entry['username']: entry for entry in entries}
+        self._keys = sorted((-entry['best_wpm'], username) for username, entry in self._entries.items())
+
+    def rank(self, username):
+        """1-based position of `username`, or None when it is not on the board"""
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        return bisect.bisect_left(self._keys, (-entry['best_wpm'], username)) + 1
+
+    def around(self, position, above, below):
+        """
+        Entries ranked just before and just after the 1-based `position`,
+        each with its 'rank'. Returns (above, below), in ranking order.
+        """
+        start = max(position - 1 - above, 0)
+        before = [
+            dict(self._entries[username], rank=start + offset + 1)
+            for offset, (_, username) in enumerate(self._keys[start:position - 1])
+        ]
+        after = [
+            dict(self._entries[username], rank=position + offset + 1)
+            for offset, (_, username) in enumerate(self._keys[position:position + below])
+        ]
+        return before, after
+
+    def top(self, k, after=None):
+        """
+        First `k` entries, or the `k` entries ranked after the
+        (best_wpm, username) pair `after` (as decoded from a page cursor)
+        """
+        start = 0 if after is None else bisect.bisect_right(self._keys, (-after[0], after[1]))
+        return [dict(self._entries[username]) for _, username in self._keys[start:start + k]]
+
+
+class LeaderboardIndex:
+    """
+    Global RankingIndex plus one per college, updated incrementally as scores
+    come in so leaderboard reads never touch storage. Usernames in `hidden`
+    (lower case) are never indexed, so they take no rank on any board.
+    """
+
+    def __init__(self, hidden=frozenset()):
+        self.hidden = hidden
+        self._global = RankingIndex()
+        self._colleges = {}
+        self._lock = threading.RLock()
+        self.version = 0  # bumped on every change, for ETags and caches
+        # Bumped by load(), remove() and clear(); a load whose snapshot was
+        # read across a bump is thrown away
+        self._generation = 0
+        # While load() reads storage: username -> entry after the latest
+        # record(), merged into the new boards
+        self._written_during_load = None
+
+    def __len__(self):
+        return len(self._global)
+
+    def load(self, rows):
+        """
+        Replace the contents with rows from get_leaderboard. Scores recorded
+        while `rows` is being read are kept: for those users the entry with
+        more tests_taken wins (with the higher best_wpm of the two), so a
+        write the snapshot already includes is not counted twice. If a
+        remove(), clear() or newer load() happens meanwhile the snapshot may
+        hold rows storage no longer has, so it is dropped and False returned.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._written_during_load = {}
+        try:
+            entries = [dict(row) for row in rows if row['username'].lower() not in self.hidden]
+        except BaseException:
+            with self._lock:
+                if self._generation == generation:
+                    self._written_during_load = None
+            raise
+        boards = {}
+        for entry in {entry['username']: entry for entry in entries}.values():
+            boards.setdefault(normalize_college(entry.get('college')), []).append(entry)
+        global_board = RankingIndex()
+        global_board.bulk_load(entries)
+        colleges = {}
+        for college_key, college_entries in boards.items():
+            colleges[college_key] = RankingIndex()
+            colleges[college_key].bulk_load(college_entries)
+        with self._lock:
+            if self._generation != generation:
+                logger.info("Ranking index changed while loading, discarding the snapshot")
+                return False
+            written, self._written_during_load = self._written_during_load, None
+            self._global = global_board
+            self._colleges = colleges
+            for username, entry in written.items():
+                loaded = self._global.get(username)
+                if loaded is None:
+                    self._put(dict(entry))
+                    continue
+                # Both only grow, so the larger of each is never ahead of storage
+                merged = dict(entry if entry['tests_taken'] > loaded['tests_taken'] else loaded)
+                best = entry if entry['best_wpm'] > loaded['best_wpm'] else loaded
+                merged.update(best_wpm=best['best_wpm'], college=best['college'])
+                self._put(merged)
+            self.version += 1
+            logger.info(f"Ranking index loaded with {len(self._global)} users")
+            return True
+
+    def record(self, username, college, wpm, accuracy):
+        """
+        Apply a new score. Like storage's summary rows, tests_taken and
+        avg_accuracy count every score while only a new personal best
+        replaces the WPM (and so the rank). Returns True when the user's entry
+        changed.
+        """
+        if username.lower() in self.hidden:
+            return False
+        with self._lock:
+            current = self._global.get(username)
+            if current is None:
+                entry = {
+                    'username': username,
+                    'college': normalize_college(college),
+                    'best_wpm': float(wpm),
+                    'avg_accuracy': float(accuracy),
+                    'tests_taken': 1,
+                }
+                self._put(entry)
+            else:
+                tests_taken = current['tests_taken'] + 1
+                entry = dict(
+                    current,
+                    tests_taken=tests_taken,
+                    avg_accuracy=current['avg_accuracy'] + (float(accuracy) - current['avg_accuracy']) / tests_taken,
+                )
+                if float(wpm) <= current['best_wpm']:
+                    # Same position: update the entry both boards share in place
+                    current.update(entry)
+                    entry = current
+                else:
+                    entry.update(college=normalize_college(college), best_wpm=float(wpm))
+                    self._put(entry)
+            if self._written_during_load is not None:
+                self._written_during_load[username] = dict(entry)
+            self.version += 1
+            return True
+
+    def remove(self, username):
+        with self._lock:
+            self._invalidate_load()
+            if self._remove(username):
+                self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidate_load()
+            self._global = RankingIndex()
+            self._colleges = {}
+            self.version += 1
+
+    def _invalidate_load(self):
+        # Caller holds self._lock
+        self._generation += 1
+        self._written_during_load = None
+
+    def top(self, k, college=None, after=None):
+        """
+        Top `k` entries overall, or for one college when `college` is given.
+        `after` continues from a (best_wpm, username) position, see RankingIndex.top
+        """
+        with self._lock:
+            if college is None:
+                return self._global.top(k, after)
+            board = self._colleges.get(normalize_college(college))
+            return board.top(k, after) if board is not None else []
+
+    def standing(self, username, neighbours=5, college_board=False):
+        """
+        Where `username` stands: {"entry", "global_rank", "college_rank",
+        "above", "below"} with up to `neighbours` entries either side on the
+        global board (or on the user's college board with `college_board`).
+        None when the user has no entry. O(log n) apart from the neighbours.
+        """
+        with self._lock:
+            global_rank = self._global.rank(username)
+            if global_rank is None:
+                return None
+            entry = self._global.get(username)
+            board = self._colleges[normalize_college(entry.get('college'))]
+            college_rank = board.rank(username)
+            if college_board:
+                above, below = board.around(college_rank, neighbours, neighbours)
+            else:
+                above, below = self._global.around(global_rank, neighbours, neighbours)
+            return {
+                'entry': dict(entry),
+                'global_rank': global_rank,
+                'college_rank': college_rank,
+                'above': above,
+                'below': below,
+            }
+
+    def _remove(self, username):
+        # Caller holds self._lock
+        entry = self._global.remove(username)
+        if entry is not None:
+            self._colleges[normalize_college(entry.get('college'))].remove(username)
+        return entry
+
+    def _put(self, entry):
+        if entry['username'].lower() in self.hidden:
+            return
+        previous = self._global.get(entry['username'])
+        if previous is not None:
+            self._colleges[normalize_college(previous.get('college'))].remove(entry['username'])
+        self._global.put(entry)
+        college_key = normalize_college(entry.get('college'))
+        self._colleges.setdefault(college_key, RankingIndex()).put(entry)
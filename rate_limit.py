@@ -0,0 +1,103 @@
+# rate_limit.py
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# A student finishes at most a few tests a minute; allow a short burst on
+# top of that for retries after network errors
+SUBMIT_RATE_PER_MINUTE = float(os.environ.get("SUBMIT_RATE_PER_MINUTE", "6"))
+SUBMIT_RATE_BURST = float(os.environ.get("SUBMIT_RATE_BURST", "3"))
+SUBMIT_DUPLICATE_WINDOW = float(os.environ.get("SUBMIT_DUPLICATE_WINDOW", "10"))
+SUBMIT_LIMITER_MAX_KEYS = int(os.environ.get("SUBMIT_LIMITER_MAX_KEYS", "10000"))
+
+
+class Submission:
+    """An admitted submission; duplicates wait on `future` for its result"""
+
+    def __init__(self, fingerprint, admitted_at):
+        self.fingerprint = fingerprint
+        self.admitted_at = admitted_at
+        self.future = Future()
+
+
+class SubmissionLimiter:
+    """
+    Token bucket per key (the session username) plus duplicate coalescing.
+
+    admit(key, fingerprint) returns one of
+      ("allowed", submission)  - go ahead, then call finish() with the result
+      ("duplicate", submission) - same fingerprint as a submission admitted
+                                  less than `duplicate_window` seconds ago;
+                                  wait on submission.future for its result
+      ("limited", retry_after) - bucket is empty, retry after that many seconds
+    Duplicates do not use up tokens. State is per process and the least
+    recently used keys are dropped beyond `max_keys`.
+    """
+
+    def __init__(self, rate_per_minute=SUBMIT_RATE_PER_MINUTE, burst=SUBMIT_RATE_BURST,
+                 duplicate_window=SUBMIT_DUPLICATE_WINDOW, max_keys=SUBMIT_LIMITER_MAX_KEYS):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.duplicate_window = duplicate_window
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._recent = OrderedDict()   # key -> last admitted Submission
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.coalesced = 0
+
+    def admit(self, key, fingerprint):
+        now = time.monotonic()
+        with self._lock:
+            recent = self._recent.get(key)
+            if (recent is not None and recent.fingerprint == fingerprint
+                    and now - recent.admitted_at < self.duplicate_window):
+                self.coalesced += 1
+                return "duplicate", recent
+
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self.limited += 1
+                return "limited", (1 - tokens) / self.rate if self.rate else float(self.duplicate_window)
+            self._buckets[key] = (tokens - 1, now)
+
+            submission = Submission(fingerprint, now)
+            self._recent.pop(key, None)
+            self._recent[key] = submission
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            while len(self._recent) > self.max_keys:
+                self._recent.popitem(last=False)
+            self.allowed += 1
+            return "allowed", submission
+
+    def finish(self, key, submission, result, ok=True):
+        """
+        Publish the result of an allowed submission to its duplicates. Failed
+        submissions are forgotten so that a retry is written, not coalesced.
+        """
+        if not ok:
+            with self._lock:
+                if self._recent.get(key) is submission:
+                    del self._recent[key]
+        submission.future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracked_keys": len(self._buckets),
+                "rate_per_minute": self.rate * 60.0,
+                "burst": self.burst,
+                "duplicate_window": self.duplicate_window,
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "coalesced": self.coalesced,
+            }
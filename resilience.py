@@ -0,0 +1,268 @@
+# resilience.py
+"""
+Deadlines, retries and a circuit breaker for storage calls.
+
+Backends report failures as {"error": ...} rather than raising, so every
+helper here works on that convention:
+
+- each call gets a deadline (STORAGE_READ_DEADLINE / STORAGE_WRITE_DEADLINE
+  seconds, retries included); a call that has not returned by then gives an
+  error and the worker moves on, even if the backend is hung
+- only transport errors and timeouts count as failures: backends build
+  their error responses with error_response(), which marks those as
+  "transient" from the exception type; any other error, e.g. a rejected
+  insert or a statement timeout, is the backend answering and is returned
+  as is, without a retry
+- failed reads are retried up to STORAGE_READ_RETRIES times with full-jitter
+  exponential backoff; writes are never retried since they may have landed
+- after CIRCUIT_FAILURE_THRESHOLD consecutive failed calls (each counted
+  once, however many attempts it made) the circuit opens and
+  calls fail immediately for CIRCUIT_RESET_SECONDS, then one trial call
+  decides whether it closes again
+- LastGoodStore keeps the last successful result per read so pages can be
+  served from it while storage is failing
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+import sqlite3
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+STORAGE_READ_DEADLINE = float(os.environ.get("STORAGE_READ_DEADLINE", "3"))
+STORAGE_WRITE_DEADLINE = float(os.environ.get("STORAGE_WRITE_DEADLINE", "8"))
+STORAGE_READ_RETRIES = int(os.environ.get("STORAGE_READ_RETRIES", "2"))
+STORAGE_RETRY_BASE_DELAY = float(os.environ.get("STORAGE_RETRY_BASE_DELAY", "0.1"))
+STORAGE_RETRY_MAX_DELAY = float(os.environ.get("STORAGE_RETRY_MAX_DELAY", "1"))
+# Threads running synchronous backend calls; a hung call holds one until the
+# backend's own timeout, not the request that made it
+STORAGE_MAX_INFLIGHT = int(os.environ.get("STORAGE_MAX_INFLIGHT", "16"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.environ.get("CIRCUIT_RESET_SECONDS", "30"))
+LAST_GOOD_SIZE = int(os.environ.get("LAST_GOOD_SIZE", "64"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. allow() says whether a call may go
+    ahead; the caller reports the outcome with record_success/record_failure.
+    While half open only one trial call is let through at a time.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Storage circuit closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            reopen = self._current_state() == HALF_OPEN
+            if reopen or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                logger.warning(f"Storage circuit opened after {self._failures} consecutive failures")
+            self._trial_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+    def _current_state(self):
+        # Caller holds self._lock
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return self._state
+
+
+class LastGoodStore:
+    """Most recent successful result per key, kept across cache invalidations (LRU bounded)"""
+
+    def __init__(self, max_entries=LAST_GOOD_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, saved_at)
+        self._lock = threading.Lock()
+        self.served = 0
+
+    def save(self, key, value):
+        if isinstance(value, dict) and "error" in value:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def fallback(self, key, error_response):
+        """
+        The last good value for `key` marked stale (with its age), or
+        `error_response` when there is none
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return error_response
+            self.served += 1
+        value, saved_at = entry
+        return dict(value, stale=True, stale_seconds=round(time.time() - saved_at, 1))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def backoff_delay(attempt):
+    """Full jitter: uniform in [0, min(max delay, base * 2^attempt)]"""
+    return random.uniform(0, min(STORAGE_RETRY_MAX_DELAY, STORAGE_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _is_error(response):
+    return isinstance(response, dict) and "error" in response
+
+
+# httpx, used by the Supabase SDK, is only imported with the SDK (see
+# LAZY_INIT), so its transport errors are matched by class name
+_HTTPX_TRANSIENT = ("TransportError", "TimeoutException")
+
+
+def _is_transient_exception(e):
+    if isinstance(e, (OSError, TimeoutError)):
+        return True
+    if isinstance(e, sqlite3.OperationalError):
+        return "locked" in str(e) or "busy" in str(e)
+    return any(cls.__module__.startswith("httpx") and cls.__name__ in _HTTPX_TRANSIENT
+               for cls in type(e).__mro__)
+
+
+def error_response(e):
+    """
+    The {"error": ...} response for exception `e`, marked "transient" when
+    it is a transport failure or timeout worth a retry: socket errors,
+    httpx transport errors and a locked SQLite database
+    """
+    if _is_transient_exception(e):
+        return {"error": str(e), "transient": True}
+    return {"error": str(e)}
+
+
+def is_transient(response):
+    return bool(response.get("transient"))
+
+
+_executor = ThreadPoolExecutor(max_workers=STORAGE_MAX_INFLIGHT, thread_name_prefix="storage-call")
+
+
+def _plan(read):
+    deadline = time.monotonic() + (STORAGE_READ_DEADLINE if read else STORAGE_WRITE_DEADLINE)
+    return deadline, (STORAGE_READ_RETRIES if read else 0) + 1
+
+
+def _attempt_sync(func, args, deadline):
+    future = _executor.submit(func, *args)
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeoutError:
+        future.cancel()
+        return {"error": "Storage call timed out", "transient": True}
+    except Exception as e:
+        return error_response(e)
+
+
+def call(breaker, name, func, *args, read=False):
+    """
+    Run a synchronous backend call under `breaker` with the read or write
+    deadline, retrying reads that fail with a transient error. The breaker
+    is asked once and told one outcome per call. Returns the backend's
+    response or an {"error": ...} dict.
+    """
+    if not breaker.allow():
+        return {"error": "Storage circuit is open", "circuit_open": True}
+    deadline, attempts = _plan(read)
+    for attempt in range(attempts):
+        response = _attempt_sync(func, args, deadline)
+        if not _is_error(response) or not is_transient(response):
+            breaker.record_success()
+            return response
+        delay = backoff_delay(attempt)
+        if attempt + 1 == attempts or time.monotonic() + delay >= deadline:
+            break
+        logger.debug("Retrying %s after %s (attempt %d)", name, response["error"], attempt + 1)
+        time.sleep(delay)
+    breaker.record_failure()
+    return response
+
+
+async def acall(breaker, name, make_call, read=False):
+    """
+    call() for awaitables: `make_call()` returns a fresh awaitable per
+    attempt. The deadline is enforced with asyncio.wait_for.
+    """
+    if not breaker.allow():
+        return {"error": "Storage circuit is open", "circuit_open": True}
+    deadline, attempts = _plan(read)
+    for attempt in range(attempts):
+        try:
+            response = await asyncio.wait_for(make_call(), timeout=max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            response = {"error": "Storage call timed out", "transient": True}
+        except Exception as e:
+            response = error_response(e)
+        if not _is_error(response) or not is_transient(response):
+            breaker.record_success()
+            return response
+        delay = backoff_delay(attempt)
+        if attempt + 1 == attempts or time.monotonic() + delay >= deadline:
+            break
+        logger.debug("Retrying %s after %s (attempt %d)", name, response["error"], attempt + 1)
+        await asyncio.sleep(delay)
+    breaker.record_failure()
+    return response
@@ -13,4 +13,392 @@ ALTER TABLE leaderboard ADD CONSTRAINT unique_username UNIQUE (username);
 
 -- Add indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_leaderboard_wpm ON leaderboard(wpm DESC);
-CREATE INDEX IF NOT EXISTS idx_leaderboard_username ON leaderboard(username);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_leaderboard_username ON leaderboard(username);
+
+-- College is written by insert_score alongside every score. It is stored
+-- normalized (trimmed, upper case) so per-college reads are plain equality
+-- lookups on the index below; submit_score/submit_scores normalize on write.
+ALTER TABLE leaderboard ADD COLUMN IF NOT EXISTS college TEXT DEFAULT 'UNKNOWN';
+ALTER TABLE leaderboard ALTER COLUMN college SET DEFAULT 'UNKNOWN';
+UPDATE leaderboard SET college = UPPER(BTRIM(COALESCE(college, 'Unknown')))
+WHERE college IS NULL OR college <> UPPER(BTRIM(college));
+ALTER TABLE leaderboard ALTER COLUMN college SET NOT NULL;
+ALTER TABLE leaderboard DROP CONSTRAINT IF EXISTS college_normalized;
+ALTER TABLE leaderboard ADD CONSTRAINT college_normalized CHECK (college = UPPER(BTRIM(college)));
+
+-- Ranking order is (wpm DESC, username ASC); these indexes let top-N and
+-- keyset page reads seek straight to the page instead of scanning the table,
+-- globally and within one college
+CREATE INDEX IF NOT EXISTS idx_leaderboard_rank ON leaderboard(wpm DESC, username);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_college_rank ON leaderboard(college, wpm DESC, username);
+
+-- leaderboard is the per-user summary of score_history (below): wpm,
+-- accuracy and duration_seconds are the user's best run, tests_taken and
+-- avg_accuracy cover every attempt. submit_score/submit_scores keep them as
+-- running aggregates in the same statement that appends the history row, so
+-- a write is O(1) and leaderboard reads never touch the history.
+ALTER TABLE leaderboard ADD COLUMN IF NOT EXISTS tests_taken INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE leaderboard ADD COLUMN IF NOT EXISTS avg_accuracy FLOAT;
+UPDATE leaderboard SET avg_accuracy = accuracy WHERE avg_accuracy IS NULL;
+ALTER TABLE leaderboard ALTER COLUMN avg_accuracy SET NOT NULL;
+
+-- Every submitted attempt, best or not, for analysis. raw_wpm is NULL for
+-- clients that do not report it.
+CREATE TABLE IF NOT EXISTS score_history (
+    id BIGSERIAL PRIMARY KEY,
+    username TEXT NOT NULL,
+    college TEXT NOT NULL DEFAULT 'UNKNOWN',
+    wpm INTEGER NOT NULL,
+    raw_wpm INTEGER,
+    accuracy FLOAT NOT NULL,
+    duration_seconds INTEGER DEFAULT 60,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_score_history_user ON score_history(username, created_at);
+
+-- Seed the history with the best runs already stored, once
+INSERT INTO score_history (username, college, wpm, accuracy, duration_seconds, created_at)
+SELECT username, college, wpm, accuracy, duration_seconds, created_at
+FROM leaderboard
+WHERE NOT EXISTS (SELECT 1 FROM score_history);
+
+-- Per-user rankings, read straight from the summary so the view stays
+-- index-friendly
+CREATE OR REPLACE VIEW leaderboard_rankings AS
+SELECT
+    username,
+    college,
+    wpm AS best_wpm,
+    avg_accuracy::FLOAT AS avg_accuracy,
+    tests_taken
+FROM leaderboard;
+
+-- One page of the leaderboard, optionally for a single college. Leave
+-- p_after_* NULL for the first page and pass the best_wpm/username of the
+-- last row seen to fetch the next one. `best_wpm <= p_after_wpm` is the
+-- index range condition; the OR only filters rows tied on WPM.
+DROP FUNCTION IF EXISTS leaderboard_page(INTEGER, INTEGER, TEXT);
+CREATE OR REPLACE FUNCTION leaderboard_page(
+    p_limit INTEGER DEFAULT 10,
+    p_after_wpm INTEGER DEFAULT NULL,
+    p_after_username TEXT DEFAULT NULL,
+    p_college TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    username TEXT,
+    college TEXT,
+    best_wpm FLOAT,
+    avg_accuracy FLOAT,
+    tests_taken INTEGER
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    -- Separate queries per case so each gets a plan on the matching index
+    IF p_college IS NULL THEN
+        RETURN QUERY
+        SELECT r.username, r.college, r.best_wpm::FLOAT, r.avg_accuracy, r.tests_taken
+        FROM leaderboard_rankings r
+        WHERE p_after_wpm IS NULL
+           OR (r.best_wpm <= p_after_wpm
+               AND (r.best_wpm < p_after_wpm OR r.username > p_after_username))
+        ORDER BY r.best_wpm DESC, r.username ASC
+        LIMIT p_limit;
+    ELSE
+        RETURN QUERY
+        SELECT r.username, r.college, r.best_wpm::FLOAT, r.avg_accuracy, r.tests_taken
+        FROM leaderboard_rankings r
+        WHERE r.college = UPPER(BTRIM(p_college))
+          AND (p_after_wpm IS NULL
+               OR (r.best_wpm <= p_after_wpm
+                   AND (r.best_wpm < p_after_wpm OR r.username > p_after_username)))
+        ORDER BY r.best_wpm DESC, r.username ASC
+        LIMIT p_limit;
+    END IF;
+END;
+$$;
+
+-- Where one user stands: global and college rank plus up to p_neighbours
+-- rows either side, on the global board or (p_college_board) the user's
+-- college board. Ranks are counts of the rows ordered before the user,
+-- answered by range scans on the rank indexes rather than reading the
+-- board. Usernames in p_exclude (lower case) take no rank. Returns NULL
+-- when the user has no score.
+CREATE OR REPLACE FUNCTION user_rank(
+    p_username TEXT,
+    p_neighbours INTEGER DEFAULT 5,
+    p_exclude TEXT[] DEFAULT '{}',
+    p_college_board BOOLEAN DEFAULT FALSE
+)
+RETURNS JSONB
+LANGUAGE plpgsql STABLE
+AS $$
+DECLARE
+    v_wpm INTEGER;
+    v_college TEXT;
+    v_global_rank BIGINT;
+    v_college_rank BIGINT;
+    v_rank BIGINT;
+    v_above JSONB;
+    v_below JSONB;
+BEGIN
+    SELECT l.wpm, l.college INTO v_wpm, v_college
+    FROM leaderboard l
+    WHERE l.username = p_username AND NOT (LOWER(l.username) = ANY(p_exclude));
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT COUNT(*) + 1 INTO v_global_rank
+    FROM leaderboard l
+    WHERE l.wpm >= v_wpm AND (l.wpm > v_wpm OR l.username < p_username)
+      AND NOT (LOWER(l.username) = ANY(p_exclude));
+
+    SELECT COUNT(*) + 1 INTO v_college_rank
+    FROM leaderboard l
+    WHERE l.college = v_college
+      AND l.wpm >= v_wpm AND (l.wpm > v_wpm OR l.username < p_username)
+      AND NOT (LOWER(l.username) = ANY(p_exclude));
+
+    v_rank := CASE WHEN p_college_board THEN v_college_rank ELSE v_global_rank END;
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+               'username', n.username, 'college', n.college, 'best_wpm', n.wpm::FLOAT,
+               'avg_accuracy', n.avg_accuracy, 'tests_taken', n.tests_taken, 'rank', v_rank - n.distance
+           ) ORDER BY n.distance DESC), '[]'::JSONB)
+    INTO v_above
+    FROM (
+        SELECT l.username, l.college, l.wpm, l.avg_accuracy, l.tests_taken,
+               ROW_NUMBER() OVER (ORDER BY l.wpm ASC, l.username DESC) AS distance
+        FROM leaderboard l
+        WHERE (NOT p_college_board OR l.college = v_college)
+          AND l.wpm >= v_wpm AND (l.wpm > v_wpm OR l.username < p_username)
+          AND NOT (LOWER(l.username) = ANY(p_exclude))
+        ORDER BY l.wpm ASC, l.username DESC
+        LIMIT p_neighbours
+    ) n;
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+               'username', n.username, 'college', n.college, 'best_wpm', n.wpm::FLOAT,
+               'avg_accuracy', n.avg_accuracy, 'tests_taken', n.tests_taken, 'rank', v_rank + n.distance
+           ) ORDER BY n.distance ASC), '[]'::JSONB)
+    INTO v_below
+    FROM (
+        SELECT l.username, l.college, l.wpm, l.avg_accuracy, l.tests_taken,
+               ROW_NUMBER() OVER (ORDER BY l.wpm DESC, l.username ASC) AS distance
+        FROM leaderboard l
+        WHERE (NOT p_college_board OR l.college = v_college)
+          AND l.wpm <= v_wpm AND (l.wpm < v_wpm OR l.username > p_username)
+          AND NOT (LOWER(l.username) = ANY(p_exclude))
+        ORDER BY l.wpm DESC, l.username ASC
+        LIMIT p_neighbours
+    ) n;
+
+    RETURN jsonb_build_object(
+        'entry', (
+            SELECT jsonb_build_object('username', l.username, 'college', l.college, 'best_wpm', l.wpm::FLOAT,
+                                      'avg_accuracy', l.avg_accuracy, 'tests_taken', l.tests_taken)
+            FROM leaderboard l WHERE l.username = p_username
+        ),
+        'global_rank', v_global_rank,
+        'college_rank', v_college_rank,
+        'above', v_above,
+        'below', v_below
+    );
+END;
+$$;
+
+-- Day, week and event leaderboards. Every score is also folded into one row
+-- per (window, user) holding the user's best within that window, so windowed
+-- reads are the same index walk as the all-time board. Window keys are
+-- "day:YYYY-MM-DD", "week:IYYY-Www" (in Asia/Kolkata, see
+-- leaderboard_windows.py) and "event:<name>"; rows are pruned once
+-- expires_at has passed.
+CREATE TABLE IF NOT EXISTS leaderboard_events (
+    name TEXT PRIMARY KEY,
+    starts_at TIMESTAMPTZ NOT NULL,
+    ends_at TIMESTAMPTZ NOT NULL,
+    CHECK (ends_at > starts_at)
+);
+
+CREATE TABLE IF NOT EXISTS leaderboard_windows (
+    window_key TEXT NOT NULL,
+    username TEXT NOT NULL,
+    college TEXT NOT NULL DEFAULT 'UNKNOWN',
+    wpm INTEGER NOT NULL,
+    accuracy FLOAT NOT NULL,
+    duration_seconds INTEGER DEFAULT 60,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (window_key, username)
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_windows_rank ON leaderboard_windows(window_key, wpm DESC, username);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_windows_college_rank ON leaderboard_windows(window_key, college, wpm DESC, username);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_windows_expires ON leaderboard_windows(expires_at);
+
+-- Windows a score made at p_at counts towards, with when each expires
+CREATE OR REPLACE FUNCTION current_leaderboard_windows(p_at TIMESTAMPTZ DEFAULT NOW())
+RETURNS TABLE (window_key TEXT, expires_at TIMESTAMPTZ)
+LANGUAGE sql STABLE
+AS $$
+    SELECT 'day:' || to_char(p_at AT TIME ZONE 'Asia/Kolkata', 'YYYY-MM-DD'),
+           (date_trunc('day', p_at AT TIME ZONE 'Asia/Kolkata') + INTERVAL '1 day') AT TIME ZONE 'Asia/Kolkata'
+    UNION ALL
+    SELECT 'week:' || to_char(p_at AT TIME ZONE 'Asia/Kolkata', 'IYYY-"W"IW'),
+           (date_trunc('week', p_at AT TIME ZONE 'Asia/Kolkata') + INTERVAL '1 week') AT TIME ZONE 'Asia/Kolkata'
+    UNION ALL
+    SELECT 'event:' || e.name, e.ends_at + INTERVAL '7 days'
+    FROM leaderboard_events e
+    WHERE p_at >= e.starts_at AND p_at < e.ends_at;
+$$;
+
+-- Fold a JSON array of {username, college, wpm, accuracy, duration_seconds}
+-- into the current windows, keeping each user's best, and prune expired rows
+CREATE OR REPLACE FUNCTION record_window_scores(p_scores JSONB)
+RETURNS VOID
+LANGUAGE sql VOLATILE
+AS $$
+    DELETE FROM leaderboard_windows WHERE expires_at <= NOW();
+
+    INSERT INTO leaderboard_windows AS w (window_key, username, college, wpm, accuracy, duration_seconds, expires_at)
+    SELECT DISTINCT ON (k.window_key, s.username)
+        k.window_key, s.username, UPPER(BTRIM(COALESCE(s.college, 'Unknown'))), s.wpm, s.accuracy,
+        COALESCE(s.duration_seconds, 60), k.expires_at
+    FROM jsonb_to_recordset(p_scores) AS s(
+        username TEXT, college TEXT, wpm INTEGER, accuracy FLOAT, duration_seconds INTEGER
+    )
+    CROSS JOIN current_leaderboard_windows() k
+    ORDER BY k.window_key, s.username, s.wpm DESC
+    ON CONFLICT (window_key, username) DO UPDATE
+    SET college = EXCLUDED.college,
+        wpm = EXCLUDED.wpm,
+        accuracy = EXCLUDED.accuracy,
+        duration_seconds = EXCLUDED.duration_seconds,
+        created_at = NOW()
+    WHERE w.wpm < EXCLUDED.wpm;
+$$;
+
+-- One page of a windowed board, with the same arguments as leaderboard_page
+CREATE OR REPLACE FUNCTION window_leaderboard_page(
+    p_window_key TEXT,
+    p_limit INTEGER DEFAULT 10,
+    p_after_wpm INTEGER DEFAULT NULL,
+    p_after_username TEXT DEFAULT NULL,
+    p_college TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    username TEXT,
+    college TEXT,
+    best_wpm FLOAT,
+    avg_accuracy FLOAT,
+    tests_taken INTEGER
+)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    IF p_college IS NULL THEN
+        RETURN QUERY
+        SELECT w.username, w.college, w.wpm::FLOAT, w.accuracy::FLOAT, 1
+        FROM leaderboard_windows w
+        WHERE w.window_key = p_window_key
+          AND w.expires_at > NOW()
+          AND (p_after_wpm IS NULL
+               OR (w.wpm <= p_after_wpm
+                   AND (w.wpm < p_after_wpm OR w.username > p_after_username)))
+        ORDER BY w.wpm DESC, w.username ASC
+        LIMIT p_limit;
+    ELSE
+        RETURN QUERY
+        SELECT w.username, w.college, w.wpm::FLOAT, w.accuracy::FLOAT, 1
+        FROM leaderboard_windows w
+        WHERE w.window_key = p_window_key
+          AND w.expires_at > NOW()
+          AND w.college = UPPER(BTRIM(p_college))
+          AND (p_after_wpm IS NULL
+               OR (w.wpm <= p_after_wpm
+                   AND (w.wpm < p_after_wpm OR w.username > p_after_username)))
+        ORDER BY w.wpm DESC, w.username ASC
+        LIMIT p_limit;
+    END IF;
+END;
+$$;
+
+-- Keystroke logs of submitted tests with the server's recomputed results
+-- (see keystroke_verify.py), kept so they can be re-verified in bulk
+CREATE TABLE IF NOT EXISTS keystroke_logs (
+    id BIGSERIAL PRIMARY KEY,
+    username TEXT NOT NULL,
+    college TEXT,
+    wpm INTEGER NOT NULL,
+    raw_wpm INTEGER NOT NULL,
+    accuracy FLOAT NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    flags JSONB NOT NULL DEFAULT '[]',
+    log JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Record scores in a single round trip: append every one to score_history
+-- and fold them into the users' summary rows. p_scores is a JSON array of
+-- {username, college, wpm, raw_wpm, accuracy, duration_seconds}, and may
+-- hold several runs by the same user (the write-behind queue batches them).
+-- Relies on unique_username, so concurrent submits cannot leave a user
+-- without a row. tests_taken and avg_accuracy take every run as a running
+-- mean, avg + (batch_avg - avg) * batch_n / (n + batch_n); the best-run
+-- columns are only replaced when the batch's best WPM beats them, so a worse
+-- run never overwrites a personal best. Returns the updated summary rows.
+-- The scores also go to the day/week/event windows.
+CREATE OR REPLACE FUNCTION submit_scores(p_scores JSONB)
+RETURNS SETOF leaderboard
+LANGUAGE sql VOLATILE
+AS $$
+    SELECT record_window_scores(p_scores);
+
+    WITH scores AS (
+        SELECT s.username, UPPER(BTRIM(COALESCE(s.college, 'Unknown'))) AS college, s.wpm, s.raw_wpm,
+               s.accuracy, COALESCE(s.duration_seconds, 60) AS duration_seconds
+        FROM jsonb_to_recordset(p_scores) AS s(
+            username TEXT, college TEXT, wpm INTEGER, raw_wpm INTEGER, accuracy FLOAT, duration_seconds INTEGER
+        )
+    ), history AS (
+        INSERT INTO score_history (username, college, wpm, raw_wpm, accuracy, duration_seconds)
+        SELECT username, college, wpm, raw_wpm, accuracy, duration_seconds FROM scores
+    )
+    INSERT INTO leaderboard AS l (username, college, wpm, accuracy, duration_seconds, tests_taken, avg_accuracy)
+    SELECT DISTINCT ON (username)
+        username, college, wpm, accuracy, duration_seconds,
+        COUNT(*) OVER (PARTITION BY username), AVG(accuracy) OVER (PARTITION BY username)
+    FROM scores
+    ORDER BY username, wpm DESC
+    ON CONFLICT ON CONSTRAINT unique_username DO UPDATE
+    SET tests_taken = l.tests_taken + EXCLUDED.tests_taken,
+        avg_accuracy = l.avg_accuracy
+            + (EXCLUDED.avg_accuracy - l.avg_accuracy) * EXCLUDED.tests_taken / (l.tests_taken + EXCLUDED.tests_taken),
+        college = CASE WHEN EXCLUDED.wpm > l.wpm THEN EXCLUDED.college ELSE l.college END,
+        accuracy = CASE WHEN EXCLUDED.wpm > l.wpm THEN EXCLUDED.accuracy ELSE l.accuracy END,
+        duration_seconds = CASE WHEN EXCLUDED.wpm > l.wpm THEN EXCLUDED.duration_seconds ELSE l.duration_seconds END,
+        created_at = CASE WHEN EXCLUDED.wpm > l.wpm THEN NOW() ELSE l.created_at END,
+        wpm = GREATEST(l.wpm, EXCLUDED.wpm)
+    RETURNING l.*;
+$$;
+
+-- Single-score version of submit_scores, used for direct submissions
+DROP FUNCTION IF EXISTS submit_score(TEXT, TEXT, INTEGER, FLOAT, INTEGER);
+CREATE OR REPLACE FUNCTION submit_score(
+    p_username TEXT,
+    p_college TEXT,
+    p_wpm INTEGER,
+    p_accuracy FLOAT,
+    p_duration_seconds INTEGER DEFAULT 60,
+    p_raw_wpm INTEGER DEFAULT NULL
+)
+RETURNS SETOF leaderboard
+LANGUAGE sql VOLATILE
+AS $$
+    SELECT * FROM submit_scores(jsonb_build_array(jsonb_build_object(
+        'username', p_username, 'college', p_college, 'wpm', p_wpm, 'raw_wpm', p_raw_wpm,
+        'accuracy', p_accuracy, 'duration_seconds', p_duration_seconds
+    )));
+$$;
@@ -0,0 +1,155 @@
+# score_queue.py
+import os
+import queue
+import threading
+import time
+import atexit
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Write-behind is opt-in: it needs a long-lived process, so leave it off on
+# serverless deployments where background threads are frozen between requests
+SCORE_WRITE_BEHIND = os.environ.get("SCORE_WRITE_BEHIND", "0") == "1"
+SCORE_QUEUE_MAX_SIZE = int(os.environ.get("SCORE_QUEUE_MAX_SIZE", "5000"))
+SCORE_QUEUE_BATCH_SIZE = int(os.environ.get("SCORE_QUEUE_BATCH_SIZE", "200"))
+SCORE_QUEUE_FLUSH_INTERVAL = float(os.environ.get("SCORE_QUEUE_FLUSH_INTERVAL", "0.5"))
+SCORE_QUEUE_MAX_RETRIES = int(os.environ.get("SCORE_QUEUE_MAX_RETRIES", "3"))
+
+
+class ScoreWriteQueue:
+    """
+    Buffers submitted scores and writes them in bulk from a background thread.
+
+    Every score is kept, since each one is an attempt in the score history,
+    and flushed through `write_batch(scores)` once `batch_size` scores are
+    pending or `flush_interval` seconds have passed. `write_batch` follows the
+    storage convention of returning a dict with an "error" key on failure;
+    failed batches are retried on the next flush, up to `max_retries` times.
+    """
+
+    def __init__(self, write_batch, max_size=SCORE_QUEUE_MAX_SIZE, batch_size=SCORE_QUEUE_BATCH_SIZE,
+                 flush_interval=SCORE_QUEUE_FLUSH_INTERVAL, max_retries=SCORE_QUEUE_MAX_RETRIES):
+        self._write_batch = write_batch
+        self._queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._stopping = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        self.dropped_rows = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="score-write-behind", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, score):
+        """
+        Queue a score dict (username, college, wpm, accuracy, duration_seconds
+        and optionally raw_wpm).
+        Returns False without blocking when the queue is full.
+        """
+        try:
+            self._queue.put_nowait(score)
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            return False
+        with self._stats_lock:
+            self.enqueued += 1
+        return True
+
+    def stop(self, timeout=10):
+        """Stop the worker after it has flushed everything already queued"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_size": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "rejected": self.rejected,
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "failed_flushes": self.failed_flushes,
+                "dropped_rows": self.dropped_rows,
+                "last_flush_ms": self.last_flush_ms,
+                "max_flush_ms": self.max_flush_ms,
+            }
+
+    def _run(self):
+        pending = []  # scores waiting to be written
+        attempts = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            stopping = self._stopping.is_set()
+            if len(pending) < self.batch_size:
+                try:
+                    timeout = 0 if stopping else max(0.0, deadline - time.monotonic())
+                    pending.append(self._queue.get(timeout=timeout))
+                    # Take whatever else is already waiting without blocking
+                    while len(pending) < self.batch_size:
+                        pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+            elif not stopping:
+                # A full batch is waiting to be retried; leave new scores in
+                # the queue so producers see backpressure
+                self._stopping.wait(max(0.0, deadline - time.monotonic()))
+
+            now = time.monotonic()
+            full = len(pending) >= self.batch_size and attempts == 0
+            if pending and (now >= deadline or full or stopping):
+                if self._flush(pending):
+                    pending = []
+                    attempts = 0
+                else:
+                    attempts += 1
+                    if attempts >= self.max_retries or stopping:
+                        logger.error(f"Dropping {len(pending)} queued scores after {attempts} failed flushes")
+                        with self._stats_lock:
+                            self.dropped_rows += len(pending)
+                        pending = []
+                        attempts = 0
+                deadline = time.monotonic() + self.flush_interval
+            elif now >= deadline:
+                deadline = now + self.flush_interval
+
+            if stopping and not pending and self._queue.empty():
+                return
+
+    def _flush(self, pending):
+        start = time.perf_counter()
+        try:
+            response = self._write_batch(list(pending))
+            failed = isinstance(response, dict) and 'error' in response
+            if failed:
+                logger.error(f"Bulk score write failed: {response['error']}")
+        except Exception as e:
+            logger.error(f"Bulk score write raised: {str(e)}")
+            failed = True
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            if failed:
+                self.failed_flushes += 1
+            else:
+                self.flushes += 1
+                self.flushed_rows += len(pending)
+        return not failed
@@ -0,0 +1,480 @@
+# sqlite_client.py
+import os
+import json
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timezone
+from database import DATABASE_PATH, initialize_leaderboard
+from pagination import encode_cursor, decode_cursor
+from resilience import error_response
+from leaderboard_windows import current_windows, to_utc_text, from_utc_text
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.environ.get("SQLITE_PATH", DATABASE_PATH)
+
+# Statements are kept as constants so sqlite3's per-connection statement
+# cache reuses the compiled form instead of re-preparing them on every call
+# One attempt folded into the user's summary row: tests_taken and
+# avg_accuracy are running aggregates over every attempt, the other columns
+# are the best run and only change when the new WPM beats it. SET
+# expressions all read the row as it was before the update.
+SUBMIT_SCORE_SQL = '''
+    INSERT INTO leaderboard (username, college, wpm, accuracy, duration_seconds, tests_taken, avg_accuracy)
+    VALUES (?, UPPER(TRIM(COALESCE(?, 'Unknown'))), ?, ?, ?, 1, ?)
+    ON CONFLICT(username) DO UPDATE
+    SET tests_taken = leaderboard.tests_taken + 1,
+        avg_accuracy = leaderboard.avg_accuracy
+            + (excluded.avg_accuracy - leaderboard.avg_accuracy) / (leaderboard.tests_taken + 1),
+        college = CASE WHEN excluded.wpm > leaderboard.wpm THEN excluded.college ELSE leaderboard.college END,
+        accuracy = CASE WHEN excluded.wpm > leaderboard.wpm THEN excluded.accuracy ELSE leaderboard.accuracy END,
+        duration_seconds = CASE WHEN excluded.wpm > leaderboard.wpm
+                                THEN excluded.duration_seconds ELSE leaderboard.duration_seconds END,
+        created_at = CASE WHEN excluded.wpm > leaderboard.wpm THEN CURRENT_TIMESTAMP ELSE leaderboard.created_at END,
+        wpm = MAX(leaderboard.wpm, excluded.wpm)
+    RETURNING id, username, college, wpm, accuracy, duration_seconds, created_at, tests_taken, avg_accuracy
+'''
+
+INSERT_HISTORY_SQL = '''
+    INSERT INTO score_history (username, college, wpm, raw_wpm, accuracy, duration_seconds)
+    VALUES (?, UPPER(TRIM(COALESCE(?, 'Unknown'))), ?, ?, ?, ?)
+'''
+
+RANKINGS_COLUMNS = '''
+    SELECT username, college, CAST(wpm AS REAL) AS best_wpm, avg_accuracy, tests_taken
+    FROM leaderboard
+'''
+
+FIRST_PAGE_SQL = RANKINGS_COLUMNS + '''
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+# `wpm <= ?` is the index range condition; the OR only filters rows tied on WPM
+NEXT_PAGE_SQL = RANKINGS_COLUMNS + '''
+    WHERE wpm <= ? AND (wpm < ? OR username > ?)
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+COLLEGE_FIRST_PAGE_SQL = RANKINGS_COLUMNS + '''
+    WHERE college = UPPER(TRIM(?))
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+COLLEGE_NEXT_PAGE_SQL = RANKINGS_COLUMNS + '''
+    WHERE college = UPPER(TRIM(?)) AND wpm <= ? AND (wpm < ? OR username > ?)
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+CLEAR_SQL = 'DELETE FROM leaderboard'
+
+CLEAR_HISTORY_SQL = 'DELETE FROM score_history'
+
+DELETE_USER_SQL = 'DELETE FROM leaderboard WHERE username = ?'
+
+DELETE_USER_HISTORY_SQL = 'DELETE FROM score_history WHERE username = ?'
+
+# Day/week/event rollups, see leaderboard_windows.py
+SUBMIT_WINDOW_SCORE_SQL = '''
+    INSERT INTO leaderboard_windows (window_key, username, college, wpm, accuracy, duration_seconds, expires_at)
+    VALUES (?, ?, UPPER(TRIM(COALESCE(?, 'Unknown'))), ?, ?, ?, ?)
+    ON CONFLICT(window_key, username) DO UPDATE
+    SET college = excluded.college,
+        wpm = excluded.wpm,
+        accuracy = excluded.accuracy,
+        duration_seconds = excluded.duration_seconds,
+        created_at = CURRENT_TIMESTAMP
+    WHERE excluded.wpm > leaderboard_windows.wpm
+'''
+
+ACTIVE_EVENTS_SQL = 'SELECT name, starts_at, ends_at FROM leaderboard_events WHERE starts_at <= ? AND ends_at > ?'
+
+PRUNE_WINDOWS_SQL = 'DELETE FROM leaderboard_windows WHERE expires_at <= ?'
+
+SAVE_EVENT_SQL = '''
+    INSERT INTO leaderboard_events (name, starts_at, ends_at) VALUES (?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET starts_at = excluded.starts_at, ends_at = excluded.ends_at
+'''
+
+WINDOW_RANKINGS_COLUMNS = '''
+    SELECT username, college, CAST(wpm AS REAL) AS best_wpm, accuracy AS avg_accuracy, 1 AS tests_taken
+    FROM leaderboard_windows
+    WHERE window_key = ? AND expires_at > ?
+'''
+
+WINDOW_FIRST_PAGE_SQL = WINDOW_RANKINGS_COLUMNS + '''
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+WINDOW_NEXT_PAGE_SQL = WINDOW_RANKINGS_COLUMNS + '''
+      AND wpm <= ? AND (wpm < ? OR username > ?)
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+WINDOW_COLLEGE_FIRST_PAGE_SQL = WINDOW_RANKINGS_COLUMNS + '''
+      AND college = UPPER(TRIM(?))
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+WINDOW_COLLEGE_NEXT_PAGE_SQL = WINDOW_RANKINGS_COLUMNS + '''
+      AND college = UPPER(TRIM(?)) AND wpm <= ? AND (wpm < ? OR username > ?)
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+CLEAR_WINDOWS_SQL = 'DELETE FROM leaderboard_windows'
+
+DELETE_USER_WINDOWS_SQL = 'DELETE FROM leaderboard_windows WHERE username = ?'
+
+INSERT_KEYSTROKE_LOG_SQL = '''
+    INSERT INTO keystroke_logs (username, college, wpm, raw_wpm, accuracy, duration_ms, flags, log)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    RETURNING id
+'''
+
+KEYSTROKE_LOGS_PAGE_SQL = 'SELECT * FROM keystroke_logs WHERE id > ? ORDER BY id LIMIT ?'
+
+# A user's standing. Ranks are counts of the rows ordered before the user,
+# answered from the rank indexes without reading any page of the board;
+# usernames in the JSON array parameter (lower case) are left out.
+USER_RANKING_SQL = RANKINGS_COLUMNS + ' WHERE username = ?'
+
+RANKED_BEFORE = '''
+    wpm >= ? AND (wpm > ? OR username < ?)
+    AND LOWER(username) NOT IN (SELECT value FROM json_each(?))
+'''
+
+RANKED_AFTER = '''
+    wpm <= ? AND (wpm < ? OR username > ?)
+    AND LOWER(username) NOT IN (SELECT value FROM json_each(?))
+'''
+
+COUNT_BEFORE_SQL = 'SELECT COUNT(*) FROM leaderboard WHERE' + RANKED_BEFORE
+
+COLLEGE_COUNT_BEFORE_SQL = 'SELECT COUNT(*) FROM leaderboard WHERE college = ? AND' + RANKED_BEFORE
+
+NEIGHBOURS_BEFORE_SQL = RANKINGS_COLUMNS + ' WHERE' + RANKED_BEFORE + '''
+    ORDER BY wpm ASC, username DESC
+    LIMIT ?
+'''
+
+NEIGHBOURS_AFTER_SQL = RANKINGS_COLUMNS + ' WHERE' + RANKED_AFTER + '''
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+COLLEGE_NEIGHBOURS_BEFORE_SQL = RANKINGS_COLUMNS + ' WHERE college = ? AND' + RANKED_BEFORE + '''
+    ORDER BY wpm ASC, username DESC
+    LIMIT ?
+'''
+
+COLLEGE_NEIGHBOURS_AFTER_SQL = RANKINGS_COLUMNS + ' WHERE college = ? AND' + RANKED_AFTER + '''
+    ORDER BY wpm DESC, username ASC
+    LIMIT ?
+'''
+
+_local = threading.local()
+_initialized_paths = set()
+_initialize_lock = threading.Lock()
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Get this thread's SQLite connection, opening it on first use.
+    Connections are reused for the life of the thread.
+    """
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = sqlite3.connect(SQLITE_PATH, timeout=5, cached_statements=64)
+        connection.row_factory = sqlite3.Row
+        # WAL lets readers run alongside the single writer
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # Schema, migrations and backfill once per database per process
+        with _initialize_lock:
+            if SQLITE_PATH not in _initialized_paths:
+                initialize_leaderboard(connection)
+                _initialized_paths.add(SQLITE_PATH)
+        _local.connection = connection
+        logger.info(f"Opened SQLite connection to {SQLITE_PATH}")
+    return connection
+
+def record_window_scores(connection, scores):
+    """
+    Fold (username, college, wpm, accuracy, duration_seconds) tuples into the
+    current day/week/event rollups and prune expired windows. Runs inside the
+    caller's transaction.
+    """
+    now = datetime.now(timezone.utc)
+    stamp = to_utc_text(now)
+    events = [
+        (row["name"], from_utc_text(row["starts_at"]), from_utc_text(row["ends_at"]))
+        for row in connection.execute(ACTIVE_EVENTS_SQL, (stamp, stamp))
+    ]
+    windows = current_windows(now, events)
+    connection.execute(PRUNE_WINDOWS_SQL, (stamp,))
+    connection.executemany(
+        SUBMIT_WINDOW_SCORE_SQL,
+        [
+            (key, username, college, int(wpm), float(accuracy), int(duration_seconds), to_utc_text(expires_at))
+            for username, college, wpm, accuracy, duration_seconds in scores
+            for key, expires_at in windows
+        ]
+    )
+
+def _submit_scores(connection, scores):
+    """
+    Append `scores` (username, college, wpm, raw_wpm, accuracy,
+    duration_seconds tuples) to the history and fold each into its summary
+    row, inside the caller's transaction. Returns the updated summary rows.
+    """
+    connection.executemany(INSERT_HISTORY_SQL, [
+        (username, college, int(wpm), int(raw_wpm) if raw_wpm is not None else None, float(accuracy), int(duration_seconds))
+        for username, college, wpm, raw_wpm, accuracy, duration_seconds in scores
+    ])
+    summaries = {}
+    for username, college, wpm, raw_wpm, accuracy, duration_seconds in scores:
+        for row in connection.execute(
+            SUBMIT_SCORE_SQL,
+            (username, college, int(wpm), float(accuracy), int(duration_seconds), float(accuracy))
+        ):
+            summaries[row["username"]] = dict(row)
+    record_window_scores(connection, [
+        (username, college, wpm, accuracy, duration_seconds)
+        for username, college, wpm, raw_wpm, accuracy, duration_seconds in scores
+    ])
+    return list(summaries.values())
+
+def insert_score(username: str, college: str, wpm: int, accuracy: float, duration_seconds: int, raw_wpm: int = None):
+    """
+    Record one attempt: append it to score_history and update the user's
+    summary row, whose best-run columns only change when `wpm` beats the
+    personal best. Returns {"data": [summary row]}
+    """
+    try:
+        logger.debug("Attempting to insert score for user: %s", username)
+        connection = get_connection()
+        with connection:
+            rows = _submit_scores(connection, [(username, college, wpm, raw_wpm, accuracy, duration_seconds)])
+        return {"data": rows}
+    except Exception as e:
+        logger.error(f"Error inserting score: {str(e)}")
+        return error_response(e)
+
+def insert_scores(scores: list):
+    """
+    Record many attempts in one transaction, as insert_score does
+    """
+    try:
+        logger.info(f"Attempting to insert {len(scores)} scores")
+        connection = get_connection()
+        rows = [
+            (score["username"], score["college"], score["wpm"], score.get("raw_wpm"), score["accuracy"],
+             score.get("duration_seconds", 60))
+            for score in scores
+        ]
+        with connection:
+            changed = _submit_scores(connection, rows)
+        return {"data": changed}
+    except Exception as e:
+        logger.error(f"Error inserting scores: {str(e)}")
+        return error_response(e)
+
+def get_leaderboard(limit: int = 10, cursor: str = None, college: str = None, window: str = None):
+    """
+    Get one page of rankings ordered by (best_wpm DESC, username), optionally
+    for a single college and/or a window key from leaderboard_windows.
+    Returns {"data": rankings, "next_cursor": str or None}
+    """
+    try:
+        connection = get_connection()
+        if window:
+            rows = _window_page(connection, window, limit, cursor, college)
+        elif cursor:
+            after_wpm, after_username = decode_cursor(cursor)
+            if college:
+                rows = connection.execute(
+                    COLLEGE_NEXT_PAGE_SQL,
+                    (college, after_wpm, after_wpm, after_username, int(limit))
+                ).fetchall()
+            else:
+                rows = connection.execute(NEXT_PAGE_SQL, (after_wpm, after_wpm, after_username, int(limit))).fetchall()
+        elif college:
+            rows = connection.execute(COLLEGE_FIRST_PAGE_SQL, (college, int(limit))).fetchall()
+        else:
+            rows = connection.execute(FIRST_PAGE_SQL, (int(limit),)).fetchall()
+
+        rankings = [dict(row) for row in rows]
+        next_cursor = encode_cursor(rankings[-1]) if rankings and len(rankings) == limit else None
+        return {"data": rankings, "next_cursor": next_cursor}
+    except Exception as e:
+        logger.error(f"Error fetching leaderboard: {str(e)}")
+        return error_response(e)
+
+def _window_page(connection, window, limit, cursor, college):
+    scope = (window, to_utc_text(datetime.now(timezone.utc)))
+    if cursor:
+        after_wpm, after_username = decode_cursor(cursor)
+        if college:
+            return connection.execute(
+                WINDOW_COLLEGE_NEXT_PAGE_SQL,
+                scope + (college, after_wpm, after_wpm, after_username, int(limit))
+            ).fetchall()
+        return connection.execute(WINDOW_NEXT_PAGE_SQL, scope + (after_wpm, after_wpm, after_username, int(limit))).fetchall()
+    if college:
+        return connection.execute(WINDOW_COLLEGE_FIRST_PAGE_SQL, scope + (college, int(limit))).fetchall()
+    return connection.execute(WINDOW_FIRST_PAGE_SQL, scope + (int(limit),)).fetchall()
+
+def save_event(name: str, starts_at: datetime, ends_at: datetime):
+    """Create or reschedule an event; scores made while it runs go to its board"""
+    try:
+        logger.info(f"Saving leaderboard event {name}")
+        connection = get_connection()
+        with connection:
+            connection.execute(SAVE_EVENT_SQL, (name, to_utc_text(starts_at), to_utc_text(ends_at)))
+        return {"data": [{"name": name, "starts_at": starts_at.isoformat(), "ends_at": ends_at.isoformat()}]}
+    except Exception as e:
+        logger.error(f"Error saving event: {str(e)}")
+        return error_response(e)
+
+def clear_leaderboard():
+    """
+    Remove all records from the leaderboard, score history and window tables
+    """
+    try:
+        logger.info("Attempting to clear all leaderboard data")
+        connection = get_connection()
+        with connection:
+            deleted = connection.execute(CLEAR_SQL).rowcount
+            connection.execute(CLEAR_HISTORY_SQL)
+            connection.execute(CLEAR_WINDOWS_SQL)
+        return {"data": [], "count": deleted}
+    except Exception as e:
+        logger.error(f"Error clearing leaderboard: {str(e)}")
+        return error_response(e)
+
+def delete_user_from_leaderboard(username: str):
+    """
+    Remove all entries for a specific user from the leaderboard
+    """
+    try:
+        logger.info(f"Attempting to delete user {username} from leaderboard")
+        connection = get_connection()
+        with connection:
+            deleted = connection.execute(DELETE_USER_SQL, (username,)).rowcount
+            connection.execute(DELETE_USER_HISTORY_SQL, (username,))
+            connection.execute(DELETE_USER_WINDOWS_SQL, (username,))
+        return {"data": [], "count": deleted}
+    except Exception as e:
+        logger.error(f"Error deleting user from leaderboard: {str(e)}")
+        return error_response(e)
+
+def delete_users_from_leaderboard(usernames: list):
+    """
+    Remove every entry for the given usernames in one statement
+    """
+    try:
+        logger.info(f"Attempting to delete {len(usernames)} users from leaderboard")
+        usernames = list(usernames)
+        if not usernames:
+            return {"data": [], "count": 0}
+        placeholders = ", ".join("?" * len(usernames))
+        connection = get_connection()
+        with connection:
+            deleted = connection.execute(
+                f"DELETE FROM leaderboard WHERE username IN ({placeholders})",
+                usernames
+            ).rowcount
+            connection.execute(f"DELETE FROM score_history WHERE username IN ({placeholders})", usernames)
+            connection.execute(f"DELETE FROM leaderboard_windows WHERE username IN ({placeholders})", usernames)
+        return {"data": [], "count": deleted}
+    except Exception as e:
+        logger.error(f"Error deleting users from leaderboard: {str(e)}")
+        return error_response(e)
+
+def insert_keystroke_log(entry: dict):
+    """
+    Store a keystroke log with its verified results. `entry` has username,
+    college, wpm, raw_wpm, accuracy, duration_ms, flags (list) and log (dict).
+    """
+    try:
+        connection = get_connection()
+        with connection:
+            rows = connection.execute(
+                INSERT_KEYSTROKE_LOG_SQL,
+                (
+                    entry["username"],
+                    entry.get("college"),
+                    int(entry["wpm"]),
+                    int(entry["raw_wpm"]),
+                    float(entry["accuracy"]),
+                    int(entry["duration_ms"]),
+                    json.dumps(entry.get("flags", [])),
+                    json.dumps(entry["log"], separators=(",", ":"))
+                )
+            ).fetchall()
+        return {"data": [dict(row) for row in rows]}
+    except Exception as e:
+        logger.error(f"Error storing keystroke log: {str(e)}")
+        return error_response(e)
+
+def get_keystroke_logs(limit: int = 500, after_id: int = None):
+    """Stored keystroke logs in id order, starting after `after_id`"""
+    try:
+        connection = get_connection()
+        rows = connection.execute(KEYSTROKE_LOGS_PAGE_SQL, (int(after_id or 0), int(limit))).fetchall()
+        logs = []
+        for row in rows:
+            entry = dict(row)
+            entry["flags"] = json.loads(entry["flags"])
+            entry["log"] = json.loads(entry["log"])
+            logs.append(entry)
+        return {"data": logs}
+    except Exception as e:
+        logger.error(f"Error fetching keystroke logs: {str(e)}")
+        return error_response(e)
+
+def get_user_rank(username: str, neighbours: int = 5, exclude: list = (), college_board: bool = False):
+    """
+    Global and college rank of `username` plus up to `neighbours` rows either
+    side of it, on the global board or (with `college_board`) the user's
+    college board. Usernames in `exclude` (lower case) take no rank.
+    Returns {"data": {"entry", "global_rank", "college_rank", "above",
+    "below"}}, with "data" None when the user has no score.
+    """
+    try:
+        connection = get_connection()
+        row = connection.execute(USER_RANKING_SQL, (username,)).fetchone()
+        if row is None or username.lower() in exclude:
+            return {"data": None}
+        entry = dict(row)
+        position = (entry["best_wpm"], entry["best_wpm"], username, json.dumps(list(exclude)))
+        global_rank = connection.execute(COUNT_BEFORE_SQL, position).fetchone()[0] + 1
+        college_rank = connection.execute(COLLEGE_COUNT_BEFORE_SQL, (entry["college"],) + position).fetchone()[0] + 1
+
+        if college_board:
+            scope, rank = (entry["college"],), college_rank
+            before_sql, after_sql = COLLEGE_NEIGHBOURS_BEFORE_SQL, COLLEGE_NEIGHBOURS_AFTER_SQL
+        else:
+            scope, rank = (), global_rank
+            before_sql, after_sql = NEIGHBOURS_BEFORE_SQL, NEIGHBOURS_AFTER_SQL
+        before = connection.execute(before_sql, scope + position + (int(neighbours),)).fetchall()
+        after = connection.execute(after_sql, scope + position + (int(neighbours),)).fetchall()
+        above = [dict(row, rank=rank - offset - 1) for offset, row in enumerate(before)][::-1]
+        below = [dict(row, rank=rank + offset + 1) for offset, row in enumerate(after)]
+        return {"data": {
+            "entry": entry,
+            "global_rank": global_rank,
+            "college_rank": college_rank,
+            "above": above,
+            "below": below,
+        }}
+    except Exception as e:
+        logger.error(f"Error fetching rank for {username}: {str(e)}")
+        return error_response(e)
@@ -0,0 +1,149 @@
+# startup.py
+"""
+Cold-start bookkeeping.
+
+With LAZY_INIT=1 (the default on Vercel, where every cold start is paid by a
+user request) the profanity filter, the Supabase SDK and keystroke
+verification are built on first use instead of while app.py is imported;
+otherwise app.py warms them up at startup. Either way the cost of each step
+is recorded with phase() and exposed as app_startup_seconds on /metrics and
+in the startup log line.
+
+    python startup.py               # import and init cost per module of app.py
+    python startup.py --top 40
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import subprocess
+from contextlib import contextmanager
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+LAZY_INIT = os.environ.get("LAZY_INIT", "1" if os.environ.get("VERCEL") else "0") == "1"
+
+# Close enough to interpreter start for app.py, which imports this first
+_process_started = time.perf_counter()
+_last_mark = _process_started
+_phases = {}
+
+
+@contextmanager
+def phase(name):
+    """Record how long the block takes under `name` (first run only)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.setdefault(name, time.perf_counter() - started)
+
+
+def mark_phase(name):
+    """Record the time since the previous mark (or since this module was imported) under `name`"""
+    global _last_mark
+    now = time.perf_counter()
+    _phases.setdefault(name, now - _last_mark)
+    _last_mark = now
+
+
+@lru_cache(maxsize=1)
+def load_env():
+    """Load .env once per process, for every module that reads settings from it"""
+    from dotenv import load_dotenv
+    with phase("load_dotenv"):
+        load_dotenv()
+
+
+def mark_ready():
+    """Record the time from importing this module to the app being ready and log the breakdown"""
+    _phases.setdefault("ready", time.perf_counter() - _process_started)
+    summary = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in _phases.items())
+    logger.info(f"Startup ({'lazy' if LAZY_INIT else 'eager'} init): {summary}")
+
+
+def report():
+    return {
+        "lazy_init": LAZY_INIT,
+        "phases": {name: round(seconds, 6) for name, seconds in _phases.items()},
+    }
+
+
+def collect_metrics():
+    """metrics.register_collector() source for the recorded phases"""
+    return [(
+        "app_startup_seconds",
+        "Time spent in each startup or first-use initialization step",
+        "gauge",
+        [({"phase": name}, seconds) for name, seconds in _phases.items()],
+    )]
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output into (module, self_us, cumulative_us,
+    depth) tuples, in import order.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # One space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def import_report(target="app"):
+    """
+    Import `target` in a fresh interpreter and return the import cost per
+    top-level package plus the init phases it recorded.
+    """
+    code = f"import json, startup, {target}; print(json.dumps(startup.report()))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    packages = {}
+    for name, self_us, _, _ in parse_importtime(result.stderr):
+        package = name.split(".")[0]
+        total = packages.setdefault(package, {"self_ms": 0.0, "modules": 0})
+        total["self_ms"] += self_us / 1000
+        total["modules"] += 1
+    init = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"packages": packages, **init}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down the cold-start cost of the app")
+    parser.add_argument("--target", default="app", help="module to import (default: app)")
+    parser.add_argument("--top", type=int, default=25, help="number of packages to list")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    report_data = import_report(args.target)
+    if args.json:
+        print(json.dumps(report_data, indent=2))
+        return
+
+    packages = sorted(report_data["packages"].items(), key=lambda item: item[1]["self_ms"], reverse=True)
+    total_ms = sum(total["self_ms"] for _, total in packages)
+    print(f"Importing {args.target}: {total_ms:.1f}ms across {len(packages)} packages "
+          f"({'lazy' if report_data['lazy_init'] else 'eager'} init)")
+    print(f"{'package':<28}{'modules':>9}{'import ms':>12}")
+    for package, total in packages[:args.top]:
+        print(f"{package:<28}{total['modules']:>9}{total['self_ms']:>12.1f}")
+    print(f"\n{'init phase':<37}{'ms':>12}")
+    for name, seconds in report_data["phases"].items():
+        print(f"{name:<37}{seconds * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
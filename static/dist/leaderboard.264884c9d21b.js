@@ -0,0 +1,114 @@
+document.addEventListener('DOMContentLoaded', () => {
+const leaderboardTable = document.querySelector('#leaderboard-table tbody');
+if (!leaderboardTable) {
+return;
+}
+const emptyRow = leaderboardTable.querySelector('.empty-row');
+emptyRow.remove();
+emptyRow.hidden = false;
+if (!leaderboardTable.rows.length) {
+leaderboardTable.appendChild(emptyRow);
+}
+const REFRESH_INTERVAL_MS = 15000;
+const STREAMING_REFRESH_INTERVAL_MS = 60000;
+const BOARD_SIZE = 50;
+const params = new URLSearchParams(window.location.search);
+const college = params.get('college') || 'all';
+const period = params.get('window') || 'all';
+let lastETag = null;
+function createCell(className, text) {
+const cell = document.createElement('td');
+if (className) {
+cell.className = className;
+}
+cell.textContent = text;
+return cell;
+}
+function createRow(entry, index) {
+const rank = index + 1;
+const wpm = Math.round(entry.best_wpm);
+const row = document.createElement('tr');
+row.dataset.username = entry.username;
+row.appendChild(createCell(`rank rank-${rank <= 3 ? rank : ''}`, rank));
+row.appendChild(createCell('name', entry.username));
+row.appendChild(createCell('college', entry.college));
+row.appendChild(createCell('wpm', wpm));
+row.appendChild(createCell('accuracy', `${entry.avg_accuracy.toFixed(1)}%`));
+row.appendChild(createCell('tests', entry.tests_taken));
+const button = document.createElement('button');
+button.className = 'share-button';
+button.textContent = 'Share 🚀';
+button.addEventListener('click', () => shareResult(button, entry.username, entry.college, wpm, entry.avg_accuracy));
+const shareCell = document.createElement('td');
+shareCell.appendChild(button);
+row.appendChild(shareCell);
+return row;
+}
+function refreshLeaderboard() {
+fetch(`/api/leaderboard?college=${encodeURIComponent(college)}&window=${encodeURIComponent(period)}&limit=50`, { cache: 'no-cache' })
+.then(response => {
+if (!response.ok) {
+throw new Error(`Leaderboard request failed: ${response.status}`);
+}
+const etag = response.headers.get('ETag');
+if (etag && etag === lastETag) {
+return null;  // Revalidated copy of what is already shown
+}
+lastETag = etag;
+return response.json();
+})
+.then(data => {
+if (!data) {
+return;
+}
+const rows = data.rankings.map(createRow);
+leaderboardTable.replaceChildren(...(rows.length ? rows : [emptyRow]));
+leaderboardTable.style.display = 'table-row-group';
+})
+.catch(error => console.error('Error:', error));
+}
+function renumberRows() {
+Array.from(leaderboardTable.rows).forEach((row, index) => {
+const rank = index + 1;
+row.cells[0].className = `rank rank-${rank <= 3 ? rank : ''}`;
+row.cells[0].textContent = rank;
+});
+}
+function applyRankChange(entry) {
+const rank = college === 'all' ? entry.rank : entry.college_rank;
+if (!rank) {
+refreshLeaderboard();  // this worker has no ranks yet
+return;
+}
+emptyRow.remove();
+const existing = Array.from(leaderboardTable.rows).find(row => row.dataset.username === entry.username);
+if (existing) {
+existing.remove();
+}
+if (rank <= BOARD_SIZE && rank - 1 <= leaderboardTable.rows.length) {
+leaderboardTable.insertBefore(createRow(entry, rank - 1), leaderboardTable.rows[rank - 1] || null);
+}
+while (leaderboardTable.rows.length > BOARD_SIZE) {
+leaderboardTable.deleteRow(-1);
+}
+if (!leaderboardTable.rows.length) {
+leaderboardTable.appendChild(emptyRow);
+} else {
+renumberRows();
+}
+lastETag = null;
+}
+let pollTimer = setInterval(refreshLeaderboard, REFRESH_INTERVAL_MS);
+function setPollInterval(ms) {
+clearInterval(pollTimer);
+pollTimer = setInterval(refreshLeaderboard, ms);
+}
+if (period === 'all' && window.EventSource) {
+const stream = new EventSource(`/api/leaderboard/stream?college=${encodeURIComponent(college)}`);
+stream.addEventListener('open', () => setPollInterval(STREAMING_REFRESH_INTERVAL_MS));
+stream.addEventListener('error', () => setPollInterval(REFRESH_INTERVAL_MS));
+stream.addEventListener('rank', event => applyRankChange(JSON.parse(event.data)));
+stream.addEventListener('remove', refreshLeaderboard);
+stream.addEventListener('reset', refreshLeaderboard);
+}
+});
@@ -0,0 +1,16 @@
+function scoreWord(typed, target) {
+const shared = Math.min(typed.length, target.length);
+let matches = 0;
+for (let i = 0; i < shared; i++) {
+if (typed[i] === target[i]) {
+matches++;
+}
+}
+return {
+correct: matches + 1,
+incorrect: (shared - matches) + Math.abs(typed.length - target.length)
+};
+}
+if (typeof module !== 'undefined') {
+module.exports = { scoreWord };
+}
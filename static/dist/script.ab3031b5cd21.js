@@ -0,0 +1,375 @@
+const commonWords = [
+'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'I',
+'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at',
+'this', 'but', 'his', 'by', 'from', 'they', 'we', 'say', 'her', 'she',
+'or', 'an', 'will', 'my', 'one', 'all', 'would', 'there', 'their', 'what',
+'so', 'up', 'out', 'if', 'about', 'who', 'get', 'which', 'go', 'me',
+'when', 'make', 'can', 'like', 'time', 'no', 'just', 'him', 'know', 'take',
+'people', 'into', 'year', 'your', 'good', 'some', 'could', 'them', 'see', 'other',
+'than', 'then', 'now', 'look', 'only', 'come', 'its', 'over', 'think', 'also',
+'back', 'after', 'use', 'two', 'how', 'our', 'work', 'first', 'well', 'way',
+'even', 'new', 'want', 'because', 'any', 'these', 'give', 'day', 'most', 'us'
+];
+const punctuationMarks = ['.', ',', '!', '?', ';', ':', '"', "'", '(', ')', '-', '—'];
+const numbers = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9'];
+const config = {
+mode: 'words',
+wordCount: 25
+};
+function newKeyLog() {
+return { keys: [], deltas: [], lastTime: null, value: '' };
+}
+let state = {
+words: [],
+currentWordIndex: 0,
+currentLetterIndex: 0,
+input: '',
+started: false,
+finished: false,
+startTime: null,
+correctChars: 0,
+incorrectChars: 0,
+timerInterval: null,
+focused: true,
+wordsTyped: 0,
+keyLog: newKeyLog()
+};
+const wordsDiv = document.getElementById('words');
+const typingInput = document.getElementById('typing-input');
+const wpmSpan = document.getElementById('wpm');
+const accuracySpan = document.getElementById('accuracy');
+const timerSpan = document.getElementById('timer');
+const resultsDiv = document.getElementById('results');
+const liveStats = document.getElementById('live-stats');
+const focusWarning = document.querySelector('.focus-warning');
+function init() {
+generateWords();
+renderWords();
+setupEventListeners();
+typingInput.focus();
+}
+function generateWords() {
+state.words = [];
+for (let i = 0; i < config.wordCount; i++) {
+const word = commonWords[Math.floor(Math.random() * commonWords.length)];
+state.words.push({
+text: word,
+letters: []
+});
+}
+}
+function renderWords() {
+wordsDiv.innerHTML = '';
+state.words.forEach((word, wordIndex) => {
+const wordSpan = document.createElement('span');
+wordSpan.className = 'word';
+wordSpan.setAttribute('data-index', wordIndex);
+word.text.split('').forEach((letter, letterIndex) => {
+const letterSpan = document.createElement('span');
+letterSpan.className = 'letter';
+letterSpan.textContent = letter;
+letterSpan.setAttribute('data-letter-index', letterIndex);
+wordSpan.appendChild(letterSpan);
+});
+wordsDiv.appendChild(wordSpan);
+});
+updateCaret();
+}
+function updateCaret() {
+document.querySelectorAll('.word').forEach(w => w.classList.remove('active'));
+document.querySelectorAll('.letter').forEach(l => l.classList.remove('current'));
+const currentWord = document.querySelector(`.word[data-index="${state.currentWordIndex}"]`);
+if (currentWord) {
+currentWord.classList.add('active');
+const currentLetter = currentWord.querySelector(`.letter[data-letter-index="${state.currentLetterIndex}"]`);
+if (currentLetter) {
+currentLetter.classList.add('current');
+}
+}
+}
+function setupEventListeners() {
+typingInput.addEventListener('input', handleInput);
+document.addEventListener('keydown', (e) => {
+if (e.key === 'Tab') {
+e.preventDefault();
+resetTest();
+} else if (e.key === 'Enter') {
+e.preventDefault();
+if (!state.started) {
+resetTest();
+} else if (state.started && !state.finished) {
+if (state.wordsTyped >= config.wordCount) {
+endTest();
+} // else do nothing
+}
+} else if (e.key === 'Escape') {
+e.preventDefault();
+typingInput.blur();
+}
+});
+typingInput.addEventListener('blur', () => {
+state.focused = false;
+document.body.classList.add('focus-lost');
+focusWarning.classList.add('show');
+});
+typingInput.addEventListener('focus', () => {
+state.focused = true;
+document.body.classList.remove('focus-lost');
+focusWarning.classList.remove('show');
+});
+document.addEventListener('click', () => {
+if (!state.focused && !state.finished) {
+typingInput.focus();
+}
+});
+}
+function handleInput(e) {
+if (state.finished) return;
+if (!state.started) {
+startTest();
+}
+const input = e.target.value;
+const currentWord = state.words[state.currentWordIndex];
+recordKeystrokes(input);
+if (state.currentWordIndex === config.wordCount - 1 &&
+input === currentWord.text) {
+checkWord(input, currentWord);
+state.wordsTyped++;
+endTest();
+return;
+}
+if (input.endsWith(' ')) {
+const typedWord = input.trim();
+checkWord(typedWord, currentWord);
+state.currentWordIndex++;
+state.currentLetterIndex = 0;
+typingInput.value = '';
+state.input = '';
+state.wordsTyped++;
+if (state.wordsTyped >= config.wordCount) {
+endTest();
+return;
+}
+} else {
+state.input = input;
+state.currentLetterIndex = input.length;
+checkCurrentWord(input, currentWord);
+}
+updateCaret();
+updateStats();
+timerSpan.textContent = `${config.wordCount - state.wordsTyped} words left`;
+}
+function recordKeystrokes(input) {
+const log = state.keyLog;
+const previous = log.value;
+const now = Date.now();
+let common = 0;
+while (common < previous.length && common < input.length && previous[common] === input[common]) {
+common++;
+}
+const codes = [];
+for (let i = common; i < previous.length; i++) {
+codes.push(8);
+}
+for (let i = common; i < input.length; i++) {
+codes.push(input.charCodeAt(i));
+}
+codes.forEach((code, i) => {
+log.keys.push(code);
+log.deltas.push(i === 0 && log.lastTime !== null ? now - log.lastTime : 0);
+});
+log.lastTime = now;
+log.value = input.endsWith(' ') ? '' : input;
+}
+function checkWord(typedWord, wordObj) {
+const wordSpan = document.querySelector(`.word[data-index="${state.currentWordIndex}"]`);
+wordSpan.querySelectorAll('.letter.extra').forEach(extra => extra.remove());
+wordSpan.querySelectorAll('.letter').forEach((letter, i) => {
+if (i < typedWord.length) {
+const correct = typedWord[i] === wordObj.text[i];
+letter.classList.toggle('correct', correct);
+letter.classList.toggle('incorrect', !correct);
+}
+});
+typedWord.slice(wordObj.text.length).split('').forEach(char => {
+const extraSpan = document.createElement('span');
+extraSpan.className = 'letter extra';
+extraSpan.textContent = char;
+wordSpan.appendChild(extraSpan);
+});
+const score = scoreWord(typedWord, wordObj.text);
+state.correctChars += score.correct;
+state.incorrectChars += score.incorrect;
+if (score.incorrect > 0) {
+wordSpan.classList.add('error');
+}
+}
+function checkCurrentWord(input, wordObj) {
+const wordSpan = document.querySelector(`.word[data-index="${state.currentWordIndex}"]`);
+const letters = wordSpan.querySelectorAll('.letter:not(.extra)');
+letters.forEach((letter, i) => {
+letter.classList.remove('correct', 'incorrect');
+});
+const extras = wordSpan.querySelectorAll('.letter.extra');
+extras.forEach(e => e.remove());
+for (let i = 0; i < input.length; i++) {
+if (i < wordObj.text.length) {
+if (input[i] === wordObj.text[i]) {
+letters[i].classList.add('correct');
+} else {
+letters[i].classList.add('incorrect');
+}
+} else {
+const extraSpan = document.createElement('span');
+extraSpan.className = 'letter extra';
+extraSpan.textContent = input[i];
+wordSpan.appendChild(extraSpan);
+}
+}
+}
+function startTest() {
+state.started = true;
+state.startTime = Date.now();
+timerSpan.textContent = `${config.wordCount} words left`;
+}
+function updateStats() {
+const timeElapsed = (Date.now() - state.startTime) / 1000 / 60;
+const wpm = Math.round((state.correctChars / 5) / timeElapsed) || 0;
+const totalChars = state.correctChars + state.incorrectChars;
+const accuracy = totalChars > 0 ? Math.round((state.correctChars / totalChars) * 100) : 100;
+wpmSpan.textContent = wpm;
+accuracySpan.textContent = accuracy + '%';
+}
+function endTest() {
+if (!state.finished) {  // Prevent multiple submissions
+state.finished = true;
+const timeElapsed = (Date.now() - state.startTime) / 1000 / 60;
+const wpm = Math.round((state.correctChars / 5) / timeElapsed) || 0;
+const totalChars = state.correctChars + state.incorrectChars;
+const accuracy = totalChars > 0 ? Math.round((state.correctChars / totalChars) * 100) : 100;
+const rawWpm = Math.round(totalChars / 5 / timeElapsed) || 0;
+document.getElementById('final-wpm').textContent = wpm;
+document.getElementById('final-accuracy').textContent = accuracy + '%';
+document.getElementById('final-raw').textContent = rawWpm;
+document.getElementById('final-chars').textContent = `${state.correctChars}/${state.incorrectChars}`;
+wordsDiv.style.display = 'none';
+liveStats.style.display = 'none';
+resultsDiv.classList.add('show');
+console.log('Submitting test results:', { wpm, accuracy, rawWpm });
+fetch('/submit_result', {
+method: 'POST',
+headers: {
+'Content-Type': 'application/json',
+},
+body: JSON.stringify({
+wpm: wpm,
+accuracy: accuracy,
+raw_wpm: rawWpm,
+duration_seconds: 60,  // Fixed duration for 25-word test
+keystrokes: {
+v: 1,
+words: state.words.map(word => word.text),
+keys: state.keyLog.keys,
+deltas: state.keyLog.deltas
+}
+})
+})
+.then(response => {
+console.log('Server response status:', response.status);
+return response.json();
+})
+.then(data => {
+console.log('Server response:', data);
+if (data.success) {
+document.getElementById('view-leaderboard').style.display = 'inline-block';
+document.getElementById('share-btn').style.display = 'inline-block';
+} else {
+console.error('Server reported error:', data.error);
+alert('Error saving your score: ' + data.error);
+}
+})
+.catch(error => {
+console.error('Error submitting results:', error);
+alert('Error saving your score. Please try again.');
+});
+}
+}
+function resetTest() {
+state = {
+words: [],
+currentWordIndex: 0,
+currentLetterIndex: 0,
+input: '',
+started: false,
+finished: false,
+startTime: null,
+correctChars: 0,
+incorrectChars: 0,
+focused: true,
+wordsTyped: 0,
+keyLog: newKeyLog()
+};
+typingInput.value = '';
+wpmSpan.textContent = '0';
+accuracySpan.textContent = '100%';
+timerSpan.textContent = `${config.wordCount} words left`;
+wordsDiv.style.display = 'block';
+liveStats.style.display = 'flex';
+resultsDiv.classList.remove('show');
+document.getElementById('view-leaderboard').style.display = 'none';
+document.getElementById('share-btn').style.display = 'none';
+generateWords();
+renderWords();
+typingInput.focus();
+}
+function setDuration(duration) {
+config.mode = 'time';
+config.duration = duration;
+state.timeRemaining = duration;
+timerSpan.textContent = duration;
+document.querySelectorAll('.config-btn').forEach(btn => {
+btn.classList.remove('active');
+});
+event.target.classList.add('active');
+resetTest();
+}
+function setWordCount(count) {
+config.mode = 'words';
+config.wordCount = count;
+document.querySelectorAll('.config-btn').forEach(btn => {
+btn.classList.remove('active');
+});
+event.target.classList.add('active');
+resetTest();
+}
+function setMode(mode) {
+if (mode === 'punctuation') {
+config.punctuation = !config.punctuation;
+} else if (mode === 'numbers') {
+config.numbers = !config.numbers;
+}
+event.target.classList.toggle('active');
+generateWords();
+renderWords();
+}
+init();
+function loadUserData() {
+const userData = localStorage.getItem('userData');
+if (!userData) {
+window.location.href = 'login.html';
+return;
+}
+try {
+const user = JSON.parse(userData);
+document.getElementById('user-name').textContent = user.name;
+document.getElementById('user-college').textContent = user.college;
+} catch (error) {
+console.error('Error parsing user data:', error);
+window.location.href = 'login.html';
+}
+}
+function logout() {
+localStorage.removeItem('userData');
+window.location.href = '/logout';
+}
+loadUserData();
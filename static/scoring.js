@@ -0,0 +1,26 @@
+// scoring.js
+// How one finished word is scored. keystroke_verify.py applies the same rule
+// on the server, and tests/test_keystroke_verify.py runs this file under Node
+// to check that the two agree.
+//
+// A typed letter is correct when it matches the target letter at the same
+// position and incorrect otherwise. Letters typed past the end of the target,
+// and target letters never typed, are incorrect once each. The space that
+// ends the word (or the automatic finish of the last word) is one correct char.
+function scoreWord(typed, target) {
+    const shared = Math.min(typed.length, target.length);
+    let matches = 0;
+    for (let i = 0; i < shared; i++) {
+        if (typed[i] === target[i]) {
+            matches++;
+        }
+    }
+    return {
+        correct: matches + 1,
+        incorrect: (shared - matches) + Math.abs(typed.length - target.length)
+    };
+}
+
+if (typeof module !== 'undefined') {
+    module.exports = { scoreWord };
+}
@@ -24,6 +24,13 @@ const config = {
     wordCount: 25
 };
 
+// Keystroke log sent with the result so the server can recompute it:
+// the code of every character added to the input box (8 for one removed)
+// and the milliseconds since the previous change
+function newKeyLog() {
+    return { keys: [], deltas: [], lastTime: null, value: '' };
+}
+
 // State object
 let state = {
     words: [],
@@ -37,7 +44,8 @@ let state = {
     incorrectChars: 0,
     timerInterval: null,
     focused: true,
-    wordsTyped: 0
+    wordsTyped: 0,
+    keyLog: newKeyLog()
 };
 
 // DOM Elements
@@ -160,6 +168,7 @@ function handleInput(e) {
 
     const input = e.target.value;
     const currentWord = state.words[state.currentWordIndex];
+    recordKeystrokes(input);
     
     // Check if this is the last word and it matches exactly
     if (state.currentWordIndex === config.wordCount - 1 && 
@@ -197,49 +206,57 @@ function handleInput(e) {
     timerSpan.textContent = `${config.wordCount - state.wordsTyped} words left`;
 }
 
+// Append the change from the previous input value to the keystroke log
+function recordKeystrokes(input) {
+    const log = state.keyLog;
+    const previous = log.value;
+    const now = Date.now();
+    let common = 0;
+    while (common < previous.length && common < input.length && previous[common] === input[common]) {
+        common++;
+    }
+    const codes = [];
+    for (let i = common; i < previous.length; i++) {
+        codes.push(8);
+    }
+    for (let i = common; i < input.length; i++) {
+        codes.push(input.charCodeAt(i));
+    }
+    codes.forEach((code, i) => {
+        log.keys.push(code);
+        log.deltas.push(i === 0 && log.lastTime !== null ? now - log.lastTime : 0);
+    });
+    log.lastTime = now;
+    // A trailing space moves on to the next word and clears the box
+    log.value = input.endsWith(' ') ? '' : input;
+}
+
 // Check completed word
 function checkWord(typedWord, wordObj) {
     const wordSpan = document.querySelector(`.word[data-index="${state.currentWordIndex}"]`);
-    const letters = wordSpan.querySelectorAll('.letter');
-    
-    let hasError = false;
-    letters.forEach((letter, i) => {
+    // Drop the live preview of extra letters; they are added back below
+    wordSpan.querySelectorAll('.letter.extra').forEach(extra => extra.remove());
+    wordSpan.querySelectorAll('.letter').forEach((letter, i) => {
         if (i < typedWord.length) {
-            if (typedWord[i] === wordObj.text[i]) {
-                letter.classList.add('correct');
-                letter.classList.remove('incorrect');
-                state.correctChars++;
-            } else {
-                letter.classList.add('incorrect');
-                letter.classList.remove('correct');
-                state.incorrectChars++;
-                hasError = true;
-            }
+            const correct = typedWord[i] === wordObj.text[i];
+            letter.classList.toggle('correct', correct);
+            letter.classList.toggle('incorrect', !correct);
         }
     });
-    
-    if (typedWord.length > wordObj.text.length) {
-        const extra = typedWord.slice(wordObj.text.length);
-        extra.split('').forEach(char => {
-            const extraSpan = document.createElement('span');
-            extraSpan.className = 'letter extra';
-            extraSpan.textContent = char;
-            wordSpan.appendChild(extraSpan);
-            state.incorrectChars++;
-            hasError = true;
-        });
-    }
-    
-    if (typedWord.length < wordObj.text.length) {
-        hasError = true;
-        state.incorrectChars += (wordObj.text.length - typedWord.length);
-    }
-    
-    if (hasError) {
+    typedWord.slice(wordObj.text.length).split('').forEach(char => {
+        const extraSpan = document.createElement('span');
+        extraSpan.className = 'letter extra';
+        extraSpan.textContent = char;
+        wordSpan.appendChild(extraSpan);
+    });
+
+    // The counting rule lives in scoring.js, shared with the server's replay
+    const score = scoreWord(typedWord, wordObj.text);
+    state.correctChars += score.correct;
+    state.incorrectChars += score.incorrect;
+    if (score.incorrect > 0) {
         wordSpan.classList.add('error');
     }
-    
-    state.correctChars++; // Count space
 }
 
 // Check current word being typed
@@ -319,7 +336,14 @@ function endTest() {
             body: JSON.stringify({
                 wpm: wpm,
                 accuracy: accuracy,
-                duration_seconds: 60  // Fixed duration for 25-word test
+                raw_wpm: rawWpm,
+                duration_seconds: 60,  // Fixed duration for 25-word test
+                keystrokes: {
+                    v: 1,
+                    words: state.words.map(word => word.text),
+                    keys: state.keyLog.keys,
+                    deltas: state.keyLog.deltas
+                }
             })
         })
         .then(response => {
@@ -356,7 +380,8 @@ function resetTest() {
         correctChars: 0,
         incorrectChars: 0,
         focused: true,
-        wordsTyped: 0
+        wordsTyped: 0,
+        keyLog: newKeyLog()
     };
     
     typingInput.value = '';
@@ -0,0 +1,182 @@
+# storage.py
+"""
+Storage facade used by the app and scripts.
+
+The backend is picked with STORAGE_BACKEND:
+
+    supabase   supabase_client.py (default)
+    sqlite     sqlite_client.py
+
+Both modules expose insert_score, insert_scores, get_leaderboard,
+clear_leaderboard, delete_user_from_leaderboard,
+delete_users_from_leaderboard, save_event, insert_keystroke_log,
+get_keystroke_logs and get_user_rank, returning either a response with the
+rows in `data` or a dict with an "error" key. On top of the backend this
+module adds:
+
+    caching       the shared leaderboard cache, invalidated on writes
+    metrics       call timings and counts (see metrics.py)
+    resilience    deadlines, retried reads and a circuit breaker
+                  (see resilience.py), with leaderboard pages falling
+                  back to the last good copy while storage is failing
+    set_backend   swap in another backend module at runtime
+    warm_up       run the backend's deferred setup early
+"""
+import os
+import importlib
+import logging
+from leaderboard_cache import leaderboard_cache
+from metrics import timed
+from startup import load_env
+import resilience
+
+logger = logging.getLogger(__name__)
+
+load_env()  # STORAGE_BACKEND may come from .env
+
+BACKENDS = {
+    "supabase": "supabase_client",
+    "sqlite": "sqlite_client",
+}
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase").lower()
+
+if STORAGE_BACKEND not in BACKENDS:
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}, expected one of {sorted(BACKENDS)}")
+
+backend = importlib.import_module(BACKENDS[STORAGE_BACKEND])
+logger.info(f"Using {STORAGE_BACKEND} storage backend")
+
+circuit_breaker = resilience.CircuitBreaker()
+last_good = resilience.LastGoodStore()
+
+def _call(name, *args, read=False):
+    return resilience.call(circuit_breaker, name, getattr(backend, name), *args, read=read)
+
+def set_backend(module):
+    """
+    Swap the backend module at runtime, e.g. for the in-memory backend in
+    benchmarks/fake_backend.py. Cached reads from the old backend are dropped.
+    """
+    global backend
+    backend = module
+    leaderboard_cache.invalidate()
+    last_good.clear()
+    circuit_breaker.reset()
+    logger.info(f"Using {getattr(module, '__name__', module)} storage backend")
+
+def warm_up():
+    """Do the backend's deferred setup (e.g. importing its SDK) now"""
+    warm_up_backend = getattr(backend, "warm_up", None)
+    if warm_up_backend is not None:
+        warm_up_backend()
+
+def after_write(response):
+    """
+    Invalidate cached leaderboard reads after a successful write. Score
+    writes always count: a score that is not a personal best can still
+    change the day, week or event boards.
+    """
+    if 'error' in response:
+        return
+    leaderboard_cache.invalidate()
+
+@timed(STORAGE_BACKEND)
+def insert_score(username: str, college: str, wpm: int, accuracy: float, duration_seconds: int, raw_wpm: int = None):
+    response = _call("insert_score", username, college, wpm, accuracy, duration_seconds, raw_wpm)
+    after_write(response)
+    return response
+
+@timed(STORAGE_BACKEND)
+def insert_scores(scores: list):
+    response = _call("insert_scores", scores)
+    after_write(response)
+    return response
+
+def cache_key(limit, cursor, college, window=None):
+    return (window, college.strip().upper() if college else None, limit, cursor)
+
+@timed(STORAGE_BACKEND)
+def get_leaderboard(limit: int = 10, cursor: str = None, college: str = None, window: str = None):
+    """
+    Cached leaderboard page, optionally for one college and/or one window key
+    (see leaderboard_windows.py). Entries live for LEADERBOARD_CACHE_TTL
+    seconds and are dropped by any leaderboard write. If storage fails, the
+    last good copy of the page is returned with "stale": True.
+    """
+    key = cache_key(limit, cursor, college, window)
+    response = leaderboard_cache.get_or_load(key, lambda: load_page(key, limit, cursor, college, window))
+    if 'error' in response:
+        return last_good.fallback(key, response)
+    return response
+
+def load_page(key, limit, cursor, college, window):
+    """Uncached page read, remembered in last_good when it succeeds"""
+    response = _call("get_leaderboard", limit, cursor, college, window, read=True)
+    last_good.save(key, response)
+    return response
+
+def iter_leaderboard(page_size: int = 1000, college: str = None, window: str = None):
+    """
+    Yield every leaderboard row in ranking order, one keyset page at a time,
+    optionally for one college and/or window key. Bypasses the cache; raises
+    RuntimeError if a page cannot be fetched.
+    """
+    cursor = None
+    while True:
+        resp = _call("get_leaderboard", page_size, cursor, college, window, read=True)
+        if 'error' in resp:
+            raise RuntimeError(resp['error'])
+        yield from resp['data']
+        cursor = resp['next_cursor']
+        if not cursor:
+            return
+
+@timed(STORAGE_BACKEND)
+def get_user_rank(username: str, neighbours: int = 5, exclude: list = (), college_board: bool = False):
+    """
+    Where `username` stands, from the backend's indexed COUNT queries (not
+    cached). See sqlite_client.get_user_rank for the result.
+    """
+    return _call("get_user_rank", username, neighbours, exclude, college_board, read=True)
+
+@timed(STORAGE_BACKEND)
+def clear_leaderboard():
+    response = _call("clear_leaderboard")
+    after_write(response)
+    return response
+
+@timed(STORAGE_BACKEND)
+def delete_user_from_leaderboard(username: str):
+    response = _call("delete_user_from_leaderboard", username)
+    after_write(response)
+    return response
+
+@timed(STORAGE_BACKEND)
+def delete_users_from_leaderboard(usernames: list):
+    response = _call("delete_users_from_leaderboard", usernames)
+    after_write(response)
+    return response
+
+@timed(STORAGE_BACKEND)
+def save_event(name: str, starts_at, ends_at):
+    return _call("save_event", name, starts_at, ends_at)
+
+@timed(STORAGE_BACKEND)
+def insert_keystroke_log(entry: dict):
+    return _call("insert_keystroke_log", entry)
+
+def iter_keystroke_logs(page_size: int = 500):
+    """
+    Yield every stored keystroke log in id order, one page at a time.
+    Raises RuntimeError if a page cannot be fetched.
+    """
+    after_id = None
+    while True:
+        resp = _call("get_keystroke_logs", page_size, after_id, read=True)
+        if 'error' in resp:
+            raise RuntimeError(resp['error'])
+        yield from resp['data']
+        if len(resp['data']) < page_size:
+            return
+        after_id = resp['data'][-1]['id']
@@ -1,21 +1,64 @@
 # supabase_client.py
 import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
 import logging
 from functools import lru_cache
+from pagination import encode_cursor, decode_cursor
+from resilience import error_response
+from startup import load_env, phase
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()  # loads .env in dev
+load_env()  # loads .env in dev
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 
+# HTTP limits for the backend. Timeouts apply to both clients; the pool
+# limits apply to the shared async client used by async_storage.
+SUPABASE_TIMEOUT = float(os.environ.get("SUPABASE_TIMEOUT", "10"))
+SUPABASE_CONNECT_TIMEOUT = float(os.environ.get("SUPABASE_CONNECT_TIMEOUT", "3"))
+SUPABASE_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_MAX_KEEPALIVE = int(os.environ.get("SUPABASE_MAX_KEEPALIVE", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.environ.get("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+
+def _http_timeout():
+    import httpx
+    return httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT)
+
 @lru_cache(maxsize=1)
-def get_supabase_client() -> Client:
+def import_sdk():
+    """
+    Import the Supabase SDK (about half a second) on first use rather than
+    with this module; startup.py's LAZY_INIT decides when that is.
+    """
+    with phase("supabase sdk import"):
+        import httpx
+        from supabase import create_client
+        from supabase.lib.client_options import ClientOptions
+        from postgrest import AsyncPostgrestClient
+
+    class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+        """AsyncPostgrestClient whose keep-alive pool is sized from SUPABASE_MAX_* settings"""
+
+        def create_session(self, base_url, headers, timeout):
+            return httpx.AsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                    keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+                )
+            )
+
+    return create_client, ClientOptions, PooledAsyncPostgrestClient
+
+def warm_up():
+    import_sdk()
+
+@lru_cache(maxsize=1)
+def get_supabase_client():
     """
     Get or create a singleton instance of Supabase client
     """
@@ -24,91 +67,150 @@ def get_supabase_client() -> Client:
         raise RuntimeError("Missing SUPABASE_URL or SUPABASE_KEY in environment")
         
     try:
-        client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        create_client, ClientOptions, _ = import_sdk()
+        client = create_client(SUPABASE_URL, SUPABASE_KEY, ClientOptions(postgrest_client_timeout=_http_timeout()))
         logger.info("Supabase client created/retrieved successfully")
         return client
     except Exception as e:
         logger.error(f"Failed to create Supabase client: {str(e)}")
         raise
 
-def insert_score(username: str, college: str, wpm: int, accuracy: float, duration_seconds: int):
+_async_client = None
+
+def get_async_postgrest_client():
+    """
+    Get or create the shared async PostgREST client. It is bound to the event
+    loop it is first used on, so only call it from async_storage's backend loop.
+    """
+    global _async_client
+    if _async_client is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            logger.error("Missing Supabase configuration!")
+            raise RuntimeError("Missing SUPABASE_URL or SUPABASE_KEY in environment")
+        _, _, PooledAsyncPostgrestClient = import_sdk()
+        _async_client = PooledAsyncPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers={"apiKey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"},
+            timeout=_http_timeout()
+        )
+        logger.info("Async Supabase client created")
+    return _async_client
+
+def _score_params(username, college, wpm, accuracy, duration_seconds, raw_wpm=None):
+    return {
+        "p_username": username,
+        "p_college": college,
+        "p_wpm": int(wpm),
+        "p_accuracy": float(accuracy),
+        "p_duration_seconds": int(duration_seconds),
+        "p_raw_wpm": int(raw_wpm) if raw_wpm is not None else None
+    }
+
+def _scores_payload(scores):
+    return {
+        "p_scores": [
+            {
+                "username": score["username"],
+                "college": score["college"],
+                "wpm": int(score["wpm"]),
+                "raw_wpm": int(score["raw_wpm"]) if score.get("raw_wpm") is not None else None,
+                "accuracy": float(score["accuracy"]),
+                "duration_seconds": int(score.get("duration_seconds", 60))
+            }
+            for score in scores
+        ]
+    }
+
+def _page_rpc(window):
+    return "window_leaderboard_page" if window else "leaderboard_page"
+
+def _page_params(limit, cursor, college, window=None):
+    params = {"p_limit": int(limit)}
+    if window:
+        params["p_window_key"] = window
+    if college:
+        params["p_college"] = college
+    if cursor:
+        after_wpm, after_username = decode_cursor(cursor)
+        params["p_after_wpm"] = int(after_wpm)
+        params["p_after_username"] = after_username
+    return params
+
+def _page_result(rankings, limit):
+    # A full page means there may be more rows after it
+    next_cursor = encode_cursor(rankings[-1]) if rankings and len(rankings) == limit else None
+    return {"data": rankings, "next_cursor": next_cursor}
+
+def insert_score(username: str, college: str, wpm: int, accuracy: float, duration_seconds: int, raw_wpm: int = None):
     """
-    Insert a score row into leaderboard table.
-    Returns (data, error) same as supabase client result.
+    Record a score with one call to the submit_score function in schema.sql,
+    which appends it to score_history and updates the user's summary row. The
+    best-run columns only change when `wpm` beats the user's personal best;
+    resp.data holds the summary row.
     """
     try:
-        logger.info(f"Attempting to insert score for user: {username}")
-        logger.info(f"Score details - College: {college}, WPM: {wpm}, Accuracy: {accuracy}, Duration: {duration_seconds}")
+        logger.debug("Attempting to insert score for user: %s", username)
+        logger.debug("Score details - College: %s, WPM: %s, Accuracy: %s, Duration: %s",
+                     college, wpm, accuracy, duration_seconds)
         
         supabase = get_supabase_client()
         
-        # First delete any existing record for this username
-        supabase.table("leaderboard").delete().eq("username", username).execute()
-        
-        # Then insert the new record
-        resp = supabase.table("leaderboard").insert(
-            {
-                "username": username,
-                "college": college,
-                "wpm": wpm,
-                "accuracy": float(accuracy),
-                "duration_seconds": int(duration_seconds)
-            }
+        resp = supabase.rpc(
+            "submit_score",
+            _score_params(username, college, wpm, accuracy, duration_seconds, raw_wpm)
         ).execute()
         
-        logger.info(f"Score inserted successfully")
+        logger.debug("Score inserted successfully")
         return resp
     except Exception as e:
         logger.error(f"Error inserting score: {str(e)}")
-        return {"error": str(e)}
+        return error_response(e)
 
-def get_leaderboard(limit: int = 10):
+def insert_scores(scores: list):
     """
-    Get the top scores ordered by WPM, showing only the best score per user
-    Returns (data, error) same as supabase client result
+    Record many scores with one call to submit_scores in schema.sql. Each
+    score is a dict with username, college, wpm, accuracy, duration_seconds
+    and optionally raw_wpm; every score goes to the history and, as with
+    insert_score, only personal bests replace the best-run columns.
     """
     try:
-        logger.info(f"Fetching leaderboard (limit: {limit})")
+        logger.info(f"Attempting to insert {len(scores)} scores")
         supabase = get_supabase_client()
-        
-        # First get all scores to calculate aggregates
-        resp = supabase.table("leaderboard").select("*").execute()
-        
-        # Group by username and calculate metrics
-        user_scores = {}
-        for entry in resp.data:
-            username = entry.get('username')
-            if username not in user_scores:
-                user_scores[username] = {
-                    'username': username,
-                    'college': entry.get('college', 'Unknown'),
-                    'best_wpm': float(entry.get('wpm', 0)),
-                    'avg_accuracy': float(entry.get('accuracy', 0)),
-                    'tests_taken': 1
-                }
-            else:
-                current = user_scores[username]
-                current['best_wpm'] = max(current['best_wpm'], float(entry.get('wpm', 0)))
-                current['avg_accuracy'] = (current['avg_accuracy'] * current['tests_taken'] + 
-                                        float(entry.get('accuracy', 0))) / (current['tests_taken'] + 1)
-                current['tests_taken'] += 1
-        
-        # Convert to list and sort by best WPM
-        rankings = list(user_scores.values())
-        rankings.sort(key=lambda x: x['best_wpm'], reverse=True)
-        
-        # Apply limit
-        rankings = rankings[:limit]
-        
-        logger.info(f"Retrieved {len(rankings)} unique users for leaderboard")
-        return {"data": rankings}
+
+        resp = supabase.rpc("submit_scores", _scores_payload(scores)).execute()
+
+        logger.info(f"Bulk insert updated {len(resp.data or [])} users")
+        return resp
+    except Exception as e:
+        logger.error(f"Error inserting scores: {str(e)}")
+        return error_response(e)
+
+def get_leaderboard(limit: int = 10, cursor: str = None, college: str = None, window: str = None):
+    """
+    Get the top scores ordered by WPM, showing only the best score per user.
+    Aggregation, ordering, the college filter and the limit run in the database
+    (see the leaderboard_page function in schema.sql), so only `limit` rows are
+    fetched. Pass the returned next_cursor back in as `cursor` to get the next page.
+    With a `window` key (see leaderboard_windows.py) the page comes from that
+    day/week/event rollup instead (window_leaderboard_page).
+    Returns {"data": rankings, "next_cursor": str or None}
+    """
+    try:
+        logger.debug("Fetching leaderboard (limit: %s, cursor: %s, college: %s, window: %s)", limit, cursor, college, window)
+        supabase = get_supabase_client()
+
+        resp = supabase.rpc(_page_rpc(window), _page_params(limit, cursor, college, window)).execute()
+        rankings = resp.data or []
+
+        logger.debug("Retrieved %d unique users for leaderboard", len(rankings))
+        return _page_result(rankings, limit)
     except Exception as e:
         logger.error(f"Error fetching leaderboard: {str(e)}")
-        return {"error": str(e)}
+        return error_response(e)
 
 def clear_leaderboard():
     """
-    Remove all records from the leaderboard table
+    Remove all records from the leaderboard, score history and window tables
     Returns (data, error) same as supabase client result
     """
     try:
@@ -117,12 +219,14 @@ def clear_leaderboard():
         
         # Delete all records from the leaderboard table
         resp = supabase.table("leaderboard").delete().neq("id", 0).execute()
+        supabase.table("score_history").delete().neq("id", 0).execute()
+        supabase.table("leaderboard_windows").delete().neq("window_key", "").execute()
         
         logger.info("Successfully cleared leaderboard data")
         return resp
     except Exception as e:
         logger.error(f"Error clearing leaderboard: {str(e)}")
-        return {"error": str(e)}
+        return error_response(e)
 
 def delete_user_from_leaderboard(username: str):
     """
@@ -135,9 +239,169 @@ def delete_user_from_leaderboard(username: str):
         
         # Delete all records for this username
         resp = supabase.table("leaderboard").delete().eq("username", username).execute()
+        supabase.table("score_history").delete().eq("username", username).execute()
+        supabase.table("leaderboard_windows").delete().eq("username", username).execute()
         
         logger.info(f"Successfully deleted user {username} from leaderboard")
         return resp
     except Exception as e:
         logger.error(f"Error deleting user from leaderboard: {str(e)}")
-        return {"error": str(e)}
+        return error_response(e)
+
+def delete_users_from_leaderboard(usernames: list):
+    """
+    Remove every entry for the given usernames with a single
+    DELETE ... WHERE username IN (...) request
+    """
+    try:
+        logger.info(f"Attempting to delete {len(usernames)} users from leaderboard")
+        supabase = get_supabase_client()
+        resp = supabase.table("leaderboard").delete().in_("username", list(usernames)).execute()
+        supabase.table("score_history").delete().in_("username", list(usernames)).execute()
+        supabase.table("leaderboard_windows").delete().in_("username", list(usernames)).execute()
+        logger.info(f"Deleted {len(resp.data or [])} leaderboard rows")
+        return resp
+    except Exception as e:
+        logger.error(f"Error deleting users from leaderboard: {str(e)}")
+        return error_response(e)
+
+def save_event(name: str, starts_at, ends_at):
+    """
+    Create or reschedule an event; scores made while it runs also go to
+    its board. `starts_at` and `ends_at` are timezone-aware datetimes.
+    """
+    try:
+        logger.info(f"Saving leaderboard event {name}")
+        supabase = get_supabase_client()
+        return supabase.table("leaderboard_events").upsert({
+            "name": name,
+            "starts_at": starts_at.isoformat(),
+            "ends_at": ends_at.isoformat()
+        }).execute()
+    except Exception as e:
+        logger.error(f"Error saving event: {str(e)}")
+        return error_response(e)
+
+def insert_keystroke_log(entry: dict):
+    """
+    Store a keystroke log with its verified results. `entry` has username,
+    college, wpm, raw_wpm, accuracy, duration_ms, flags (list) and log (dict).
+    """
+    try:
+        supabase = get_supabase_client()
+        return supabase.table("keystroke_logs").insert(entry).execute()
+    except Exception as e:
+        logger.error(f"Error storing keystroke log: {str(e)}")
+        return error_response(e)
+
+def get_keystroke_logs(limit: int = 500, after_id: int = None):
+    """Stored keystroke logs in id order, starting after `after_id`"""
+    try:
+        supabase = get_supabase_client()
+        query = supabase.table("keystroke_logs").select("*").order("id").limit(int(limit))
+        if after_id:
+            query = query.gt("id", int(after_id))
+        resp = query.execute()
+        return {"data": resp.data or []}
+    except Exception as e:
+        logger.error(f"Error fetching keystroke logs: {str(e)}")
+        return error_response(e)
+
+def _rank_params(username, neighbours, exclude, college_board):
+    return {
+        "p_username": username,
+        "p_neighbours": int(neighbours),
+        "p_exclude": sorted(exclude),
+        "p_college_board": bool(college_board),
+    }
+
+def get_user_rank(username: str, neighbours: int = 5, exclude: list = (), college_board: bool = False):
+    """
+    A user's global and college rank plus up to `neighbours` rows either side,
+    in one call to the user_rank function in schema.sql. Returns
+    {"data": {"entry", "global_rank", "college_rank", "above", "below"}},
+    with "data" None when the user has no score.
+    """
+    try:
+        supabase = get_supabase_client()
+        resp = supabase.rpc("user_rank", _rank_params(username, neighbours, exclude, college_board)).execute()
+        return {"data": resp.data}
+    except Exception as e:
+        logger.error(f"Error fetching rank for {username}: {str(e)}")
+        return error_response(e)
+
+# Async variants used by async_storage. They share one pooled keep-alive
+# client and otherwise behave exactly like the functions above.
+
+async def async_insert_score(username: str, college: str, wpm: int, accuracy: float, duration_seconds: int,
+                             raw_wpm: int = None):
+    try:
+        logger.debug("Attempting to insert score for user: %s", username)
+        client = get_async_postgrest_client()
+        return await client.rpc(
+            "submit_score",
+            _score_params(username, college, wpm, accuracy, duration_seconds, raw_wpm)
+        ).execute()
+    except Exception as e:
+        logger.error(f"Error inserting score: {str(e)}")
+        return error_response(e)
+
+async def async_insert_scores(scores: list):
+    try:
+        logger.info(f"Attempting to insert {len(scores)} scores")
+        client = get_async_postgrest_client()
+        return await client.rpc("submit_scores", _scores_payload(scores)).execute()
+    except Exception as e:
+        logger.error(f"Error inserting scores: {str(e)}")
+        return error_response(e)
+
+async def async_get_leaderboard(limit: int = 10, cursor: str = None, college: str = None, window: str = None):
+    try:
+        logger.debug("Fetching leaderboard (limit: %s, cursor: %s, college: %s, window: %s)", limit, cursor, college, window)
+        client = get_async_postgrest_client()
+        resp = await client.rpc(_page_rpc(window), _page_params(limit, cursor, college, window)).execute()
+        return _page_result(resp.data or [], limit)
+    except Exception as e:
+        logger.error(f"Error fetching leaderboard: {str(e)}")
+        return error_response(e)
+
+async def async_clear_leaderboard():
+    try:
+        logger.info("Attempting to clear all leaderboard data")
+        client = get_async_postgrest_client()
+        resp = await client.from_("leaderboard").delete().neq("id", 0).execute()
+        await client.from_("score_history").delete().neq("id", 0).execute()
+        await client.from_("leaderboard_windows").delete().neq("window_key", "").execute()
+        return resp
+    except Exception as e:
+        logger.error(f"Error clearing leaderboard: {str(e)}")
+        return error_response(e)
+
+async def async_delete_user_from_leaderboard(username: str):
+    try:
+        logger.info(f"Attempting to delete user {username} from leaderboard")
+        client = get_async_postgrest_client()
+        resp = await client.from_("leaderboard").delete().eq("username", username).execute()
+        await client.from_("score_history").delete().eq("username", username).execute()
+        await client.from_("leaderboard_windows").delete().eq("username", username).execute()
+        return resp
+    except Exception as e:
+        logger.error(f"Error deleting user from leaderboard: {str(e)}")
+        return error_response(e)
+
+async def async_insert_keystroke_log(entry: dict):
+    try:
+        client = get_async_postgrest_client()
+        return await client.from_("keystroke_logs").insert(entry).execute()
+    except Exception as e:
+        logger.error(f"Error storing keystroke log: {str(e)}")
+        return error_response(e)
+
+async def async_get_user_rank(username: str, neighbours: int = 5, exclude: list = (), college_board: bool = False):
+    try:
+        client = get_async_postgrest_client()
+        resp = await client.rpc("user_rank", _rank_params(username, neighbours, exclude, college_board)).execute()
+        return {"data": resp.data}
+    except Exception as e:
+        logger.error(f"Error fetching rank for {username}: {str(e)}")
+        return error_response(e)
@@ -0,0 +1,28 @@
+# tests/test_export.py
+import json
+import pytest
+
+export = pytest.importorskip("export")
+
+
+def failing_pages():
+    yield [{"rank": 1, "username": "alice", "college": "MIT", "best_wpm": 80, "avg_accuracy": 95, "tests_taken": 3}]
+    raise RuntimeError("connection refused")
+
+
+def test_csv_export_raises_when_storage_fails_midway():
+    chunks = []
+    with pytest.raises(RuntimeError):
+        for chunk in export.iter_csv(failing_pages()):
+            chunks.append(chunk)
+    assert "".join(chunks).splitlines() == [",".join(export.EXPORT_FIELDS), "1,alice,MIT,80,95,3"]
+
+
+def test_ndjson_export_ends_with_an_error_line_and_raises():
+    chunks = []
+    with pytest.raises(RuntimeError):
+        for chunk in export.iter_ndjson(failing_pages()):
+            chunks.append(chunk)
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert lines[0]["username"] == "alice"
+    assert lines[-1] == {"error": "connection refused"}
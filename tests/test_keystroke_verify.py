@@ -0,0 +1,125 @@
+# tests/test_keystroke_verify.py
+import os
+import json
+import random
+import shutil
+import subprocess
+import pytest
+
+np = pytest.importorskip("numpy")
+import keystroke_verify
+from keystroke_verify import BACKSPACE, SPACE, replay, verify, verify_batch
+
+SCORING_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "scoring.js")
+
+
+def score_word(typed, target):
+    shared = min(len(typed), len(target))
+    matches = sum(1 for i in range(shared) if typed[i] == target[i])
+    return matches + 1, (shared - matches) + abs(len(typed) - len(target))
+
+
+def naive_replay(words, keys):
+    """The input box replayed one key at a time, as script.js's handleInput sees it"""
+    correct = incorrect = completed = 0
+    buffer = ""
+    last = len(words) - 1
+    for code in keys:
+        if completed > last:
+            break
+        if code == BACKSPACE:
+            buffer = buffer[:-1]
+            continue
+        if code == SPACE:
+            typed, buffer = buffer, ""
+        else:
+            buffer += chr(code)
+            if not (completed == last and buffer == words[last]):
+                continue
+            typed, buffer = buffer, ""
+        word_correct, word_incorrect = score_word(typed, words[completed])
+        correct, incorrect, completed = correct + word_correct, incorrect + word_incorrect, completed + 1
+    return correct, incorrect, completed
+
+
+def codes(text):
+    return [BACKSPACE if char == "\b" else ord(char) for char in text]
+
+
+@pytest.mark.parametrize("typed, expected", [
+    ("the cat", (8, 0, 2)),            # last word finishes without a space
+    ("teh cat", (6, 2, 2)),
+    ("thee cat", (8, 1, 2)),           # one extra letter counts once
+    ("th cat", (7, 1, 2)),             # one missing letter
+    ("thx\be cat", (8, 0, 2)),         # corrected before the space
+    ("the ca", (4, 0, 1)),             # last word unfinished
+    ("the cat dog", (8, 0, 2)),        # keys after the end are ignored
+    ("\b\bthe cat", (8, 0, 2)),        # backspace on an empty box
+])
+def test_replay_examples(typed, expected):
+    assert replay(["the", "cat"], np.asarray(codes(typed), dtype=np.int32)) == expected
+
+
+def test_replay_matches_the_naive_replay():
+    rng = random.Random(7)
+    for _ in range(3000):
+        words = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 6))]
+        if rng.random() < 0.3:
+            keys = codes(" ".join(words))
+        else:
+            keys = [rng.choice([BACKSPACE, SPACE, 97, 98, 99, 97, 98, 99]) for _ in range(rng.randint(1, 40))]
+        assert replay(words, np.asarray(keys, dtype=np.int32)) == naive_replay(words, keys), (words, keys)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_scoring_js_and_replay_use_the_same_rule():
+    rng = random.Random(11)
+    pairs = [("the", "the"), ("thee", "the"), ("th", "the"), ("", "the"), ("xyz", "the")]
+    pairs += [("".join(rng.choice("ab") for _ in range(rng.randint(0, 6))),
+               "".join(rng.choice("ab") for _ in range(rng.randint(1, 6)))) for _ in range(200)]
+    script = (f"const {{ scoreWord }} = require({json.dumps(SCORING_JS)});"
+              f"console.log(JSON.stringify({json.dumps(pairs)}.map(([typed, target]) => scoreWord(typed, target))));")
+    client = json.loads(subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout)
+    for (typed, target), score in zip(pairs, client):
+        # The word scored by the server when it is committed with a space
+        correct, incorrect, _ = replay([target, "end"], np.asarray(codes(typed + " "), dtype=np.int32))
+        assert (score["correct"], score["incorrect"]) == (correct, incorrect), (typed, target)
+
+
+def log_for(text, words, interval):
+    keys = codes(text)
+    return {"v": 1, "words": words, "keys": keys, "deltas": [0] + [interval(i) for i in range(len(keys) - 1)]}
+
+
+def test_verify_recomputes_human_typing():
+    rng = random.Random(3)
+    words = ["the", "quick", "brown", "fox", "jumps"] * 4
+    log = log_for(" ".join(words), words, lambda i: rng.randint(90, 260))
+    result = verify(log)
+    assert result["flags"] == []
+    assert result["accuracy"] == 100 and result["correct_chars"] == sum(len(w) + 1 for w in words)
+
+
+def test_verify_flags_pasted_and_scripted_input():
+    words = ["the", "quick", "brown", "fox", "jumps"] * 4
+    assert "fast_intervals" in verify(log_for(" ".join(words), words, lambda i: 1))["flags"]
+    assert "uniform_intervals" in verify(log_for(" ".join(words), words, lambda i: 100))["flags"]
+    assert "incomplete" in verify(log_for("the quick", words, lambda i: 150 + i % 97))["flags"]
+
+
+def test_verify_rejects_malformed_logs():
+    for log in (None, {"v": 2}, {"v": 1, "words": [], "keys": [97], "deltas": [0]},
+                {"v": 1, "words": ["a"], "keys": [97, 98], "deltas": [0]},
+                {"v": 1, "words": ["a"], "keys": [-1], "deltas": [0]}):
+        with pytest.raises(ValueError):
+            verify(log)
+
+
+def test_verify_batch_matches_verify():
+    rng = random.Random(5)
+    words = ["alpha", "beta", "gamma"]
+    logs = [log_for("alpha bet gamma", words, lambda i: rng.randint(60, 300)) for _ in range(4)]
+    logs.append({"v": 9})
+    results = verify_batch(logs)
+    assert results[:4] == [verify(log) for log in logs[:4]]
+    assert "error" in results[4]
@@ -0,0 +1,126 @@
+# tests/test_leaderboard_cache.py
+import time
+import asyncio
+import threading
+import pytest
+from leaderboard_cache import LeaderboardCache
+
+
+class Loader:
+    """Counts loads; each returns {"data": n} for the n-th call"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+    def __call__(self):
+        n = self._next()
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("storage down")
+        return {"data": n}
+
+    async def aload(self):
+        n = self._next()
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("storage down")
+        return {"data": n}
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_concurrent_threads_share_one_load():
+    cache = LeaderboardCache()
+    loader = Loader(delay=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == 1 and results == [{"data": 1}] * 8
+
+
+def test_concurrent_coroutines_share_one_load():
+    cache = LeaderboardCache()
+    loader = Loader(delay=0.05)
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_load("k", loader.aload) for _ in range(8)))
+
+    assert asyncio.run(main()) == [{"data": 1}] * 8
+    assert loader.calls == 1 and cache.stats()["misses"] == 1
+
+
+def test_async_callers_on_other_loops_wait_for_the_load_in_flight():
+    cache = LeaderboardCache()
+    loader = Loader(delay=0.1)
+    results = []
+
+    def request():
+        # Flask runs each async view on its own event loop
+        results.append(asyncio.run(cache.aget_or_load("k", loader.aload)))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    threads.append(threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == 1 and results == [{"data": 1}] * 5
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_stale_entry_is_served_while_one_refresh_runs(use_async):
+    cache = LeaderboardCache(ttl=0.05, stale_ttl=10)
+    loader = Loader(delay=0.05)
+
+    def get():
+        if use_async:
+            return asyncio.run(cache.aget_or_load("k", loader.aload))
+        return cache.get_or_load("k", loader)
+
+    assert get() == {"data": 1}
+    time.sleep(0.06)
+    assert [get() for _ in range(5)] == [{"data": 1}] * 5
+    wait_for(lambda: cache.get_or_load("k", loader) == {"data": 2})
+    assert loader.calls == 2  # one refresh however many stale reads
+
+
+def test_failed_load_is_not_cached_and_waiters_retry():
+    cache = LeaderboardCache()
+    failing = Loader(delay=0.05, fail=True)
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_load("k", failing.aload) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert failing.calls == 3  # each waiter tried again after the failure
+    assert cache.get_or_load("k", lambda: {"error": "down"}) == {"error": "down"}
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_during_load_drops_the_result():
+    cache = LeaderboardCache()
+
+    def loader():
+        cache.invalidate()
+        return {"data": "before the write"}
+
+    assert cache.get_or_load("k", loader) == {"data": "before the write"}
+    assert cache.get_or_load("k", lambda: {"data": "after"}) == {"data": "after"}
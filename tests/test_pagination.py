@@ -0,0 +1,77 @@
+# tests/test_pagination.py
+import random
+import threading
+import pytest
+from pagination import encode_cursor, decode_cursor
+from ranking_index import RankingIndex
+
+
+@pytest.mark.parametrize("row", [
+    {"best_wpm": 87, "username": "alice"},
+    {"best_wpm": 87.5, "username": "bob_smith"},
+    {"best_wpm": 0, "username": "名前"},
+    {"best_wpm": 120, "username": "with \"quotes\", commas and = signs"},
+])
+def test_cursor_round_trip(row):
+    cursor = encode_cursor(row)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == (float(row["best_wpm"]), row["username"])
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "e30", encode_cursor({"best_wpm": 1, "username": "a"})[:-3]])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def entries(count, seed=1):
+    rng = random.Random(seed)
+    # Few distinct speeds, so pages split runs of tied users
+    return [{"username": f"user{i:03d}", "college": rng.choice(["MIT", "IIT"]),
+             "best_wpm": float(rng.choice([40, 55, 55, 70, 90])), "avg_accuracy": 95.0, "tests_taken": 1}
+            for i in range(count)]
+
+
+def expected_order(rows):
+    return [row["username"] for row in sorted(rows, key=lambda row: (-row["best_wpm"], row["username"]))]
+
+
+def test_ranking_index_pages_cover_the_board_once():
+    rows = entries(57)
+    board = RankingIndex()
+    board.bulk_load(rows)
+    seen, after = [], None
+    while True:
+        page = board.top(10, after)
+        seen += [entry["username"] for entry in page]
+        if len(page) < 10:
+            break
+        after = decode_cursor(encode_cursor(page[-1]))
+    assert seen == expected_order(rows)
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    sqlite_client = pytest.importorskip("sqlite_client")
+    monkeypatch.setattr(sqlite_client, "SQLITE_PATH", str(tmp_path / "leaderboard.db"))
+    monkeypatch.setattr(sqlite_client, "_local", threading.local())
+    yield sqlite_client
+    sqlite_client.get_connection().close()
+
+
+@pytest.mark.parametrize("college", [None, "MIT"])
+def test_sqlite_pages_cover_the_board_once(sqlite_backend, college):
+    rows = entries(45)
+    response = sqlite_backend.insert_scores([
+        {"username": row["username"], "college": row["college"], "wpm": int(row["best_wpm"]),
+         "accuracy": 95.0, "duration_seconds": 60} for row in rows
+    ])
+    assert "error" not in response
+    seen, cursor = [], None
+    while True:
+        page = sqlite_backend.get_leaderboard(limit=7, cursor=cursor, college=college)
+        seen += [row["username"] for row in page["data"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == expected_order([row for row in rows if college is None or row["college"] == college])
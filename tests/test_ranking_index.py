@@ -0,0 +1,135 @@
+# tests/test_ranking_index.py
+import pytest
+from ranking_index import LeaderboardIndex, RankingIndex
+
+
+def row(username, best_wpm, college="MIT", tests_taken=1, avg_accuracy=95.0):
+    return {"username": username, "college": college, "best_wpm": best_wpm,
+            "tests_taken": tests_taken, "avg_accuracy": avg_accuracy}
+
+
+def rows_then(rows, action):
+    """Yield `rows`, running `action` halfway through, like a write landing during the storage read"""
+    half = len(rows) // 2
+    for position, item in enumerate(rows):
+        if position == half:
+            action()
+        yield item
+
+
+def names(index, college=None):
+    return [entry["username"] for entry in index.top(100, college)]
+
+
+def test_ranking_index_orders_by_wpm_then_username():
+    board = RankingIndex()
+    board.bulk_load([row("carol", 50), row("alice", 70), row("bob", 70)])
+    assert [entry["username"] for entry in board.top(3)] == ["alice", "bob", "carol"]
+    assert board.rank("carol") == 3
+    assert [entry["username"] for entry in board.top(2, after=(70, "alice"))] == ["bob", "carol"]
+    above, below = board.around(2, 1, 1)
+    assert [(e["username"], e["rank"]) for e in above + below] == [("alice", 1), ("carol", 3)]
+
+
+def test_load_builds_global_and_college_boards():
+    index = LeaderboardIndex(hidden=frozenset({"hidden"}))
+    assert index.load([row("alice", 80, "mit"), row("bob", 60, "Stanford"), row("hidden", 200)])
+    assert names(index) == ["alice", "bob"]
+    assert names(index, "MIT") == ["alice"]
+    standing = index.standing("bob")
+    assert (standing["global_rank"], standing["college_rank"]) == (2, 1)
+
+
+def test_record_keeps_best_and_running_totals():
+    index = LeaderboardIndex()
+    index.load([row("alice", 60, avg_accuracy=90.0)])
+    index.record("alice", "MIT", 50, 100.0)
+    entry = index.standing("alice")["entry"]
+    assert (entry["best_wpm"], entry["tests_taken"], entry["avg_accuracy"]) == (60, 2, 95.0)
+
+    index.record("bob", "MIT", 70, 90.0)
+    assert names(index) == ["bob", "alice"]
+    index.record("alice", "Stanford", 90, 90.0)
+    assert names(index) == ["alice", "bob"]
+    assert names(index, "MIT") == ["bob"]
+    assert names(index, "STANFORD") == ["alice"]
+
+
+def test_record_during_load_is_kept():
+    index = LeaderboardIndex()
+    index.load([row("alice", 60)])
+    snapshot = [row("alice", 60), row("bob", 40)]
+    assert index.load(rows_then(snapshot, lambda: (index.record("carol", "MIT", 55, 90.0),
+                                                   index.record("alice", "MIT", 75, 90.0))))
+    assert names(index) == ["alice", "carol", "bob"]
+    assert index.standing("alice")["entry"]["tests_taken"] == 2
+
+
+def test_record_already_in_snapshot_is_not_counted_twice():
+    index = LeaderboardIndex()
+    index.load([row("alice", 60)])
+
+    def recorded_and_stored():
+        index.record("alice", "MIT", 70, 90.0)
+        snapshot[0] = row("alice", 70, tests_taken=2)
+
+    snapshot = [row("alice", 60), row("bob", 40)]
+    index.load(rows_then(snapshot, recorded_and_stored))
+    entry = index.standing("alice")["entry"]
+    assert (entry["best_wpm"], entry["tests_taken"]) == (70, 2)
+
+
+@pytest.mark.parametrize("change", ["clear", "remove"])
+def test_clear_or_remove_during_load_discards_the_snapshot(change):
+    index = LeaderboardIndex()
+    index.load([row("alice", 60), row("bob", 50)])
+    version = index.version
+
+    def admin_action():
+        if change == "clear":
+            index.clear()
+        else:
+            index.remove("alice")
+
+    assert index.load(rows_then([row("alice", 60), row("bob", 50)], admin_action)) is False
+    assert names(index) == ([] if change == "clear" else ["bob"])
+    assert index.version > version
+    # The next resync starts from the changed storage
+    assert index.load([row("bob", 50)])
+    assert names(index) == ["bob"]
+
+
+def test_newer_load_wins_over_an_older_one():
+    index = LeaderboardIndex()
+    outcome = {}
+
+    def newer_load():
+        outcome["newer"] = index.load([row("bob", 50)])
+
+    outcome["older"] = index.load(rows_then([row("alice", 60), row("stale", 10)], newer_load))
+    assert outcome == {"newer": True, "older": False}
+    assert names(index) == ["bob"]
+
+
+def test_failed_load_keeps_the_current_boards():
+    index = LeaderboardIndex()
+    index.load([row("alice", 60)])
+
+    def broken():
+        yield row("bob", 50)
+        raise RuntimeError("storage went away")
+
+    with pytest.raises(RuntimeError):
+        index.load(broken())
+    assert names(index) == ["alice"]
+    index.record("carol", "MIT", 40, 90.0)
+    assert names(index) == ["alice", "carol"]
+
+
+def test_clear_then_record_starts_a_fresh_board():
+    index = LeaderboardIndex()
+    index.load([row("alice", 60)])
+    index.clear()
+    assert len(index) == 0 and index.top(10, "MIT") == []
+    index.record("bob", "MIT", 40, 90.0)
+    assert names(index) == ["bob"]
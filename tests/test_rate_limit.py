@@ -0,0 +1,65 @@
+# tests/test_rate_limit.py
+import pytest
+import rate_limit
+from rate_limit import SubmissionLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_limited_until_a_token_refills(clock):
+    limiter = SubmissionLimiter(rate_per_minute=6, burst=3, duplicate_window=10)
+    for attempt in range(3):
+        verdict, submission = limiter.admit("alice", attempt)
+        assert verdict == "allowed"
+        limiter.finish("alice", submission, "ok")
+    verdict, retry_after = limiter.admit("alice", 3)
+    assert verdict == "limited" and retry_after == pytest.approx(10)
+    clock[0] += 10
+    assert limiter.admit("alice", 4)[0] == "allowed"
+
+
+def test_buckets_are_per_key(clock):
+    limiter = SubmissionLimiter(rate_per_minute=6, burst=1)
+    assert limiter.admit("alice", 1)[0] == "allowed"
+    assert limiter.admit("alice", 2)[0] == "limited"
+    assert limiter.admit("bob", 1)[0] == "allowed"
+
+
+def test_duplicate_shares_the_first_result_without_a_token(clock):
+    limiter = SubmissionLimiter(rate_per_minute=6, burst=1, duplicate_window=10)
+    verdict, first = limiter.admit("alice", (60, 95, 60))
+    assert verdict == "allowed"
+    verdict, duplicate = limiter.admit("alice", (60, 95, 60))
+    assert verdict == "duplicate" and duplicate is first
+    limiter.finish("alice", first, {"success": True})
+    assert duplicate.future.result(timeout=1) == {"success": True}
+    assert limiter.stats()["coalesced"] == 1
+
+
+def test_duplicates_expire_after_the_window(clock):
+    limiter = SubmissionLimiter(rate_per_minute=60, burst=2, duplicate_window=10)
+    limiter.admit("alice", "same")
+    clock[0] += 11
+    assert limiter.admit("alice", "same")[0] == "allowed"
+
+
+def test_failed_submission_is_not_coalesced(clock):
+    limiter = SubmissionLimiter(rate_per_minute=60, burst=2, duplicate_window=10)
+    verdict, first = limiter.admit("alice", "same")
+    limiter.finish("alice", first, {"success": False}, ok=False)
+    assert first.future.result(timeout=1) == {"success": False}
+    assert limiter.admit("alice", "same")[0] == "allowed"
+
+
+def test_least_recently_used_keys_are_dropped(clock):
+    limiter = SubmissionLimiter(rate_per_minute=6, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.admit(key, 1)
+    assert limiter.stats()["tracked_keys"] == 2
+    assert limiter.admit("a", 2)[0] == "allowed"  # "a" was evicted, so its bucket is full again
+    assert limiter.admit("c", 2)[0] == "limited"
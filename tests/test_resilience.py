@@ -0,0 +1,152 @@
+# tests/test_resilience.py
+import time
+import asyncio
+import sqlite3
+import pytest
+import resilience
+from resilience import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "STORAGE_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(resilience, "STORAGE_READ_RETRIES", 2)
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_reset():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.stats()["consecutive_failures"] == 0
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.stats()["opened"] == 2
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+class FakeTransportError(Exception):
+    """Stands in for httpx.ConnectError without importing httpx"""
+
+
+FakeTransportError.__module__ = "httpx"
+FakeTransportError.__name__ = "TransportError"
+
+
+@pytest.mark.parametrize("exception, transient", [
+    (ConnectionRefusedError("refused"), True),
+    (TimeoutError("timed out"), True),
+    (sqlite3.OperationalError("database is locked"), True),
+    (FakeTransportError("connect failed"), True),
+    (sqlite3.OperationalError("no such table: leaderboard"), False),
+    (sqlite3.IntegrityError("UNIQUE constraint failed"), False),
+    (RuntimeError("canceling statement due to statement timeout"), False),
+    (ValueError("bad input: 503 ssl connect"), False),
+])
+def test_error_response_classifies_by_exception_type(exception, transient):
+    response = resilience.error_response(exception)
+    assert response["error"] == str(exception)
+    assert resilience.is_transient(response) is transient
+
+
+def failing(responses):
+    """A backend call returning `responses` in turn, counting the attempts"""
+    def call():
+        call.attempts += 1
+        return responses[min(call.attempts, len(responses)) - 1]
+    call.attempts = 0
+    return call
+
+
+def test_failed_read_is_retried_and_counts_as_one_failure():
+    breaker = CircuitBreaker(failure_threshold=2)
+    backend = failing([{"error": "refused", "transient": True}])
+    response = resilience.call(breaker, "get_leaderboard", backend, read=True)
+    assert response["error"] == "refused"
+    assert backend.attempts == 3
+    assert breaker.stats()["consecutive_failures"] == 1 and breaker.state == CLOSED
+
+
+def test_retry_that_succeeds_counts_as_success():
+    breaker = CircuitBreaker()
+    backend = failing([{"error": "refused", "transient": True}, {"data": []}])
+    assert resilience.call(breaker, "get_leaderboard", backend, read=True) == {"data": []}
+    assert backend.attempts == 2 and breaker.stats()["consecutive_failures"] == 0
+
+
+def test_writes_are_not_retried():
+    breaker = CircuitBreaker()
+    backend = failing([{"error": "refused", "transient": True}])
+    resilience.call(breaker, "insert_score", backend)
+    assert backend.attempts == 1 and breaker.stats()["consecutive_failures"] == 1
+
+
+def test_backend_errors_are_not_retried_or_counted():
+    breaker = CircuitBreaker(failure_threshold=1)
+    backend = failing([{"error": "duplicate key"}])
+    assert resilience.call(breaker, "get_leaderboard", backend, read=True) == {"error": "duplicate key"}
+    assert backend.attempts == 1 and breaker.state == CLOSED
+
+
+def test_open_circuit_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    backend = failing([{"data": []}])
+    response = resilience.call(breaker, "get_leaderboard", backend, read=True)
+    assert response["circuit_open"] and backend.attempts == 0
+
+
+def test_half_open_trial_may_retry_and_closes_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    backend = failing([{"error": "refused", "transient": True}, {"data": []}])
+    assert resilience.call(breaker, "get_leaderboard", backend, read=True) == {"data": []}
+    assert breaker.state == CLOSED
+
+
+def test_raised_exceptions_and_timeouts_are_transient(monkeypatch):
+    breaker = CircuitBreaker()
+
+    def raises():
+        raise ConnectionResetError("reset by peer")
+
+    assert resilience.call(breaker, "get_leaderboard", raises)["transient"]
+
+    def hangs():
+        time.sleep(0.2)
+        return {"data": []}
+
+    monkeypatch.setattr(resilience, "STORAGE_WRITE_DEADLINE", 0.05)
+    assert resilience.call(breaker, "insert_score", hangs) == {"error": "Storage call timed out", "transient": True}
+
+
+def test_acall_counts_one_failure_per_call():
+    breaker = CircuitBreaker(failure_threshold=5)
+    attempts = []
+
+    async def make_call():
+        attempts.append(1)
+        return {"error": "refused", "transient": True}
+
+    asyncio.run(resilience.acall(breaker, "get_leaderboard", make_call, read=True))
+    assert len(attempts) == 3 and breaker.stats()["consecutive_failures"] == 1
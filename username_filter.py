@@ -0,0 +1,235 @@
+# username_filter.py
+import os
+import re
+import json
+import hashlib
+import logging
+from functools import lru_cache
+from custom_profanity import CUSTOM_PROFANITY_WORDS
+from startup import phase
+
+logger = logging.getLogger(__name__)
+
+# Prebuilt word set (see write_profanity_snapshot); rebuilt when stale
+PROFANITY_SNAPSHOT_PATH = os.environ.get(
+    "PROFANITY_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profanity_snapshot.json")
+)
+PROFANITY_SNAPSHOT_VERSION = 1
+
+# Extra patterns checked against the text with spaces and dots removed
+INAPPROPRIATE_PATTERNS = [
+    r'maa\s*ka',
+    r'teri\s*maa',
+    r'ashiq',
+    r'left\s*nihal'
+]
+
+# Name variants that are blocked anywhere in the username
+BLOCKED_NAME_PATTERNS = [
+    r'r\s*i\s*y\s*a+',
+    r'r\s*h\s*e\s*a+',
+    r'r\s*i\s*a+',
+    r'r\s*e+\s*y\s*a+'
+]
+
+VERDICT_CACHE_SIZE = 4096
+
+
+class CompiledWordSet:
+    """
+    Drop-in replacement for Profanity.CENSOR_WORDSET.
+
+    better_profanity stores one VaryingString per word and answers
+    `word in CENSOR_WORDSET` by comparing against every one of them in Python,
+    which costs milliseconds per username. A VaryingString equals a string
+    exactly when the string matches the word with each character replaced by
+    its CHARS_MAPPING class, so the whole list compiles into one anchored
+    regex (built as a trie so shared prefixes are only tried once).
+    """
+
+    def __init__(self, words, char_map=None, pattern=None):
+        self._words = sorted(set(words))
+        if pattern is None:
+            trie = {}
+            for word in self._words:
+                node = trie
+                for char in word:
+                    node = node.setdefault(char, {})
+                node[''] = {}  # end of word
+            pattern = self._trie_to_regex(trie, char_map)
+        self._pattern = re.compile(pattern, re.DOTALL)
+
+    @property
+    def pattern(self):
+        return self._pattern.pattern
+
+    def __contains__(self, text):
+        return isinstance(text, str) and self._pattern.fullmatch(text) is not None
+
+    def __iter__(self):
+        return iter(self._words)
+
+    def __len__(self):
+        return len(self._words)
+
+    @classmethod
+    def _trie_to_regex(cls, node, char_map):
+        branches = []
+        for char, child in sorted(node.items()):
+            if char == '':
+                branches.append('')
+                continue
+            options = char_map.get(char, (char,))
+            if len(options) == 1:
+                atom = re.escape(options[0])
+            else:
+                atom = '[' + ''.join(re.escape(option) for option in options) + ']'
+            branches.append(atom + cls._trie_to_regex(child, char_map))
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+
+def build_profanity_filter():
+    """
+    better_profanity filter with the default and custom word lists, whose
+    word lookups go through CompiledWordSet
+    """
+    from better_profanity import Profanity
+    profanity = Profanity()  # loads the default word list
+    profanity.add_censor_words(CUSTOM_PROFANITY_WORDS)
+    words = [str(word) for word in profanity.CENSOR_WORDSET]
+    profanity.CENSOR_WORDSET = CompiledWordSet(words, profanity.CHARS_MAPPING)
+    return profanity
+
+
+def _word_list_fingerprint():
+    """Hash of everything the compiled word set is built from"""
+    from better_profanity.utils import get_complete_path_of_file
+    digest = hashlib.sha256(f"{PROFANITY_SNAPSHOT_VERSION}\n".encode())
+    with open(get_complete_path_of_file("profanity_wordlist.txt"), "rb") as f:
+        digest.update(f.read())
+    digest.update("\n".join(sorted(CUSTOM_PROFANITY_WORDS)).encode())
+    return digest.hexdigest()
+
+
+def write_profanity_snapshot(path=PROFANITY_SNAPSHOT_PATH):
+    """
+    Save the compiled word set, so later starts skip building better_profanity's
+    ~1000 VaryingStrings and the trie. Returns the filter that was saved.
+    """
+    profanity = build_profanity_filter()
+    snapshot = {
+        "fingerprint": _word_list_fingerprint(),
+        "max_number_combinations": profanity.MAX_NUMBER_COMBINATIONS,
+        "words": list(profanity.CENSOR_WORDSET),
+        "pattern": profanity.CENSOR_WORDSET.pattern,
+    }
+    with open(path, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    logger.info(f"Wrote profanity snapshot with {len(snapshot['words'])} words to {path}")
+    return profanity
+
+
+def load_profanity_filter(path=PROFANITY_SNAPSHOT_PATH):
+    """
+    build_profanity_filter() from the snapshot at `path` when it matches the
+    current word lists; otherwise build it and try to refresh the snapshot.
+    """
+    from better_profanity import Profanity
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+        if snapshot.get("fingerprint") == _word_list_fingerprint():
+            # A placeholder word keeps Profanity() from loading its default list
+            profanity = Profanity(words=[""])
+            profanity.CENSOR_WORDSET = CompiledWordSet(snapshot["words"], pattern=snapshot["pattern"])
+            profanity.MAX_NUMBER_COMBINATIONS = snapshot["max_number_combinations"]
+            return profanity
+        logger.info("Profanity snapshot is stale, rebuilding")
+    except (OSError, ValueError, KeyError) as e:
+        logger.info(f"No usable profanity snapshot, rebuilding: {str(e)}")
+    try:
+        return write_profanity_snapshot(path)
+    except OSError as e:  # read-only deployments still get a filter
+        logger.warning(f"Could not write profanity snapshot: {str(e)}")
+        return build_profanity_filter()
+
+
+def build_custom_pattern():
+    """
+    One regex covering every custom word (spaces removed) and the
+    inappropriate patterns, searched once over the normalized text
+    """
+    words = sorted({word.replace(" ", "").lower() for word in CUSTOM_PROFANITY_WORDS}, key=len, reverse=True)
+    return re.compile('|'.join([re.escape(word) for word in words] + INAPPROPRIATE_PATTERNS))
+
+
+@lru_cache(maxsize=1)
+def get_profanity_filter():
+    with phase("profanity filter"):
+        return load_profanity_filter()
+
+
+@lru_cache(maxsize=1)
+def get_custom_pattern():
+    return build_custom_pattern()
+
+
+_blocked_name_pattern = re.compile('|'.join(BLOCKED_NAME_PATTERNS))
+
+
+def warm_up():
+    """Build the filters now rather than on the first check"""
+    get_custom_pattern()
+    get_profanity_filter()
+
+
+@lru_cache(maxsize=VERDICT_CACHE_SIZE)
+def contains_inappropriate_text(text):
+    """
+    Advanced check for inappropriate content including Hindi terms and variations
+    """
+    # Convert to lowercase for better matching
+    text = text.lower()
+
+    # Custom words and patterns, with spaces and dots stripped so "ma ka" and
+    # "m.a.k.a" are caught too. Any plain substring match is also a match here.
+    text_without_spaces = text.replace(" ", "").replace(".", "")
+    if get_custom_pattern().search(text_without_spaces):
+        return True
+
+    # better-profanity's word-level check (with leetspeak variants)
+    return get_profanity_filter().contains_profanity(text)
+
+
+@lru_cache(maxsize=VERDICT_CACHE_SIZE)
+def validate_username(username):
+    # Check for inappropriate content
+    if contains_inappropriate_text(username):
+        return False, "Username contains inappropriate language"
+
+    # Check for all name variants anywhere in the username
+    if _blocked_name_pattern.search(username.lower()):
+        return False, "This username is not allowed"
+
+    # Check minimum length
+    if len(username) < 3:
+        return False, "Username must be at least 3 characters long"
+
+    # Check maximum length
+    if len(username) > 30:
+        return False, "Username must be less than 30 characters"
+
+    # Only allow letters, numbers, and underscores
+    if not username.replace('_', '').isalnum():
+        return False, "Username can only contain letters, numbers, and underscores"
+
+    return True, ""
+
+
+if __name__ == "__main__":
+    from logging_setup import configure_logging
+    configure_logging(fmt="text")
+    write_profanity_snapshot()
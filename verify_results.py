@@ -0,0 +1,90 @@
+# verify_results.py
+"""
+Re-verify every stored keystroke log in bulk.
+
+    python verify_results.py --report verification.json
+    python verify_results.py --flagged-only --batch-size 2000
+
+Logs are streamed in id order and recomputed with keystroke_verify in
+batches, so a change to the verification rules can be checked against all
+past submissions. Reports results that changed and newly flagged logs;
+nothing is modified.
+"""
+import argparse
+import json
+import logging
+import time
+from collections import Counter
+from itertools import islice
+from storage import iter_keystroke_logs
+from keystroke_verify import verify_batch
+from logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def reverify(page_size=500, batch_size=1000, flagged_only=False):
+    """
+    Recompute all stored logs. Returns a report dict suitable for JSON output.
+    """
+    started = time.perf_counter()
+    scanned = 0
+    flag_counts = Counter()
+    findings = []
+
+    for batch in _batches(iter_keystroke_logs(page_size), batch_size):
+        scanned += len(batch)
+        results = verify_batch([entry['log'] for entry in batch])
+        for entry, result in zip(batch, results):
+            if 'error' in result:
+                findings.append({'id': entry['id'], 'username': entry['username'], 'error': result['error']})
+                continue
+            flag_counts.update(result['flags'])
+            changed = (result['wpm'], result['accuracy']) != (entry['wpm'], round(entry['accuracy']))
+            if result['flags'] or (changed and not flagged_only):
+                findings.append({
+                    'id': entry['id'],
+                    'username': entry['username'],
+                    'stored': {'wpm': entry['wpm'], 'raw_wpm': entry['raw_wpm'], 'accuracy': entry['accuracy']},
+                    'recomputed': {'wpm': result['wpm'], 'raw_wpm': result['raw_wpm'], 'accuracy': result['accuracy']},
+                    'flags': result['flags'],
+                    'previous_flags': entry.get('flags', []),
+                })
+        logger.info(f"Verified {scanned} logs")
+
+    return {
+        'scanned': scanned,
+        'flagged': sum(1 for finding in findings if finding.get('flags')),
+        'flag_counts': dict(flag_counts),
+        'findings': findings,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute stored keystroke logs and report discrepancies")
+    parser.add_argument('--report', help="write the JSON report to this file")
+    parser.add_argument('--flagged-only', action='store_true', help="only report flagged logs, not changed results")
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    configure_logging(fmt="text")
+    report = reverify(args.page_size, args.batch_size, args.flagged_only)
+
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    logger.info(
+        f"Verified {report['scanned']} logs in {report['elapsed_seconds']}s, "
+        f"{report['flagged']} flagged, {len(report['findings'])} findings"
+    )
+
+if __name__ == "__main__":
+    main()